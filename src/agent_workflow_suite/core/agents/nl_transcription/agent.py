@@ -1,4 +1,7 @@
 from google.adk.agents import Agent
+from agent_workflow_suite.core.ingestion import attach_recording
+from agent_workflow_suite.core.repair import default_repairer
+from agent_workflow_suite.core.state import offload_output
 from .models import Transcription
 
 nl_transcription = Agent(
@@ -6,7 +9,10 @@ nl_transcription = Agent(
     name="nl_transcription",
     description="Transcribes natural language to text.",
     output_schema=Transcription,
-    output_key="nl_transcription",
+    before_model_callback=attach_recording,
+    after_model_callback=offload_output(
+        "nl_transcription", Transcription, repairer=default_repairer
+    ),
 
 )
 
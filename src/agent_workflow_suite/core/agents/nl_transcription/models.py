@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -153,6 +153,14 @@ class Transcription(BaseModel):
         all_steps = list(set(decision_steps + reasoning_steps))
         return sorted(all_steps, key=lambda x: x.num)
     
+    def summarize(self) -> Dict[str, Any]:
+        """Small preview kept in state when the transcription is offloaded."""
+        return {
+            "task": self.summary.task,
+            "steps": len(self.steps),
+            "confidence": self.quality.overall.value,
+        }
+    
     def calc_efficiency_score(self) -> float:
         """Calculate basic efficiency score (0-1)."""
         if not self.steps:
@@ -1,5 +1,12 @@
 from .agent import root_agent, playwright_transcription
-from .models import PlaywrightTranscription, PlaywrightAction, ActionStep, DetectionConfidence
+from .models import (
+    PlaywrightTranscription,
+    PlaywrightAction,
+    ActionStep,
+    DetectionConfidence,
+    ScriptOptimization,
+)
+from .optimizer import compile_mcp_script, optimize_actions, to_mcp_command
 
 __all__ = [
     "root_agent", 
@@ -7,5 +14,9 @@ __all__ = [
     "PlaywrightTranscription", 
     "PlaywrightAction", 
     "ActionStep", 
-    "DetectionConfidence"
-]
\ No newline at end of file
+    "DetectionConfidence",
+    "ScriptOptimization",
+    "compile_mcp_script",
+    "optimize_actions",
+    "to_mcp_command",
+]
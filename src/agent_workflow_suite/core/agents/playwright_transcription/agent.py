@@ -1,4 +1,7 @@
 from google.adk.agents import Agent
+from agent_workflow_suite.core.ingestion import attach_recording
+from agent_workflow_suite.core.repair import default_repairer
+from agent_workflow_suite.core.state import offload_output
 from .models import PlaywrightTranscription
 
 playwright_transcription = Agent(
@@ -6,7 +9,10 @@ playwright_transcription = Agent(
     name="playwright_transcription",
     description="Transcribes screen recordings to detect Playwright browser actions and generate MCP-compatible command sequences.",
     output_schema=PlaywrightTranscription,
-    output_key="playwright_transcription",
+    before_model_callback=attach_recording,
+    after_model_callback=offload_output(
+        "playwright_transcription", PlaywrightTranscription, repairer=default_repairer
+    ),
 )
 
 root_agent = playwright_transcription
\ No newline at end of file
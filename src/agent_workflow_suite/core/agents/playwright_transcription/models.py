@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -79,7 +79,7 @@ class ActionStep(BaseModel):
     page_context: Optional[str] = Field(None, description="Page where action occurred")
     
     # Action parameters (for MCP compatibility)
-    mcp_params: Dict[str, Union[str, int, bool, List[str]]] = Field(
+    mcp_params: Dict[str, Union[str, int, float, bool, List[str]]] = Field(
         default_factory=dict, 
         description="Parameters for MCP action"
     )
@@ -89,6 +89,45 @@ class ActionStep(BaseModel):
     detection_notes: Optional[str] = Field(None, description="Notes about detection quality")
 
 
+class ScriptOptimization(BaseModel):
+    """Result of compiling detected actions into an optimized MCP script."""
+
+    before_steps: int = Field(..., description="Detected action count")
+    after_steps: int = Field(..., description="Action count after optimization")
+
+    # Pass statistics
+    coalesced_typing: int = Field(
+        default=0, description="Keystroke events merged into fills"
+    )
+    merged_scrolls: int = Field(
+        default=0, description="Scroll events merged into bursts"
+    )
+    dropped_screenshots: int = Field(
+        default=0, description="Redundant screenshots removed"
+    )
+    dropped_waits: int = Field(default=0, description="Redundant waits removed")
+    hoisted_navigations: int = Field(
+        default=0, description="Steps discarded by hoisting navigations"
+    )
+    skipped_steps: List[int] = Field(
+        default_factory=list, description="Steps missing required parameters"
+    )
+
+    # Output
+    actions: List[ActionStep] = Field(
+        default_factory=list, description="Optimized action stream"
+    )
+    commands: List[str] = Field(
+        default_factory=list, description="Emitted MCP commands"
+    )
+
+    def reduction(self) -> float:
+        """Fraction of browser round trips removed (0-1)."""
+        if not self.before_steps:
+            return 0.0
+        return 1.0 - self.after_steps / self.before_steps
+
+
 class WorkflowSummary(BaseModel):
     """Technical summary of detected playwright workflow."""
     
@@ -207,18 +246,23 @@ class PlaywrightTranscription(BaseModel):
         ]
         return [action for action in self.actions if action.action in interaction_types]
     
-    def generate_mcp_commands(self) -> List[str]:
+    def generate_mcp_commands(self, optimize: bool = True) -> List[str]:
         """Generate MCP-compatible command list."""
-        commands = []
-        for action in self.actions:
-            if action.action == PlaywrightAction.CLICK and action.selector:
-                commands.append(f"browser_click(selector='{action.selector.value}')")
-            elif action.action == PlaywrightAction.TYPE and action.text_input:
-                commands.append(f"browser_type(text='{action.text_input}')")
-            elif action.action == PlaywrightAction.NAVIGATE and action.url:
-                commands.append(f"browser_navigate(url='{action.url}')")
-            # Add more command generation logic as needed
-        return commands
+        return self.compile_mcp_script(optimize=optimize).commands
+    
+    def compile_mcp_script(self, optimize: bool = True) -> ScriptOptimization:
+        """Compile actions into an MCP script with before/after step counts."""
+        from .optimizer import compile_mcp_script
+        
+        return compile_mcp_script(self.actions, optimize=optimize)
+    
+    def summarize(self) -> Dict[str, Any]:
+        """Small preview kept in state when the transcription is offloaded."""
+        return {
+            "task_type": self.summary.task_type,
+            "actions": len(self.actions),
+            "confidence": self.quality.overall_confidence.value,
+        }
     
     def calc_detection_score(self) -> float:
         """Calculate detection accuracy score (0-1)."""
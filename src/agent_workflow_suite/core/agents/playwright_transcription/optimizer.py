@@ -0,0 +1,377 @@
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .models import (
+    ActionStep,
+    DetectionConfidence,
+    PlaywrightAction,
+    ScriptOptimization,
+)
+
+McpValue = Union[str, int, float, bool, List[str]]
+
+# Actions whose only effect is on the current page view
+_VIEW_ONLY = {
+    PlaywrightAction.SCROLL,
+    PlaywrightAction.SCREEN_MOVE_MOUSE,
+}
+
+# Reads that capture the page without changing it or letting time pass
+_OBSERVING = {PlaywrightAction.TAKE_SCREENSHOT}
+
+_TYPING = {PlaywrightAction.TYPE, PlaywrightAction.SCREEN_TYPE}
+
+_CONFIDENCE_RANK = {
+    DetectionConfidence.LOW: 0,
+    DetectionConfidence.MEDIUM: 1,
+    DetectionConfidence.HIGH: 2,
+}
+
+
+def _same_target(a: ActionStep, b: ActionStep) -> bool:
+    """Whether two steps act on the same element."""
+    if a.selector and b.selector:
+        return a.selector.value == b.selector.value
+    if a.selector or b.selector:
+        return False
+    return a.element_desc == b.element_desc
+
+
+def _merge_into(target: ActionStep, step: ActionStep) -> None:
+    """Extend a kept step with the timing and confidence of a merged one."""
+    target.end = max(target.end, step.end)
+    if _CONFIDENCE_RANK[step.confidence] < _CONFIDENCE_RANK[target.confidence]:
+        target.confidence = step.confidence
+
+
+def _is_number(value: object) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _number(value: float) -> McpValue:
+    """A parameter value, as an int when it has no fractional part."""
+    return int(value) if float(value).is_integer() else value
+
+
+def _typed_text(step: ActionStep) -> str:
+    """Text a typing step enters, from ``text_input`` or its recorded params."""
+    if step.text_input is not None:
+        return step.text_input
+    text = step.mcp_params.get("text")
+    return text if isinstance(text, str) else ""
+
+
+def _wait_seconds(step: ActionStep) -> float:
+    """Recorded wait duration for a WAIT_FOR step."""
+    value = step.mcp_params.get("time")
+    if _is_number(value):
+        return float(value)
+    return max(0.0, step.end - step.start)
+
+
+def _is_time_wait(step: ActionStep) -> bool:
+    """A WAIT_FOR that only sleeps, without a text condition."""
+    return "text" not in step.mcp_params and "textGone" not in step.mcp_params
+
+
+def _discarded_by_navigation(step: ActionStep) -> bool:
+    """Whether a navigation straight after ``step`` makes it pointless.
+
+    Scrolls, pointer moves and plain sleeps only affect the page being left.
+    Text waits synchronize on an earlier action and screenshots are evidence,
+    so both are kept.
+    """
+    if step.action == PlaywrightAction.WAIT_FOR:
+        return _is_time_wait(step)
+    return step.action in _VIEW_ONLY
+
+
+def _checkpoints(actions: List[ActionStep]) -> List[Tuple[Optional[McpValue], ...]]:
+    """Text waits of an action stream, in order."""
+    return [
+        (step.mcp_params.get("text"), step.mcp_params.get("textGone"))
+        for step in actions
+        if step.action == PlaywrightAction.WAIT_FOR and not _is_time_wait(step)
+    ]
+
+
+def _screenshots(actions: List[ActionStep]) -> int:
+    """Number of screenshots in an action stream."""
+    return sum(step.action == PlaywrightAction.TAKE_SCREENSHOT for step in actions)
+
+
+def _unchanged_since_screenshot(actions: List[ActionStep]) -> bool:
+    """Whether the page was already captured after its last state change."""
+    for step in reversed(actions):
+        if step.action == PlaywrightAction.TAKE_SCREENSHOT:
+            return True
+        if step.action not in _OBSERVING:
+            return False
+    return False
+
+
+def coalesce_typing(
+    actions: List[ActionStep], report: ScriptOptimization
+) -> List[ActionStep]:
+    """Merge consecutive keystroke TYPE events on one element into a single fill."""
+    result: List[ActionStep] = []
+    for step in actions:
+        prev = result[-1] if result else None
+        if (
+            prev is not None
+            and step.action in _TYPING
+            and prev.action == step.action
+            and _same_target(prev, step)
+            and not prev.mcp_params.get("submit")
+        ):
+            prev.text_input = _typed_text(prev) + _typed_text(step)
+            # The recorded text is only the first keystroke; the merged fill
+            # is emitted from text_input
+            prev.mcp_params.pop("text", None)
+            if step.mcp_params.get("submit"):
+                prev.mcp_params["submit"] = True
+            _merge_into(prev, step)
+            report.coalesced_typing += 1
+            continue
+        result.append(step)
+    return result
+
+
+def merge_scrolls(
+    actions: List[ActionStep], report: ScriptOptimization
+) -> List[ActionStep]:
+    """Collapse scroll bursts on the same page into one scroll with summed deltas.
+
+    Scrolls whose deltas are not numbers are kept as they are.
+    """
+    axes = ("deltaX", "deltaY")
+    result: List[ActionStep] = []
+    for step in actions:
+        prev = result[-1] if result else None
+        if (
+            prev is not None
+            and step.action == PlaywrightAction.SCROLL
+            and prev.action == PlaywrightAction.SCROLL
+            and prev.page_context == step.page_context
+            and all(
+                _is_number(s.mcp_params.get(axis, 0))
+                for s in (prev, step)
+                for axis in axes
+            )
+        ):
+            for axis in axes:
+                total = prev.mcp_params.get(axis, 0) + step.mcp_params.get(axis, 0)
+                if axis in prev.mcp_params or axis in step.mcp_params:
+                    prev.mcp_params[axis] = _number(total)
+            if step.coordinates:
+                prev.coordinates = step.coordinates
+            _merge_into(prev, step)
+            report.merged_scrolls += 1
+            continue
+        result.append(step)
+    return result
+
+
+def drop_redundant_observations(
+    actions: List[ActionStep], report: ScriptOptimization
+) -> List[ActionStep]:
+    """Drop screenshots and waits that cannot observe anything new."""
+    result: List[ActionStep] = []
+    for step in actions:
+        prev = result[-1] if result else None
+        if step.action == PlaywrightAction.TAKE_SCREENSHOT:
+            if _unchanged_since_screenshot(result):
+                report.dropped_screenshots += 1
+                continue
+        if step.action == PlaywrightAction.WAIT_FOR and prev is not None:
+            if prev.action == PlaywrightAction.WAIT_FOR and _is_time_wait(step):
+                # Back-to-back waits: keep the first, fold sleep time into it
+                if _is_time_wait(prev):
+                    total = _wait_seconds(prev) + _wait_seconds(step)
+                    if "time" in prev.mcp_params:
+                        prev.mcp_params["time"] = _number(total)
+                _merge_into(prev, step)
+                report.dropped_waits += 1
+                continue
+            if prev.action == PlaywrightAction.NAVIGATE and _is_time_wait(step):
+                # browser_navigate already waits for the load event
+                report.dropped_waits += 1
+                continue
+        result.append(step)
+    return result
+
+
+def hoist_navigations(
+    actions: List[ActionStep], report: ScriptOptimization
+) -> List[ActionStep]:
+    """Move navigations up past view-only steps whose effect they discard."""
+    result: List[ActionStep] = []
+    for step in actions:
+        if step.action == PlaywrightAction.NAVIGATE:
+            while result and _discarded_by_navigation(result[-1]):
+                result.pop()
+                report.hoisted_navigations += 1
+            if result and result[-1].action == PlaywrightAction.NAVIGATE:
+                # Only the final URL of a redirect chain matters
+                result.pop()
+                report.hoisted_navigations += 1
+        result.append(step)
+    return result
+
+
+OPTIMIZATION_PASSES: List[
+    Callable[[List[ActionStep], ScriptOptimization], List[ActionStep]]
+] = [
+    coalesce_typing,
+    merge_scrolls,
+    hoist_navigations,
+    drop_redundant_observations,
+]
+
+
+def optimize_actions(actions: List[ActionStep]) -> ScriptOptimization:
+    """Run all optimization passes over a copy of the detected actions."""
+    optimized = [step.model_copy(deep=True) for step in actions]
+    report = ScriptOptimization(before_steps=len(actions), after_steps=len(actions))
+    for optimization_pass in OPTIMIZATION_PASSES:
+        optimized = optimization_pass(optimized, report)
+    # Passes may only drop screenshots of an unchanged page, never text waits
+    if _checkpoints(optimized) != _checkpoints(actions) or (
+        _screenshots(actions) - _screenshots(optimized) != report.dropped_screenshots
+    ):
+        raise ValueError("Optimization changed the script's waits or screenshots")
+    report.actions = optimized
+    report.after_steps = len(optimized)
+    return report
+
+
+# Command emission
+
+
+def _literal(value: McpValue) -> str:
+    """Render a parameter value as an escaped, single-quoted literal."""
+    if isinstance(value, bool):
+        return "True" if value else "False"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, list):
+        return "[" + ", ".join(_literal(v) for v in value) + "]"
+    escaped = (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("'", "\\'")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+    )
+    return f"'{escaped}'"
+
+
+def _target_params(step: ActionStep) -> Dict[str, McpValue]:
+    """Element targeting parameters shared by DOM actions."""
+    params: Dict[str, McpValue] = {}
+    if step.selector:
+        params["selector"] = step.selector.value
+    if step.element_desc:
+        params["element"] = step.element_desc
+    return params
+
+
+def _coordinate_params(step: ActionStep) -> Dict[str, McpValue]:
+    """Vision-mode coordinate parameters."""
+    params: Dict[str, McpValue] = {}
+    if step.element_desc:
+        params["element"] = step.element_desc
+    coords = step.coordinates or {}
+    for key in ("x", "y", "startX", "startY", "endX", "endY"):
+        if key in coords:
+            params[key] = coords[key]
+    return params
+
+
+def _step_params(step: ActionStep) -> Optional[Dict[str, McpValue]]:
+    """Build MCP parameters for a step, or None when a required value is missing."""
+    action = step.action
+    params: Dict[str, McpValue] = {}
+
+    if action in (PlaywrightAction.CLICK, PlaywrightAction.CHECK):
+        params = _target_params(step)
+        if "selector" not in params and "element" not in params:
+            return None
+    elif action == PlaywrightAction.TYPE:
+        params = _target_params(step)
+        if step.text_input is None:
+            return None
+        params["text"] = step.text_input
+    elif action == PlaywrightAction.SELECT:
+        params = _target_params(step)
+        if "values" not in step.mcp_params:
+            if step.text_input is None:
+                return None
+            params["values"] = [step.text_input]
+    elif action == PlaywrightAction.SCROLL:
+        params = _coordinate_params(step)
+    elif action == PlaywrightAction.PRESS_KEY:
+        if not step.key_pressed:
+            return None
+        params["key"] = step.key_pressed
+    elif action in (PlaywrightAction.NAVIGATE, PlaywrightAction.TAB_NEW):
+        if step.url:
+            params["url"] = step.url
+        elif action == PlaywrightAction.NAVIGATE:
+            return None
+    elif action == PlaywrightAction.FILE_UPLOAD:
+        if "paths" not in step.mcp_params:
+            if not step.text_input:
+                return None
+            params["paths"] = [step.text_input]
+    elif action == PlaywrightAction.HANDLE_DIALOG:
+        params["accept"] = True
+        if step.text_input:
+            params["promptText"] = step.text_input
+    elif action == PlaywrightAction.WAIT_FOR:
+        if _is_time_wait(step):
+            params["time"] = _wait_seconds(step)
+    elif action in (PlaywrightAction.SCREEN_CLICK, PlaywrightAction.SCREEN_MOVE_MOUSE):
+        params = _coordinate_params(step)
+        if "x" not in params or "y" not in params:
+            return None
+    elif action == PlaywrightAction.SCREEN_DRAG:
+        params = _coordinate_params(step)
+        if not all(k in params for k in ("startX", "startY", "endX", "endY")):
+            return None
+    elif action == PlaywrightAction.SCREEN_TYPE:
+        if step.text_input is None:
+            return None
+        params["text"] = step.text_input
+
+    # Recorded MCP parameters are authoritative
+    params.update(step.mcp_params)
+    return params
+
+
+def to_mcp_command(step: ActionStep) -> Optional[str]:
+    """Render one action step as an MCP command string."""
+    params = _step_params(step)
+    if params is None:
+        return None
+    args = ", ".join(f"{name}={_literal(value)}" for name, value in params.items())
+    return f"{step.action.value}({args})"
+
+
+def compile_mcp_script(
+    actions: List[ActionStep], optimize: bool = True
+) -> ScriptOptimization:
+    """Optimize an action stream and emit its MCP command script."""
+    if optimize:
+        report = optimize_actions(actions)
+    else:
+        report = ScriptOptimization(
+            before_steps=len(actions), after_steps=len(actions), actions=list(actions)
+        )
+    for step in report.actions:
+        command = to_mcp_command(step)
+        if command is None:
+            report.skipped_steps.append(step.num)
+        else:
+            report.commands.append(command)
+    return report
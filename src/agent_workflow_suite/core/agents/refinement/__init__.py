@@ -0,0 +1,20 @@
+from .agent import root_agent, segment_refiner
+from .models import RefinementReport, RefinementSegment, SegmentRefinement
+from .refine import (
+    plan_refinement,
+    refine_transcriptions,
+    splice_playwright,
+    splice_transcription,
+)
+
+__all__ = [
+    "root_agent",
+    "segment_refiner",
+    "RefinementReport",
+    "RefinementSegment",
+    "SegmentRefinement",
+    "plan_refinement",
+    "refine_transcriptions",
+    "splice_playwright",
+    "splice_transcription",
+]
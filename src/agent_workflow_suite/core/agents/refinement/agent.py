@@ -0,0 +1,18 @@
+from google.adk.agents import Agent
+from .models import SegmentRefinement
+
+segment_refiner = Agent(
+    model="gemini-2.0-flash",
+    name="segment_refiner",
+    description="Re-transcribes a short, low-confidence segment of a screen recording at a higher frame rate.",
+    instruction="""You receive one clip of a browser screen recording together with the steps
+and actions already detected around it. Re-analyze only this clip, frame by frame.
+
+- Report every natural language step and every Playwright action inside the clip.
+- Use timestamps in seconds from the start of the FULL recording, within the clip range.
+- Prefer concrete selectors, typed text, keys and URLs that are visible on screen.
+- Set confidence to high only when the action is clearly visible.""",
+    output_schema=SegmentRefinement,
+)
+
+root_agent = segment_refiner
@@ -0,0 +1,63 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from agent_workflow_suite.core.agents.nl_transcription.models import Step
+from agent_workflow_suite.core.agents.playwright_transcription.models import ActionStep
+
+
+class RefinementSegment(BaseModel):
+    """A time range of the recording selected for re-analysis."""
+
+    start: float = Field(..., description="Segment start in seconds")
+    end: float = Field(..., description="Segment end in seconds")
+    reasons: List[str] = Field(
+        default_factory=list, description="Why the segment was selected"
+    )
+
+    @property
+    def duration(self) -> float:
+        """Segment length in seconds."""
+        return max(0.0, self.end - self.start)
+
+
+class SegmentRefinement(BaseModel):
+    """Re-transcribed steps and actions for one recording segment."""
+
+    start: float = Field(..., description="Segment start in seconds")
+    end: float = Field(..., description="Segment end in seconds")
+    steps: List[Step] = Field(
+        default_factory=list, description="Natural language steps in the segment"
+    )
+    actions: List[ActionStep] = Field(
+        default_factory=list, description="Playwright actions in the segment"
+    )
+    notes: Optional[str] = Field(None, description="Observations about the segment")
+
+
+class RefinementReport(BaseModel):
+    """Outcome of a targeted refinement pass."""
+
+    segments: List[RefinementSegment] = Field(
+        default_factory=list, description="Segments re-analyzed"
+    )
+    failed_segments: List[RefinementSegment] = Field(
+        default_factory=list, description="Segments left unchanged"
+    )
+    steps_replaced: int = Field(default=0, description="NL steps removed by splicing")
+    steps_added: int = Field(default=0, description="NL steps inserted by splicing")
+    actions_replaced: int = Field(default=0, description="Actions removed by splicing")
+    actions_added: int = Field(default=0, description="Actions inserted by splicing")
+    recording_duration: float = Field(
+        default=0.0, description="Full recording length in seconds"
+    )
+
+    def reanalyzed_seconds(self) -> float:
+        """Total recording time sent back to the model."""
+        return sum(s.duration for s in self.segments + self.failed_segments)
+
+    def cost_fraction(self) -> float:
+        """Share of a full rerun spent on refinement (0-1)."""
+        if not self.recording_duration:
+            return 0.0
+        return min(1.0, self.reanalyzed_seconds() / self.recording_duration)
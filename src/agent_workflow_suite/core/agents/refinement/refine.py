@@ -0,0 +1,413 @@
+import asyncio
+import re
+from collections import Counter
+from itertools import pairwise
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import google.genai.types as types
+from google.adk.agents import BaseAgent
+from google.adk.runners import InMemoryRunner
+from pydantic import BaseModel
+
+from agent_workflow_suite.core.agents.nl_transcription.models import (
+    Confidence,
+    Quality,
+    Step,
+    Summary,
+    Transcription,
+)
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ActionStep,
+    DetectionConfidence,
+    DetectionQuality,
+    PlaywrightAction,
+    PlaywrightTranscription,
+)
+from agent_workflow_suite.core.ingestion import RecordingRef, recording_part
+
+from .agent import segment_refiner
+from .models import RefinementReport, RefinementSegment, SegmentRefinement
+
+# Frame rate for re-analysis; the default video sampling is 1 fps
+REFINE_FPS = 5.0
+
+_TIMESTAMP = r"(?:(\d+):)?(\d+(?:\.\d+)?)\s*s?"
+_RANGE = re.compile(_TIMESTAMP + r"\s*(?:-|–|to)\s*" + _TIMESTAMP)
+# "step 3", "actions 4-6", "steps 2, 5 and 7"
+_REFERENCE = re.compile(
+    r"\b((?:step|action)s?\s+)(#?\d+(?:\s*(?:,|-|–|and|or|to)\s*#?\d+)*)",
+    re.IGNORECASE,
+)
+
+# Free-text fields whose "step N" references follow renumbering
+_NARRATIVE_FIELDS: Dict[type, Tuple[str, ...]] = {
+    Step: ("desc", "intent", "reasoning", "notes", "confusion"),
+    Summary: ("decisions", "problems", "learning", "success", "challenges"),
+    Quality: ("clarity", "unclear_moments", "missing_context"),
+    Transcription: ("thoughts", "patterns", "expertise_signs", "complexity"),
+    ActionStep: ("element_desc", "detection_notes"),
+    DetectionQuality: (
+        "occlusion_issues",
+        "timing_uncertainties",
+        "selector_ambiguities",
+    ),
+    PlaywrightTranscription: ("workflow_patterns", "optimization_suggestions"),
+}
+
+_CONFIDENCE_RANK = {"low": 0, "medium": 1, "high": 2}
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _seconds(minutes: Optional[str], seconds: str) -> float:
+    return int(minutes or 0) * 60 + float(seconds)
+
+
+def parse_time_ranges(notes: Iterable[str]) -> List[Tuple[float, float]]:
+    """Extract ``12.5s-15s`` or ``01:05 to 01:12`` style ranges from quality notes."""
+    ranges = []
+    for note in notes:
+        for m in _RANGE.finditer(note):
+            start = _seconds(m.group(1), m.group(2))
+            end = _seconds(m.group(3), m.group(4))
+            if end > start:
+                ranges.append((start, end))
+    return ranges
+
+
+def plan_refinement(
+    playwright: Optional[PlaywrightTranscription] = None,
+    transcription: Optional[Transcription] = None,
+    padding: float = 1.0,
+    merge_gap: float = 2.0,
+    min_gap: float = 5.0,
+) -> List[RefinementSegment]:
+    """Select the low-confidence time ranges worth re-transcribing.
+
+    Sources are low-confidence ``ActionStep``s and ``Step``s, ranges quoted in
+    ``timing_uncertainties``/``occlusion_issues``, and, when the detector
+    reports undetected segments, gaps of at least ``min_gap`` seconds between
+    detected actions. Ranges are padded and merged when close together.
+    """
+    candidates: List[Tuple[float, float, str]] = []
+    duration = 0.0
+    if playwright is not None:
+        duration = playwright.metadata.duration
+        for action in playwright.actions:
+            if action.confidence == DetectionConfidence.LOW:
+                candidates.append(
+                    (action.start, action.end, f"low confidence action {action.num}")
+                )
+        quality = playwright.quality
+        for start, end in parse_time_ranges(quality.timing_uncertainties):
+            candidates.append((start, end, "timing uncertainty"))
+        for start, end in parse_time_ranges(quality.occlusion_issues):
+            candidates.append((start, end, "occlusion"))
+        if quality.undetected_segments:
+            ordered = sorted(playwright.actions, key=lambda a: a.start)
+            for before, after in pairwise(ordered):
+                if after.start - before.end >= min_gap:
+                    candidates.append((before.end, after.start, "undetected segment"))
+    if transcription is not None:
+        duration = max(duration, transcription.metadata.duration)
+        for step in transcription.steps:
+            if step.confidence == Confidence.LOW:
+                candidates.append(
+                    (step.start, step.end, f"low confidence step {step.num}")
+                )
+
+    segments: List[RefinementSegment] = []
+    for start, end, reason in sorted(candidates):
+        start = max(0.0, start - padding)
+        end = end + padding if not duration else min(duration, end + padding)
+        if segments and start - segments[-1].end <= merge_gap:
+            last = segments[-1]
+            last.end = max(last.end, end)
+            if reason not in last.reasons:
+                last.reasons.append(reason)
+        else:
+            segments.append(RefinementSegment(start=start, end=end, reasons=[reason]))
+    return segments
+
+
+def _overlaps(start: float, end: float, segment: RefinementSegment) -> bool:
+    return start < segment.end and end > segment.start
+
+
+def _in_segment(start: float, segment: RefinementSegment) -> bool:
+    """Whether an item starting at ``start`` belongs to a segment.
+
+    Splicing removes and inserts items by this one test, so an item crossing
+    a segment boundary is neither lost nor duplicated.
+    """
+    return segment.start <= start <= segment.end
+
+
+def _renumber_text(text: str, renumbered: Dict[int, int]) -> str:
+    """Rewrite "step 3"-style references to their new numbers."""
+
+    def _numbers(match: "re.Match[str]") -> str:
+        numbers = re.sub(
+            r"\d+",
+            lambda n: str(renumbered.get(int(n.group()), n.group())),
+            match.group(2),
+        )
+        return match.group(1) + numbers
+
+    return _REFERENCE.sub(_numbers, text)
+
+
+def _renumber_value(value: Any, renumbered: Dict[int, int]) -> Any:
+    if isinstance(value, str):
+        return _renumber_text(value, renumbered)
+    if isinstance(value, list):
+        return [_renumber_value(v, renumbered) for v in value]
+    return value
+
+
+def _renumber_references(
+    model: ModelT, renumbered: Dict[int, int], **fields: Any
+) -> ModelT:
+    """Copy of a model with step references renumbered and ``fields`` set.
+
+    Only the free-text fields in ``_NARRATIVE_FIELDS`` are rewritten; typed
+    text, selectors, URLs and MCP parameters are copied unchanged. Nested
+    models are copied so the result can be updated independently.
+    """
+    narrative = _NARRATIVE_FIELDS.get(type(model), ())
+    update: Dict[str, Any] = dict(fields)
+    for name in type(model).model_fields:
+        if name in update:
+            continue
+        value = getattr(model, name)
+        if name in narrative:
+            update[name] = _renumber_value(value, renumbered)
+        elif isinstance(value, BaseModel):
+            update[name] = _renumber_references(value, renumbered)
+    return model.model_copy(update=update)
+
+
+def _lowest_confidence(items: Iterable[Any]) -> int:
+    """Rank of the least confident item in ``_CONFIDENCE_RANK``."""
+    return min(_CONFIDENCE_RANK[i.confidence.value] for i in items)
+
+
+def _splice(
+    items: List[ModelT], refined: List[ModelT], segment: RefinementSegment
+) -> Tuple[List[ModelT], Dict[int, int]]:
+    """Replace a segment's items with refined ones and renumber them from 1.
+
+    Returns the merged copies and the new number of each old item. A replaced
+    item maps to the refined item starting closest to it, so references to
+    it still point at the same moment of the recording.
+    """
+    kept = [i for i in items if not _in_segment(i.start, segment)]
+    added = [i.model_copy() for i in refined]
+    ordered = sorted(kept + added, key=lambda i: i.start)
+    position = {id(item): num for num, item in enumerate(ordered, 1)}
+    renumbered = {item.num: position[id(item)] for item in kept}
+    for item in items:
+        if _in_segment(item.start, segment):
+            closest = min(added, key=lambda a: abs(a.start - item.start))
+            renumbered[item.num] = position[id(closest)]
+    fresh = {id(item) for item in added}
+    merged = []
+    for num, item in enumerate(ordered, 1):
+        if id(item) not in fresh:
+            item = _renumber_references(item, renumbered)
+        item.num = num
+        merged.append(item)
+    return merged, renumbered
+
+
+def _improves(
+    items: List[ModelT], refined: List[ModelT], segment: RefinementSegment
+) -> bool:
+    """Whether refined items are more confident than the ones they replace.
+
+    A segment with no detected items (an undetected gap) is always filled.
+    """
+    originals = [i for i in items if _in_segment(i.start, segment)]
+    if not originals:
+        return True
+    return _lowest_confidence(refined) > _lowest_confidence(originals)
+
+
+def splice_transcription(
+    transcription: Transcription, segment: RefinementSegment, steps: List[Step]
+) -> Tuple[Transcription, int, int]:
+    """Replace a segment's NL steps, returning the new copy and removed/added counts.
+
+    Steps are renumbered, and "step N" references in narrative fields are
+    rewritten to match. The original steps are kept when the refined ones
+    are no more confident.
+    """
+    new_steps = [s for s in steps if _in_segment(s.start, segment)]
+    if not new_steps or not _improves(transcription.steps, new_steps, segment):
+        return transcription, 0, 0
+    merged, renumbered = _splice(transcription.steps, new_steps, segment)
+    result = _renumber_references(transcription, renumbered, steps=merged)
+    result.quality.clear_steps = sum(
+        1 for s in merged if s.confidence != Confidence.LOW
+    )
+    result.quality.unclear_steps = len(merged) - result.quality.clear_steps
+    removed = len(transcription.steps) + len(new_steps) - len(merged)
+    return result, removed, len(new_steps)
+
+
+def splice_playwright(
+    playwright: PlaywrightTranscription,
+    segment: RefinementSegment,
+    actions: List[ActionStep],
+) -> Tuple[PlaywrightTranscription, int, int]:
+    """Replace a segment's actions, returning the new copy and removed/added counts.
+
+    Actions are renumbered, and "step N" or "action N" references in
+    narrative fields are rewritten to match; typed text, selectors and MCP
+    parameters are left as recorded. The original actions are kept when the
+    refined ones are no more confident.
+    """
+    new_actions = [a for a in actions if _in_segment(a.start, segment)]
+    if not new_actions or not _improves(playwright.actions, new_actions, segment):
+        return playwright, 0, 0
+    merged, renumbered = _splice(playwright.actions, new_actions, segment)
+    result = _renumber_references(playwright, renumbered, actions=merged)
+
+    # Keep derived summary and quality counters consistent with the actions
+    summary = result.summary
+    summary.total_actions = len(merged)
+    summary.action_counts = dict(Counter(a.action.value for a in merged))
+    summary.navigation_count = len(result.get_navigation_actions())
+    if merged:
+        total = sum(a.end - a.start for a in merged)
+        summary.avg_action_duration = total / len(merged)
+    confidences = Counter(a.confidence for a in merged)
+    result.quality.high_confidence_actions = confidences[DetectionConfidence.HIGH]
+    result.quality.low_confidence_actions = confidences[DetectionConfidence.LOW]
+    summary.form_interactions = sum(
+        1
+        for a in merged
+        if a.action
+        in (PlaywrightAction.TYPE, PlaywrightAction.SELECT, PlaywrightAction.CHECK)
+    )
+    if result.mcp_script:
+        result.mcp_script = result.generate_mcp_commands()
+    removed = len(playwright.actions) + len(new_actions) - len(merged)
+    return result, removed, len(new_actions)
+
+
+def segment_message(
+    recording: RecordingRef,
+    segment: RefinementSegment,
+    context: str,
+    fps: float = REFINE_FPS,
+) -> types.Content:
+    """User message with the clipped recording sampled at a higher frame rate."""
+    clip = recording_part(recording)
+    clip.video_metadata = types.VideoMetadata(
+        start_offset=f"{segment.start:.2f}s",
+        end_offset=f"{segment.end:.2f}s",
+        fps=fps,
+    )
+    prompt = (
+        f"Re-analyze the recording between {segment.start:.2f}s and "
+        f"{segment.end:.2f}s ({', '.join(segment.reasons)}).\n\n"
+        f"Already detected around this clip:\n{context}"
+    )
+    return types.Content(role="user", parts=[clip, types.Part.from_text(text=prompt)])
+
+
+def _segment_context(
+    segment: RefinementSegment,
+    playwright: Optional[PlaywrightTranscription],
+    transcription: Optional[Transcription],
+) -> str:
+    """Previously detected items overlapping the segment, as JSON lines."""
+    lines = []
+    if transcription is not None:
+        lines += [
+            s.model_dump_json(exclude_none=True)
+            for s in transcription.steps
+            if _overlaps(s.start, s.end, segment)
+        ]
+    if playwright is not None:
+        lines += [
+            a.model_dump_json(exclude_none=True)
+            for a in playwright.actions
+            if _overlaps(a.start, a.end, segment)
+        ]
+    return "\n".join(lines) or "(nothing detected)"
+
+
+async def analyze_segment(
+    runner: InMemoryRunner, message: types.Content
+) -> SegmentRefinement:
+    """Run the refiner agent on one clip and parse its structured output."""
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="refinement"
+    )
+    text = None
+    async for event in runner.run_async(
+        user_id="refinement", session_id=session.id, new_message=message
+    ):
+        if event.is_final_response() and event.content and event.content.parts:
+            text = "".join(part.text or "" for part in event.content.parts)
+    if not text:
+        raise RuntimeError("Refiner returned no output")
+    return SegmentRefinement.model_validate_json(text)
+
+
+async def refine_transcriptions(
+    recording: RecordingRef,
+    playwright: Optional[PlaywrightTranscription] = None,
+    transcription: Optional[Transcription] = None,
+    segments: Optional[List[RefinementSegment]] = None,
+    agent: BaseAgent = segment_refiner,
+    fps: float = REFINE_FPS,
+    max_concurrency: int = 4,
+) -> Tuple[
+    Optional[PlaywrightTranscription], Optional[Transcription], RefinementReport
+]:
+    """Re-transcribe only low-confidence segments and splice the results back in.
+
+    Segments are analyzed concurrently; a failed segment leaves the original
+    steps in place and is listed in ``failed_segments``.
+    """
+    if segments is None:
+        segments = plan_refinement(playwright, transcription)
+    duration = max(
+        playwright.metadata.duration if playwright else 0.0,
+        transcription.metadata.duration if transcription else 0.0,
+    )
+    report = RefinementReport(recording_duration=duration)
+    runner = InMemoryRunner(agent=agent, app_name="segment_refiner")
+    limiter = asyncio.Semaphore(max_concurrency)
+
+    async def _run(segment: RefinementSegment) -> SegmentRefinement:
+        context = _segment_context(segment, playwright, transcription)
+        async with limiter:
+            return await analyze_segment(
+                runner, segment_message(recording, segment, context, fps)
+            )
+
+    results = await asyncio.gather(
+        *(_run(segment) for segment in segments), return_exceptions=True
+    )
+    for segment, result in zip(segments, results, strict=True):
+        if isinstance(result, BaseException):
+            report.failed_segments.append(segment)
+            continue
+        report.segments.append(segment)
+        if playwright is not None:
+            playwright, removed, added = splice_playwright(
+                playwright, segment, result.actions
+            )
+            report.actions_replaced += removed
+            report.actions_added += added
+        if transcription is not None:
+            transcription, removed, added = splice_transcription(
+                transcription, segment, result.steps
+            )
+            report.steps_replaced += removed
+            report.steps_added += added
+    return playwright, transcription, report
@@ -1,4 +1,13 @@
 from .agent import root_agent, sop_markdown, after_agent_callback
+from .fanout import SOPFanOutAgent, assemble_sop, sop_markdown_fanout
+from .publish import publish_sops
+from .render import (
+    iter_html,
+    iter_markdown,
+    render_to_file,
+    stage_rendered,
+    write_rendered,
+)
 from .models import (
     SOPMarkdown, 
     SOPMetadata, 
@@ -10,13 +19,29 @@ from .models import (
     QualityMetrics,
     RiskAssessment,
     ProcessFlowElement,
-    ChangeHistory
+    ChangeHistory,
+    SOPSectionOutline,
+    SOPSkeleton,
+    SOPProcessFlow,
+    SOPPartResult,
+    SOPGenerationReport,
+    PublishFailure,
+    PublishReport
 )
 
 __all__ = [
     "root_agent", 
     "sop_markdown", 
     "after_agent_callback",
+    "sop_markdown_fanout",
+    "SOPFanOutAgent",
+    "assemble_sop",
+    "publish_sops",
+    "iter_markdown",
+    "iter_html",
+    "render_to_file",
+    "stage_rendered",
+    "write_rendered",
     "SOPMarkdown", 
     "SOPMetadata",
     "SOPStep",
@@ -27,5 +52,12 @@ __all__ = [
     "QualityMetrics",
     "RiskAssessment",
     "ProcessFlowElement",
-    "ChangeHistory"
+    "ChangeHistory",
+    "SOPSectionOutline",
+    "SOPSkeleton",
+    "SOPProcessFlow",
+    "SOPPartResult",
+    "SOPGenerationReport",
+    "PublishFailure",
+    "PublishReport"
 ] 
\ No newline at end of file
@@ -4,6 +4,12 @@ import google.genai.types as types
 from google.adk.agents import Agent
 from .models import SOPMarkdown
 from google.adk.agents.callback_context import CallbackContext
+from agent_workflow_suite.core.repair import default_repairer
+from agent_workflow_suite.core.state import (
+    load_state_model,
+    offload_output,
+    rehydrate_outputs,
+)
 
 
 async def after_agent_callback(callback_context: CallbackContext):
@@ -17,9 +23,8 @@ async def after_agent_callback(callback_context: CallbackContext):
         
         if sop_data:
             try:
-                # Convert dict back to SOPMarkdown model (ADK stores it as dict/JSON)
-                sop_obj = SOPMarkdown(**sop_data)
-                print(f"🔍 Successfully converted dict to SOPMarkdown object")
+                # Rehydrate the SOPMarkdown model (inline dict or artifact reference)
+                sop_obj = await load_state_model(callback_context, "sop_markdown", SOPMarkdown)
                 
                 # Generate the actual markdown content from the structured data
                 markdown_content = sop_obj.generate_markdown_content()
@@ -97,7 +102,10 @@ Creates ISO 13485/ISO 9001 compliant SOP documentation with:
 Input: Video recording + nl_transcription output + playwright_transcription output
 Output: Professional SOP markdown document ready for organizational use""",
     output_schema=SOPMarkdown,
-    output_key="sop_markdown",
+    before_model_callback=rehydrate_outputs(
+        ["nl_transcription", "playwright_transcription"]
+    ),
+    after_model_callback=offload_output("sop_markdown", SOPMarkdown, repairer=default_repairer),
     after_agent_callback=after_agent_callback
 )
 
@@ -0,0 +1,323 @@
+import asyncio
+import re
+import time
+from typing import AsyncGenerator, List, Optional, Tuple, Type, TypeVar, Union
+
+import google.genai.types as types
+import httpx
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models import BaseLlm
+from google.genai import errors
+from pydantic import BaseModel
+
+from agent_workflow_suite.core.repair import SchemaRepairer, default_repairer
+from agent_workflow_suite.core.state import rehydrate_outputs, store_output
+
+from .agent import after_agent_callback
+from .models import (
+    QualityMetrics,
+    RiskAssessment,
+    RiskLevel,
+    SOPGenerationReport,
+    SOPMarkdown,
+    SOPPartResult,
+    SOPProcessFlow,
+    SOPSection,
+    SOPSectionOutline,
+    SOPSkeleton,
+)
+
+PartT = TypeVar("PartT", bound=BaseModel)
+
+# Upstream outputs every part reads from state
+SOURCE_STATE_KEYS = ["nl_transcription", "playwright_transcription"]
+
+# State key holding the SOPGenerationReport of the last fan-out run
+REPORT_STATE_KEY = "sop_generation_report"
+
+# Error code of the SOP event when some parts are placeholders
+PARTS_FAILED = "SOP_PARTS_FAILED"
+
+# Failures of one part attempt; the part is retried, then left out
+PART_ERRORS = (errors.APIError, httpx.HTTPError, OSError, ValueError)
+
+_COMMON = """You are writing one part of an ISO 13485/ISO 9001 compliant Standard
+Operating Procedure derived from a screen recording, its natural language
+transcription (nl_transcription) and its Playwright action transcription
+(playwright_transcription). Other parts are written in parallel; produce
+ONLY the part requested, consistent with the plan below."""
+
+SKELETON_INSTRUCTION = f"""{_COMMON}
+
+Produce the document skeleton: complete metadata, definitions, abbreviations,
+references and a section plan. Split the workflow into sections of related
+steps; list the planned step titles of every section in order and, when you
+can tell, the recording time range each section covers. Do not write the
+steps themselves."""
+
+PLAN = """## Document
+{metadata}
+
+## Section plan
+{outline}"""
+
+SECTION_INSTRUCTION = """{common}
+
+{plan}
+
+Write section {section_num} ("{title}") in full. Number its steps
+{section_num}.1, {section_num}.2, ... in the planned order, fill roles, inputs,
+outputs, quality checks, verification methods and dependencies, and copy the
+matching Playwright MCP commands into mcp_commands."""
+
+PART_INSTRUCTIONS = {
+    "quality_metrics": "Write the quality metrics: success criteria, performance indicators, accuracy, error rates, training and review requirements.",
+    "risk_assessment": "Write the overall risk assessment: risk category, identified risks, mitigations, safety, quality and environmental controls, and escalation procedures.",
+    "process_flow": "Write the process flow diagram as start, process, decision and end elements. Use the planned step numbers as element IDs for process elements and connect them in execution order.",
+}
+
+
+def _instruction(text: str):
+    """Instruction provider; bypasses ``{state}`` templating of JSON content."""
+    return lambda _ctx: text
+
+
+def _agent_name(part: str) -> str:
+    return "sop_part_" + re.sub(r"\W+", "_", part).strip("_")
+
+
+def _plan(skeleton: SOPSkeleton) -> str:
+    """The skeleton's metadata and section plan, as given to every part."""
+    return PLAN.format(
+        metadata=skeleton.metadata.model_dump_json(exclude_none=True),
+        outline="\n".join(s.model_dump_json() for s in skeleton.sections),
+    )
+
+
+def _part_instruction(part: str, plan: str) -> str:
+    return f"{_COMMON}\n\n{plan}\n\n{PART_INSTRUCTIONS[part]}"
+
+
+def _section_instruction(section: SOPSectionOutline, plan: str) -> str:
+    return SECTION_INSTRUCTION.format(
+        common=_COMMON,
+        plan=plan,
+        section_num=section.section_num,
+        title=section.title,
+    )
+
+
+def assemble_sop(
+    skeleton: SOPSkeleton,
+    sections: List[Optional[SOPSection]],
+    quality_metrics: Optional[QualityMetrics] = None,
+    risk_assessment: Optional[RiskAssessment] = None,
+    process_flow: Optional[SOPProcessFlow] = None,
+) -> SOPMarkdown:
+    """Join independently generated parts into one validated ``SOPMarkdown``.
+
+    Parts that failed after all retries are replaced by outline-only
+    placeholders and listed in ``generation_notes``.
+    """
+    notes = list(skeleton.generation_notes)
+    assembled: List[SOPSection] = []
+    for outline, section in zip(skeleton.sections, sections, strict=True):
+        if section is None:
+            notes.append(f"Section {outline.section_num} could not be generated")
+            section = SOPSection(
+                section_num=outline.section_num,
+                title=outline.title,
+                description=outline.description,
+            )
+        assembled.append(section)
+    if quality_metrics is None:
+        notes.append("Quality metrics could not be generated")
+        quality_metrics = QualityMetrics()
+    if risk_assessment is None:
+        notes.append("Risk assessment could not be generated")
+        levels = [step.risk_level for s in assembled for step in s.steps]
+        order = list(RiskLevel)
+        risk_assessment = RiskAssessment(
+            risk_category=max(levels, key=order.index, default=RiskLevel.LOW)
+        )
+    if process_flow is None:
+        notes.append("Process flow could not be generated")
+    return SOPMarkdown(
+        metadata=skeleton.metadata,
+        sections=assembled,
+        process_flow=process_flow.elements if process_flow else [],
+        quality_metrics=quality_metrics,
+        risk_assessment=risk_assessment,
+        definitions=skeleton.definitions,
+        abbreviations=skeleton.abbreviations,
+        references=skeleton.references,
+        generation_notes=notes,
+    )
+
+
+class SOPFanOutAgent(BaseAgent):
+    """Generates an SOP as a skeleton followed by concurrently generated parts.
+
+    The skeleton (metadata and section plan) is generated first; each
+    section, the process flow, quality metrics and risk assessment are then
+    generated concurrently from its plan. Every part is validated against
+    its own schema, repaired by ``repairer`` when it fails, and retried on
+    its own only if repair fails, so end-to-end latency is roughly the
+    skeleton plus the slowest part. Part events are not persisted; only the
+    assembled SOP is written to ``output_key``.
+
+    Parts that still fail become placeholders. They are listed in the
+    ``REPORT_STATE_KEY`` report, and the SOP event carries the
+    ``PARTS_FAILED`` error code naming them. Set ``allow_partial=False`` to
+    raise instead.
+    """
+
+    model: Union[str, BaseLlm] = "gemini-2.0-flash"
+    output_key: str = "sop_markdown"
+    max_attempts: int = 2
+    max_concurrency: int = 8
+    repairer: Optional[SchemaRepairer] = default_repairer
+    allow_partial: bool = True
+
+    def _part_agent(
+        self, part: str, schema: Type[BaseModel], instruction: str
+    ) -> Agent:
+        return Agent(
+            model=self.model,
+            name=_agent_name(part),
+            description=f"Generates the {part} part of an SOP.",
+            instruction=_instruction(instruction),
+            output_schema=schema,
+            before_model_callback=rehydrate_outputs(SOURCE_STATE_KEYS),
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
+        )
+
+    async def _generate(
+        self,
+        ctx: InvocationContext,
+        limiter: asyncio.Semaphore,
+        part: str,
+        schema: Type[PartT],
+        instruction: str,
+    ) -> Tuple[Optional[PartT], SOPPartResult]:
+        """Run one part until it validates or attempts are exhausted."""
+        agent = self._part_agent(part, schema, instruction)
+        result = SOPPartResult(part=part)
+        started = time.perf_counter()
+        doc = None
+        async with limiter:
+            while doc is None and result.attempts < self.max_attempts:
+                result.attempts += 1
+                branch = f"{self.name}.{agent.name}.{result.attempts}"
+                if ctx.branch:
+                    branch = f"{ctx.branch}.{branch}"
+                text = ""
+                try:
+                    async for event in agent.run_async(
+                        ctx.model_copy(update={"branch": branch})
+                    ):
+                        if event.is_final_response() and event.content:
+                            parts = event.content.parts or []
+                            text = "".join(p.text or "" for p in parts)
+                    if self.repairer is None:
+                        doc = schema.model_validate_json(text)
+                    else:
+                        doc = await self.repairer.repair(text, schema)
+                except PART_ERRORS as e:
+                    result.error = f"{type(e).__name__}: {e}"
+        result.ok = doc is not None
+        if result.ok:
+            result.error = None
+        result.seconds = time.perf_counter() - started
+        return doc, result
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        started = time.perf_counter()
+        limiter = asyncio.Semaphore(self.max_concurrency)
+        report = SOPGenerationReport()
+
+        skeleton, skeleton_result = await self._generate(
+            ctx, limiter, "skeleton", SOPSkeleton, SKELETON_INSTRUCTION
+        )
+        report.parts.append(skeleton_result)
+        if skeleton is None:
+            raise RuntimeError(
+                f"SOP skeleton generation failed: {skeleton_result.error}"
+            )
+
+        plan = _plan(skeleton)
+        *sections, flow, quality, risk = await asyncio.gather(
+            *(
+                self._generate(
+                    ctx,
+                    limiter,
+                    f"section {s.section_num}",
+                    SOPSection,
+                    _section_instruction(s, plan),
+                )
+                for s in skeleton.sections
+            ),
+            self._generate(
+                ctx,
+                limiter,
+                "process_flow",
+                SOPProcessFlow,
+                _part_instruction("process_flow", plan),
+            ),
+            self._generate(
+                ctx,
+                limiter,
+                "quality_metrics",
+                QualityMetrics,
+                _part_instruction("quality_metrics", plan),
+            ),
+            self._generate(
+                ctx,
+                limiter,
+                "risk_assessment",
+                RiskAssessment,
+                _part_instruction("risk_assessment", plan),
+            ),
+        )
+
+        for _, result in sections + [flow, quality, risk]:
+            report.parts.append(result)
+        failed = report.failed_parts()
+        if failed and not self.allow_partial:
+            raise RuntimeError(f"SOP parts failed: {', '.join(failed)}")
+        sop = assemble_sop(
+            skeleton,
+            [doc for doc, _ in sections],
+            quality[0],
+            risk[0],
+            flow[0],
+        )
+        report.total_seconds = time.perf_counter() - started
+
+        actions = EventActions()
+        callback_context = CallbackContext(ctx, event_actions=actions)
+        ref = await store_output(callback_context, self.output_key, sop)
+        callback_context.state[REPORT_STATE_KEY] = report.model_dump(mode="json")
+        text = ref.model_dump_json() if ref else sop.model_dump_json(exclude_none=True)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=actions,
+            error_code=PARTS_FAILED if failed else None,
+            error_message=f"Failed parts: {', '.join(failed)}" if failed else None,
+        )
+
+
+sop_markdown_fanout = SOPFanOutAgent(
+    name="sop_markdown_fanout",
+    description="Generates an SOP section by section, with independent parts produced concurrently.",
+    after_agent_callback=after_agent_callback,
+)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -241,6 +241,15 @@ class SOPMarkdown(BaseModel):
         all_steps = self.get_all_steps()
         return [step for step in all_steps if step.risk_level == RiskLevel.CRITICAL]
     
+    def summarize(self) -> Dict[str, Any]:
+        """Small preview kept in state when the SOP is offloaded."""
+        return {
+            "sop_id": self.metadata.sop_id,
+            "title": self.metadata.title,
+            "sections": len(self.sections),
+            "steps": len(self.get_all_steps()),
+        }
+    
     def calculate_total_duration(self) -> str:
         """Calculate estimated total duration."""
         # Simple implementation - could be enhanced
@@ -266,50 +275,92 @@ class SOPMarkdown(BaseModel):
     
     def generate_markdown_content(self) -> str:
         """Generate the complete markdown content for the SOP."""
-        lines = []
-        
-        # Document header
-        lines.append(f"# {self.metadata.title}")
-        lines.append("")
-        lines.append(f"**Document ID:** {self.metadata.sop_id}")
-        lines.append(f"**Version:** {self.metadata.version}")
-        lines.append(f"**Date:** {self.metadata.revision_date.strftime('%Y-%m-%d')}")
-        lines.append(f"**Author:** {self.metadata.author}")
-        lines.append("")
-        
-        # Table of contents would go here
-        lines.append("## Table of Contents")
-        lines.append("")
-        for i, section in enumerate(self.sections, 1):
-            lines.append(f"{i}. {section.title}")
-        lines.append("")
-        
-        # Purpose and scope
-        lines.append("## 1. Purpose")
-        lines.append(self.metadata.purpose)
-        lines.append("")
-        lines.append("## 2. Scope")
-        lines.append(self.metadata.scope)
-        lines.append("")
-        
-        # Main sections
-        for i, section in enumerate(self.sections, 3):
-            lines.append(f"## {i}. {section.title}")
-            if section.description:
-                lines.append(section.description)
-                lines.append("")
-            
-            for step in section.steps:
-                lines.append(f"### {step.step_num}. {step.title}")
-                lines.append(f"**Responsible Role:** {step.responsible_role}")
-                lines.append("")
-                lines.append(step.description)
-                lines.append("")
-                
-                if step.safety_warnings:
-                    lines.append("**⚠️ Safety Warnings:**")
-                    for warning in step.safety_warnings:
-                        lines.append(f"- {warning}")
-                    lines.append("")
+        from .render import iter_markdown
         
-        return "\n".join(lines) 
\ No newline at end of file
+        return "".join(iter_markdown(self))
+
+
+class SOPSectionOutline(BaseModel):
+    """Planned section produced by the skeleton pass of fan-out generation."""
+    
+    section_num: str = Field(..., description="Section number")
+    title: str = Field(..., description="Section title")
+    description: Optional[str] = Field(None, description="Section overview")
+    step_titles: List[str] = Field(default_factory=list, description="Planned step titles, in order")
+    start_time: Optional[float] = Field(None, description="Recording time where the section starts (seconds)")
+    end_time: Optional[float] = Field(None, description="Recording time where the section ends (seconds)")
+
+
+class SOPSkeleton(BaseModel):
+    """Document metadata and section plan generated before the sections themselves."""
+    
+    metadata: SOPMetadata = Field(..., description="SOP metadata and document control")
+    sections: List[SOPSectionOutline] = Field(..., description="Planned SOP sections")
+    definitions: Dict[str, str] = Field(default_factory=dict, description="Definitions and terminology")
+    abbreviations: Dict[str, str] = Field(default_factory=dict, description="Abbreviations")
+    references: List[str] = Field(default_factory=list, description="External references")
+    generation_notes: List[str] = Field(default_factory=list, description="Generation notes and limitations")
+
+
+class SOPProcessFlow(BaseModel):
+    """Process flow diagram generated as an independent part."""
+    
+    elements: List[ProcessFlowElement] = Field(default_factory=list, description="Process flow diagram elements")
+
+
+class SOPPartResult(BaseModel):
+    """Outcome of generating one part of a fan-out SOP."""
+    
+    part: str = Field(..., description="Part name (skeleton, section number, quality_metrics, ...)")
+    attempts: int = Field(default=0, description="Model calls made for the part")
+    seconds: float = Field(default=0.0, description="Wall time spent on the part")
+    ok: bool = Field(default=False, description="Whether a valid output was produced")
+    error: Optional[str] = Field(None, description="Last validation or model error, if the part failed")
+
+
+class SOPGenerationReport(BaseModel):
+    """Timing and retry statistics for a fan-out SOP generation."""
+    
+    parts: List[SOPPartResult] = Field(default_factory=list, description="Per-part outcomes")
+    total_seconds: float = Field(default=0.0, description="End-to-end wall time")
+    
+    def retries(self) -> int:
+        """Model calls beyond the first attempt of every part."""
+        return sum(max(0, p.attempts - 1) for p in self.parts)
+    
+    def failed_parts(self) -> List[str]:
+        """Parts that never produced a valid output."""
+        return [p.part for p in self.parts if not p.ok]
+    
+    def slowest_part(self) -> Optional[SOPPartResult]:
+        """Part that bounded end-to-end latency."""
+        return max(self.parts, key=lambda p: p.seconds, default=None)
+
+
+class PublishFailure(BaseModel):
+    """A stored SOP that could not be rendered."""
+
+    source: str = Field(..., description="Path of the SOP JSON file")
+    error: str = Field(..., description="Validation or rendering error")
+
+
+class PublishReport(BaseModel):
+    """Throughput and outcome of a bulk SOP rendering run."""
+
+    documents: int = Field(default=0, description="SOPs rendered")
+    files_written: int = Field(default=0, description="Output files written")
+    bytes_read: int = Field(default=0, description="SOP JSON bytes read")
+    bytes_written: int = Field(default=0, description="Rendered bytes written")
+    failures: List[PublishFailure] = Field(
+        default_factory=list, description="SOPs that could not be rendered"
+    )
+    workers: int = Field(default=1, description="Rendering processes used")
+    seconds: float = Field(default=0.0, description="Wall time of the run")
+
+    def docs_per_second(self) -> float:
+        """SOPs rendered per wall-clock second."""
+        return self.documents / self.seconds if self.seconds else 0.0
+
+    def mb_per_second(self) -> float:
+        """Rendered megabytes written per wall-clock second."""
+        return self.bytes_written / 1e6 / self.seconds if self.seconds else 0.0
@@ -0,0 +1,358 @@
+"""Bulk publishing of stored SOP JSON documents to Markdown and HTML.
+
+SOP files are split into batches and rendered across a process pool; each
+worker parses every document once and streams it to a temporary file beside
+its place in ``exports/markdown`` and ``exports/html``, one file per SOP id
+and version. The files are then moved into place, except for SOPs that would
+be written to the same file: those are reported as failures instead of
+overwriting each other. ``--benchmark N`` renders N synthetic SOPs at several worker
+counts and reports throughput.
+
+Run with ``python -m agent_workflow_suite.core.agents.sop_markdown.publish``.
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import (
+    ProcessFlowElement,
+    PublishFailure,
+    PublishReport,
+    QualityMetrics,
+    RiskAssessment,
+    RiskLevel,
+    SOPCategory,
+    SOPMarkdown,
+    SOPMetadata,
+    SOPSection,
+    SOPStep,
+    StepType,
+)
+from .render import RENDERERS, stage_rendered
+
+EXPORT_DIR = "exports"
+
+# Output sub-directory per format
+FORMAT_DIRS = {"md": "markdown", "html": "html"}
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+# Unreadable or invalid SOP files; they are reported and the run goes on
+_READ_ERRORS = (OSError, ValueError)
+
+# A rendered SOP: source file, output name and (temporary file, target, bytes)
+# of each format
+Staged = Tuple[str, str, List[Tuple[str, str, int]]]
+
+
+def _cpu_count() -> int:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def find_sop_files(paths: Iterable[str]) -> List[str]:
+    """SOP JSON files among ``paths``, searching directories recursively."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.extend(
+                    os.path.join(root, n) for n in names if n.endswith(".json")
+                )
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def output_name(sop_id: str, version: str) -> str:
+    """File name, without extension, of one version of an SOP.
+
+    Ids that are not already safe file names get a short hash of the
+    original, so ``SOP/1`` and ``SOP:1`` do not share a file.
+    """
+    raw = f"{sop_id}-v{version}"
+    name = _UNSAFE.sub("_", raw).strip("._") or "sop"
+    if name != raw:
+        name += "-" + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:8]
+    return name
+
+
+def output_path(out_dir: str, fmt: str, sop: SOPMarkdown) -> str:
+    """Where a rendered SOP is published, named after its SOP id and version."""
+    name = output_name(sop.metadata.sop_id, sop.metadata.version)
+    return os.path.join(out_dir, FORMAT_DIRS.get(fmt, fmt), f"{name}.{fmt}")
+
+
+def _duplicates(names: Iterable[Tuple[str, str]]) -> List[PublishFailure]:
+    """Failures for every SOP file whose output name another file also has."""
+    by_name: Dict[str, List[str]] = {}
+    for path, name in names:
+        by_name.setdefault(name, []).append(path)
+    failures = []
+    for name, sources in by_name.items():
+        if len(sources) < 2:
+            continue
+        for path in sources:
+            others = ", ".join(p for p in sources if p != path)
+            failures.append(
+                PublishFailure(
+                    source=path, error=f"Duplicate output {name}: also {others}"
+                )
+            )
+    return failures
+
+
+def _discard(files: List[Tuple[str, str, int]]) -> None:
+    """Remove staged files that were not moved into place."""
+    for tmp_path, _, _ in files:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _render_batch(
+    job: Tuple[List[str], str, Tuple[str, ...]],
+) -> Tuple[PublishReport, List[Staged]]:
+    """Render one batch of SOP files to staged files; runs inside a pool worker.
+
+    Nothing is published here: the caller first checks the output names of
+    the whole run for duplicates.
+    """
+    paths, out_dir, formats = job
+    report = PublishReport()
+    staged: List[Staged] = []
+    for path in paths:
+        files: List[Tuple[str, str, int]] = []
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            report.bytes_read += len(data)
+            sop = SOPMarkdown.model_validate_json(data)
+            for fmt in formats:
+                target = output_path(out_dir, fmt, sop)
+                tmp_path, size = stage_rendered(RENDERERS[fmt](sop), target)
+                files.append((tmp_path, target, size))
+        except _READ_ERRORS as e:
+            _discard(files)
+            report.failures.append(
+                PublishFailure(source=path, error=f"{type(e).__name__}: {e}")
+            )
+            continue
+        except BaseException:
+            _discard(files)
+            raise
+        name = output_name(sop.metadata.sop_id, sop.metadata.version)
+        staged.append((path, name, files))
+    return report, staged
+
+
+def publish_sops(
+    paths: Iterable[str],
+    out_dir: str = EXPORT_DIR,
+    formats: Sequence[str] = ("md", "html"),
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> PublishReport:
+    """Render every SOP JSON file under ``paths`` to each of ``formats``.
+
+    Files are rendered in batches across ``workers`` processes (usable CPUs
+    by default); ``workers=1`` renders in this process. SOP files that would
+    be published under the same name are reported in ``failures`` and none of
+    them is published. Unreadable or invalid SOPs are reported there too and
+    do not stop the run.
+    """
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(unknown)}")
+    files = find_sop_files(paths)
+    workers = max(1, workers or _cpu_count())
+    # A few batches per worker balances load without per-file IPC
+    batch_size = batch_size or max(1, min(64, math.ceil(len(files) / (workers * 4))))
+
+    def batches(items: List[str]) -> List[List[str]]:
+        return [items[i : i + batch_size] for i in range(0, len(items), batch_size)]
+
+    started = time.perf_counter()
+    pool: Optional[ProcessPoolExecutor] = None
+    if workers == 1 or len(files) <= batch_size:
+        workers = 1
+    else:
+        workers = min(workers, math.ceil(len(files) / batch_size))
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    def run_all(fn: Callable[[Any], Any], jobs: List[Any]) -> List[Any]:
+        if pool is None:
+            return [fn(job) for job in jobs]
+        return list(pool.map(fn, jobs))
+
+    try:
+        jobs = [(batch, out_dir, tuple(formats)) for batch in batches(files)]
+        results = run_all(_render_batch, jobs)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    staged = [item for _, batch in results for item in batch]
+    duplicates = _duplicates((source, name) for source, name, _ in staged)
+    skipped = {failure.source for failure in duplicates}
+    report = PublishReport(workers=workers, failures=duplicates)
+    for result, _ in results:
+        report.bytes_read += result.bytes_read
+        report.failures.extend(result.failures)
+    try:
+        for source, _, outputs in staged:
+            if source in skipped:
+                continue
+            for tmp_path, target, size in outputs:
+                os.replace(tmp_path, target)
+                report.files_written += 1
+                report.bytes_written += size
+            report.documents += 1
+    finally:
+        for _, _, outputs in staged:
+            _discard(outputs)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def sample_sop(index: int = 0, sections: int = 6, steps: int = 8) -> SOPMarkdown:
+    """Synthetic SOP with every field populated, for benchmarks."""
+    step_types = list(StepType)
+    risks = list(RiskLevel)
+    return SOPMarkdown(
+        metadata=SOPMetadata(
+            sop_id=f"SOP-BENCH-{index:06d}",
+            title=f"Benchmark procedure {index}",
+            revision_date=datetime(2026, 1, 1),
+            author="Benchmark",
+            reviewer="Reviewer",
+            category=SOPCategory.OPERATIONAL,
+            department="Operations",
+            process_owner="Owner",
+            purpose="Measure SOP rendering throughput. " * 4,
+            scope="All synthetic benchmark documents. " * 4,
+            audience=["Operator", "Reviewer"],
+            regulatory_refs=["ISO 9001:2015 7.5"],
+            created_from_video=f"video-{index}",
+            nl_agent_output="nl_transcription",
+            playwright_output="playwright_transcription",
+        ),
+        sections=[
+            SOPSection(
+                section_num=str(s),
+                title=f"Section {s}",
+                description="Section overview. " * 3,
+                estimated_duration="10 minutes",
+                prerequisites=["Logged in"],
+                deliverables=["Saved record"],
+                steps=[
+                    SOPStep(
+                        step_num=f"{s}.{n}",
+                        step_type=step_types[n % len(step_types)],
+                        title=f"Step {s}.{n}",
+                        description="Do the thing carefully & check <output>. " * 3,
+                        responsible_role="Operator",
+                        tools_required=["Browser"],
+                        inputs=["Record id"],
+                        outputs=["Updated record"],
+                        safety_warnings=["Do not submit twice"] if n % 3 == 0 else [],
+                        quality_checks=["Record shows Saved"],
+                        risk_level=risks[n % len(risks)],
+                        automated_actions=["Fill form"],
+                        mcp_commands=[f'browser_click(element="Save", ref="e{n}")'],
+                        verification_method="Banner reads Saved",
+                        dependencies=[f"{s}.{n - 1}"] if n > 1 else [],
+                        common_mistakes=["Skipping validation"],
+                    )
+                    for n in range(1, steps + 1)
+                ],
+            )
+            for s in range(1, sections + 1)
+        ],
+        process_flow=[
+            ProcessFlowElement(
+                element_id=f"n{i}",
+                element_type="decision" if i % 4 == 3 else "process",
+                label=f"Node {i}",
+                connected_to=[f"n{i + 1}"] if i < sections else [],
+            )
+            for i in range(sections + 1)
+        ],
+        quality_metrics=QualityMetrics(success_criteria=["All records saved"]),
+        risk_assessment=RiskAssessment(
+            risk_category=RiskLevel.MEDIUM, identified_risks=["Duplicate entry"]
+        ),
+        definitions={"Record": "A saved form entry"},
+        abbreviations={"SOP": "Standard Operating Procedure"},
+        references=["Internal handbook"],
+    )
+
+
+def benchmark(
+    documents: int = 2000,
+    worker_counts: Sequence[int] = (1, 4),
+    formats: Sequence[str] = ("md", "html"),
+) -> List[PublishReport]:
+    """Publish ``documents`` synthetic SOPs once per worker count."""
+    reports = []
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "sops")
+        os.makedirs(source)
+        template = sample_sop().model_dump_json()
+        for i in range(documents):
+            with open(os.path.join(source, f"{i:06d}.json"), "w") as f:
+                f.write(template.replace("SOP-BENCH-000000", f"SOP-BENCH-{i:06d}"))
+        for workers in worker_counts:
+            out_dir = os.path.join(root, f"out-{workers}")
+            reports.append(publish_sops([source], out_dir, formats, workers=workers))
+    return reports
+
+
+def format_reports(reports: Sequence[PublishReport]) -> str:
+    """Plain-text throughput table."""
+    lines = [
+        f"{'workers':>7} {'docs':>7} {'files':>7} {'failed':>6} "
+        f"{'seconds':>8} {'docs/s':>8} {'MB/s':>7}"
+    ]
+    for r in reports:
+        lines.append(
+            f"{r.workers:>7} {r.documents:>7} {r.files_written:>7} "
+            f"{len(r.failures):>6} {r.seconds:>8.2f} {r.docs_per_second():>8.1f} "
+            f"{r.mb_per_second():>7.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="SOP JSON files or directories")
+    parser.add_argument("--out", default=EXPORT_DIR)
+    parser.add_argument("--formats", nargs="+", default=["md", "html"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--benchmark", type=int, metavar="N", help="Render N synthetic SOPs instead"
+    )
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        counts = sorted({1, args.workers or _cpu_count()})
+        print(format_reports(benchmark(args.benchmark, counts, args.formats)))
+        return
+    if not args.paths:
+        parser.error("give SOP paths or --benchmark N")
+    report = publish_sops(args.paths, args.out, args.formats, args.workers)
+    print(format_reports([report]))
+    for failure in report.failures:
+        print(f"failed: {failure.source}: {failure.error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+"""Streaming Markdown and HTML renderers for ``SOPMarkdown`` documents.
+
+Both renderers are generators of text fragments, so a document is written to
+its file piece by piece instead of being assembled in memory first. Every
+field of the model is rendered. Page chrome, CSS and the per-step field
+layout are built once at import and shared by all documents.
+"""
+
+import html
+import os
+import re
+import tempfile
+from string import Template
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .models import ProcessFlowElement, SOPMarkdown, SOPSection, SOPStep
+
+# Step list fields in display order, with their headings
+STEP_LISTS: Tuple[Tuple[str, str], ...] = (
+    ("Collaborating Roles", "collaborating_roles"),
+    ("Tools Required", "tools_required"),
+    ("Inputs", "inputs"),
+    ("Outputs", "outputs"),
+    ("⚠️ Safety Warnings", "safety_warnings"),
+    ("Quality Checks", "quality_checks"),
+    ("Automated Actions", "automated_actions"),
+    ("Documentation Required", "documentation_required"),
+    ("Dependencies", "dependencies"),
+    ("User Insights", "user_insights"),
+    ("Common Mistakes", "common_mistakes"),
+)
+
+QUALITY_LISTS: Tuple[Tuple[str, str], ...] = (
+    ("Success Criteria", "success_criteria"),
+    ("Performance Indicators", "performance_indicators"),
+    ("Training Requirements", "training_requirements"),
+    ("Improvement Suggestions", "improvement_suggestions"),
+)
+QUALITY_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("Accuracy Requirements", "accuracy_requirements"),
+    ("Acceptable Error Rates", "error_rates"),
+    ("Competency Assessment", "competency_assessment"),
+    ("Review Frequency", "review_frequency"),
+)
+RISK_LISTS: Tuple[Tuple[str, str], ...] = (
+    ("Identified Risks", "identified_risks"),
+    ("Mitigation Measures", "mitigation_measures"),
+    ("Safety Controls", "safety_controls"),
+    ("Quality Controls", "quality_controls"),
+    ("Environmental Controls", "environmental_controls"),
+    ("Emergency Contacts", "emergency_contacts"),
+    ("Escalation Procedures", "escalation_procedures"),
+)
+
+_HTML_CSS = """
+body{font-family:-apple-system,BlinkMacSystemFont,"Segoe UI",Ubuntu,sans-serif;
+max-width:60rem;margin:2rem auto;padding:0 1.5rem;line-height:1.5;color:#1f2328}
+h1,h2,h3{line-height:1.25}h2{border-bottom:1px solid #d0d7de;padding-bottom:.3em}
+table{border-collapse:collapse;margin:1em 0}th,td{border:1px solid #d0d7de;
+padding:.3em .7em;text-align:left;vertical-align:top}th{background:#f6f8fa}
+pre,code{background:#f6f8fa;font-family:ui-monospace,Consolas,monospace}
+pre{padding:1em;overflow:auto}.step{margin:1.5em 0}.meta{color:#59636e}
+.risk-high,.risk-critical{color:#cf222e;font-weight:600}.warning{color:#9a6700}
+""".strip()
+
+_HTML_HEAD = Template(
+    '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+    '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+    f"<title>$title</title>\n<style>\n{_HTML_CSS}\n</style>\n</head>\n<body>\n"
+)
+_HTML_TAIL = "</body>\n</html>\n"
+_HTML_STEP = Template(
+    '<div class="step" id="step-$anchor">\n<h3>$num. $title</h3>\n'
+    '<p class="meta">Type: $type · Risk: <span class="risk-$risk">$risk</span>'
+    " · Responsible: $role$duration</p>\n<p>$description</p>\n"
+)
+
+_MERMAID_ID = re.compile(r"[^A-Za-z0-9_]")
+
+
+def _anchor(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "x"
+
+
+def _cell(text: object) -> str:
+    """Markdown table cell: pipes escaped, line breaks kept."""
+    return str(text).replace("|", "\\|").replace("\n", "<br>")
+
+
+def _e(text: object) -> str:
+    return html.escape(str(text), quote=True)
+
+
+def _toc(sop: SOPMarkdown) -> List[str]:
+    """Top-level headings in document order, numbered like the body."""
+    headings = ["Purpose", "Scope"] + [s.title for s in sop.sections]
+    if sop.process_flow:
+        headings.append("Process Flow")
+    headings += ["Quality Metrics", "Risk Assessment"]
+    if sop.definitions or sop.abbreviations:
+        headings.append("Definitions and Abbreviations")
+    if sop.references or sop.appendices:
+        headings.append("References and Appendices")
+    if sop.change_history:
+        headings.append("Change History")
+    return [f"{i}. {title}" for i, title in enumerate(headings, 1)]
+
+
+def _metadata_rows(sop: SOPMarkdown) -> List[Tuple[str, str]]:
+    meta = sop.metadata
+    duration = sop.calculate_total_duration()
+    if duration == "Duration not calculated":
+        duration = None
+    rows = [
+        ("Document ID", meta.sop_id),
+        ("Version", meta.version),
+        ("Revision Date", meta.revision_date.strftime("%Y-%m-%d")),
+        ("Category", meta.category.value),
+        ("Department", meta.department),
+        ("Process Owner", meta.process_owner),
+        ("Author", meta.author),
+        ("Reviewer", meta.reviewer),
+        ("Approver", meta.approver),
+        ("Estimated Duration", duration),
+        ("Source Video", meta.created_from_video),
+    ]
+    return [(label, value) for label, value in rows if value]
+
+
+def mermaid_flow(elements: Sequence[ProcessFlowElement]) -> Iterator[str]:
+    """Mermaid flowchart lines for the process flow elements."""
+    yield "flowchart TD\n"
+    ids = {e.element_id: _MERMAID_ID.sub("_", e.element_id) for e in elements}
+    for element in elements:
+        label = element.label.replace('"', "#quot;")
+        kind = element.element_type.lower()
+        if kind == "decision":
+            shape = f'{{"{label}"}}'
+        elif kind in ("start", "end"):
+            shape = f'(["{label}"])'
+        else:
+            shape = f'["{label}"]'
+        yield f"    {ids[element.element_id]}{shape}\n"
+    for element in elements:
+        for target in element.connected_to:
+            target_id = ids.get(target, _MERMAID_ID.sub("_", target))
+            yield f"    {ids[element.element_id]} --> {target_id}\n"
+
+
+# Markdown
+
+
+def _md_list(title: str, items: Iterable[object]) -> Iterator[str]:
+    items = list(items)
+    if items:
+        yield f"**{title}:**\n\n"
+        for item in items:
+            yield f"- {item}\n"
+        yield "\n"
+
+
+def _md_table(
+    header: Tuple[str, ...], rows: Iterable[Sequence[object]]
+) -> Iterator[str]:
+    yield "| " + " | ".join(header) + " |\n"
+    yield "|" + "---|" * len(header) + "\n"
+    for row in rows:
+        yield "| " + " | ".join(_cell(v) for v in row) + " |\n"
+    yield "\n"
+
+
+def _md_step(step: SOPStep) -> Iterator[str]:
+    yield f"### {step.step_num}. {step.title}\n\n"
+    duration = (
+        f" · Duration: {step.estimated_duration}" if step.estimated_duration else ""
+    )
+    yield (
+        f"*Type: {step.step_type.value} · Risk: {step.risk_level.value}"
+        f" · Responsible: {step.responsible_role}{duration}*\n\n"
+    )
+    yield f"{step.description}\n\n"
+    for title, field in STEP_LISTS:
+        yield from _md_list(title, getattr(step, field))
+    if step.mcp_commands:
+        yield "**Playwright MCP Commands:**\n\n```\n"
+        for command in step.mcp_commands:
+            yield f"{command}\n"
+        yield "```\n\n"
+    if step.verification_method:
+        yield f"**Verification:** {step.verification_method}\n\n"
+
+
+def _md_section(number: int, section: SOPSection) -> Iterator[str]:
+    yield f"## {number}. {section.title}\n\n"
+    if section.description:
+        yield f"{section.description}\n\n"
+    if section.estimated_duration:
+        yield f"**Estimated Duration:** {section.estimated_duration}\n\n"
+    yield from _md_list("Prerequisites", section.prerequisites)
+    for step in section.steps:
+        yield from _md_step(step)
+    yield from _md_list("Deliverables", section.deliverables)
+
+
+def iter_markdown(sop: SOPMarkdown) -> Iterator[str]:
+    """Render an SOP as Markdown, one fragment at a time."""
+    meta = sop.metadata
+    yield f"# {meta.title}\n\n"
+    yield from _md_table(("Field", "Value"), _metadata_rows(sop))
+    yield "## Table of Contents\n\n"
+    for entry in _toc(sop):
+        yield f"{entry}\n"
+    yield "\n"
+
+    yield f"## 1. Purpose\n\n{meta.purpose}\n\n"
+    yield f"## 2. Scope\n\n{meta.scope}\n\n"
+    yield from _md_list("Audience", meta.audience)
+    yield from _md_list("Regulatory References", meta.regulatory_refs)
+    yield from _md_list("Related Documents", meta.related_docs)
+
+    number = 3
+    for section in sop.sections:
+        yield from _md_section(number, section)
+        number += 1
+
+    if sop.process_flow:
+        yield f"## {number}. Process Flow\n\n```mermaid\n"
+        yield from mermaid_flow(sop.process_flow)
+        yield "```\n\n"
+        number += 1
+
+    quality = sop.quality_metrics
+    yield f"## {number}. Quality Metrics\n\n"
+    for title, field in QUALITY_FIELDS:
+        value = getattr(quality, field)
+        if value:
+            yield f"**{title}:** {value}\n\n"
+    for title, field in QUALITY_LISTS:
+        yield from _md_list(title, getattr(quality, field))
+    number += 1
+
+    risk = sop.risk_assessment
+    yield f"## {number}. Risk Assessment\n\n"
+    yield f"**Overall Risk Category:** {risk.risk_category.value}\n\n"
+    for title, field in RISK_LISTS:
+        yield from _md_list(title, getattr(risk, field))
+    critical = sop.get_critical_steps()
+    if critical:
+        yield from _md_list(
+            "Critical Steps", (f"{s.step_num}. {s.title}" for s in critical)
+        )
+    number += 1
+
+    if sop.definitions or sop.abbreviations:
+        yield f"## {number}. Definitions and Abbreviations\n\n"
+        if sop.definitions:
+            yield from _md_table(
+                ("Term", "Definition"), sorted(sop.definitions.items())
+            )
+        if sop.abbreviations:
+            yield from _md_table(
+                ("Abbreviation", "Meaning"), sorted(sop.abbreviations.items())
+            )
+        number += 1
+    if sop.references or sop.appendices:
+        yield f"## {number}. References and Appendices\n\n"
+        yield from _md_list("References", sop.references)
+        yield from _md_list("Appendices", sop.appendices)
+        number += 1
+    if sop.change_history:
+        yield f"## {number}. Change History\n\n"
+        yield from _md_table(
+            ("Version", "Date", "Author", "Description", "Status", "Approver"),
+            (
+                (
+                    c.version,
+                    c.date.strftime("%Y-%m-%d"),
+                    c.author,
+                    c.description,
+                    c.approval_status,
+                    c.approver or "",
+                )
+                for c in sop.change_history
+            ),
+        )
+
+    if sop.generation_notes:
+        yield "---\n\n"
+        yield from _md_list("Generation Notes", sop.generation_notes)
+    if sop.source_analysis:
+        yield from _md_list(
+            "Source Analysis",
+            (f"{k}: {v}" for k, v in sorted(sop.source_analysis.items())),
+        )
+    yield f"*SOP format version {sop.format_version}*\n"
+
+
+# HTML
+
+
+def _html_list(title: str, items: Iterable[object], css: str = "") -> Iterator[str]:
+    items = list(items)
+    if items:
+        attr = f' class="{css}"' if css else ""
+        yield f"<p{attr}><strong>{_e(title)}:</strong></p>\n<ul{attr}>\n"
+        for item in items:
+            yield f"<li>{_e(item)}</li>\n"
+        yield "</ul>\n"
+
+
+def _html_table(
+    header: Tuple[str, ...], rows: Iterable[Sequence[object]]
+) -> Iterator[str]:
+    yield "<table>\n<tr>" + "".join(f"<th>{_e(h)}</th>" for h in header) + "</tr>\n"
+    for row in rows:
+        yield "<tr>" + "".join(f"<td>{_e(v)}</td>" for v in row) + "</tr>\n"
+    yield "</table>\n"
+
+
+def _html_heading(number: int, title: str) -> str:
+    return f'<h2 id="{_anchor(title)}">{number}. {_e(title)}</h2>\n'
+
+
+def _html_step(step: SOPStep) -> Iterator[str]:
+    duration = (
+        f" · Duration: {_e(step.estimated_duration)}" if step.estimated_duration else ""
+    )
+    yield _HTML_STEP.substitute(
+        anchor=_anchor(step.step_num),
+        num=_e(step.step_num),
+        title=_e(step.title),
+        type=_e(step.step_type.value),
+        risk=_e(step.risk_level.value),
+        role=_e(step.responsible_role),
+        duration=duration,
+        description=_e(step.description),
+    )
+    for title, field in STEP_LISTS:
+        css = "warning" if field == "safety_warnings" else ""
+        yield from _html_list(title, getattr(step, field), css)
+    if step.mcp_commands:
+        yield "<p><strong>Playwright MCP Commands:</strong></p>\n<pre><code>"
+        yield _e("\n".join(step.mcp_commands))
+        yield "</code></pre>\n"
+    if step.verification_method:
+        yield f"<p><strong>Verification:</strong> {_e(step.verification_method)}</p>\n"
+    yield "</div>\n"
+
+
+def iter_html(sop: SOPMarkdown) -> Iterator[str]:
+    """Render an SOP as a standalone HTML page, one fragment at a time."""
+    meta = sop.metadata
+    yield _HTML_HEAD.substitute(title=_e(meta.title))
+    yield f"<h1>{_e(meta.title)}</h1>\n"
+    yield from _html_table(("Field", "Value"), _metadata_rows(sop))
+    yield "<h2>Table of Contents</h2>\n<ol>\n"
+    for entry in _toc(sop):
+        title = entry.split(". ", 1)[1]
+        yield f'<li><a href="#{_anchor(title)}">{_e(title)}</a></li>\n'
+    yield "</ol>\n"
+
+    yield _html_heading(1, "Purpose") + f"<p>{_e(meta.purpose)}</p>\n"
+    yield _html_heading(2, "Scope") + f"<p>{_e(meta.scope)}</p>\n"
+    yield from _html_list("Audience", meta.audience)
+    yield from _html_list("Regulatory References", meta.regulatory_refs)
+    yield from _html_list("Related Documents", meta.related_docs)
+
+    number = 3
+    for section in sop.sections:
+        yield _html_heading(number, section.title)
+        if section.description:
+            yield f"<p>{_e(section.description)}</p>\n"
+        if section.estimated_duration:
+            yield (
+                "<p><strong>Estimated Duration:</strong> "
+                f"{_e(section.estimated_duration)}</p>\n"
+            )
+        yield from _html_list("Prerequisites", section.prerequisites)
+        for step in section.steps:
+            yield from _html_step(step)
+        yield from _html_list("Deliverables", section.deliverables)
+        number += 1
+
+    if sop.process_flow:
+        yield _html_heading(number, "Process Flow")
+        yield '<pre class="mermaid">'
+        yield _e("".join(mermaid_flow(sop.process_flow)))
+        yield "</pre>\n"
+        number += 1
+
+    quality = sop.quality_metrics
+    yield _html_heading(number, "Quality Metrics")
+    for title, field in QUALITY_FIELDS:
+        value = getattr(quality, field)
+        if value:
+            yield f"<p><strong>{_e(title)}:</strong> {_e(value)}</p>\n"
+    for title, field in QUALITY_LISTS:
+        yield from _html_list(title, getattr(quality, field))
+    number += 1
+
+    risk = sop.risk_assessment
+    yield _html_heading(number, "Risk Assessment")
+    level = _e(risk.risk_category.value)
+    yield (
+        "<p><strong>Overall Risk Category:</strong> "
+        f'<span class="risk-{level}">{level}</span></p>\n'
+    )
+    for title, field in RISK_LISTS:
+        yield from _html_list(title, getattr(risk, field))
+    critical = sop.get_critical_steps()
+    if critical:
+        yield from _html_list(
+            "Critical Steps", (f"{s.step_num}. {s.title}" for s in critical), "warning"
+        )
+    number += 1
+
+    if sop.definitions or sop.abbreviations:
+        yield _html_heading(number, "Definitions and Abbreviations")
+        if sop.definitions:
+            yield from _html_table(
+                ("Term", "Definition"), sorted(sop.definitions.items())
+            )
+        if sop.abbreviations:
+            yield from _html_table(
+                ("Abbreviation", "Meaning"), sorted(sop.abbreviations.items())
+            )
+        number += 1
+    if sop.references or sop.appendices:
+        yield _html_heading(number, "References and Appendices")
+        yield from _html_list("References", sop.references)
+        yield from _html_list("Appendices", sop.appendices)
+        number += 1
+    if sop.change_history:
+        yield _html_heading(number, "Change History")
+        yield from _html_table(
+            ("Version", "Date", "Author", "Description", "Status", "Approver"),
+            (
+                (
+                    c.version,
+                    c.date.strftime("%Y-%m-%d"),
+                    c.author,
+                    c.description,
+                    c.approval_status,
+                    c.approver or "",
+                )
+                for c in sop.change_history
+            ),
+        )
+
+    if sop.generation_notes or sop.source_analysis:
+        yield "<hr>\n"
+    yield from _html_list("Generation Notes", sop.generation_notes)
+    yield from _html_list(
+        "Source Analysis", (f"{k}: {v}" for k, v in sorted(sop.source_analysis.items()))
+    )
+    yield f'<p class="meta"><em>SOP format version {_e(sop.format_version)}</em></p>\n'
+    yield _HTML_TAIL
+
+
+Renderer = Callable[[SOPMarkdown], Iterator[str]]
+
+# Renderers by output format and file extension
+RENDERERS: Dict[str, Renderer] = {"md": iter_markdown, "html": iter_html}
+
+
+def stage_rendered(
+    fragments: Iterable[str], path: str, buffer_size: int = 1 << 16
+) -> Tuple[str, int]:
+    """Stream fragments to a temporary file beside ``path``.
+
+    Returns the temporary path and the bytes written; ``os.replace`` it onto
+    ``path`` to publish it. The temporary file is unique to this call, so
+    processes writing the same path never share one.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with open(fd, "w", encoding="utf-8", buffering=buffer_size) as f:
+            # mkstemp creates files readable by the owner only
+            os.fchmod(f.fileno(), 0o644)
+            f.writelines(fragments)
+            size = f.tell()
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, size
+
+
+def write_rendered(
+    fragments: Iterable[str], path: str, buffer_size: int = 1 << 16
+) -> int:
+    """Stream fragments to ``path`` atomically; returns bytes written."""
+    tmp_path, size = stage_rendered(fragments, path, buffer_size)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return size
+
+
+def render_to_file(
+    sop: SOPMarkdown, path: str, renderer: Optional[Renderer] = None
+) -> int:
+    """Render an SOP to a file, choosing the format from the extension."""
+    if renderer is None:
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        renderer = RENDERERS.get("md" if extension == "markdown" else extension)
+        if renderer is None:
+            raise ValueError(f"No renderer for {path}")
+    return write_rendered(renderer(sop), path)
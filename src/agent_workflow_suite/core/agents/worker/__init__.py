@@ -1 +1,45 @@
-from .agent import root_agent
\ No newline at end of file
+from .agent import (
+    root_agent,
+    execution_agent,
+    build_server_params,
+    create_toolset,
+    create_execution_agent,
+)
+from .hybrid import HybridBrowsing, parse_snapshot, resolve_selector
+from .models import (
+    AssertionKind,
+    AssertionResult,
+    BrowserMode,
+    InteractionUsage,
+    PageEvidence,
+    SnapshotNode,
+    StepAssertion,
+    StepVerification,
+    Verdict,
+    VerificationStats,
+)
+from .verify import StepVerifier, compile_step, genai_judge
+
+__all__ = [
+    "root_agent",
+    "execution_agent",
+    "build_server_params",
+    "create_toolset",
+    "create_execution_agent",
+    "BrowserMode",
+    "HybridBrowsing",
+    "InteractionUsage",
+    "SnapshotNode",
+    "parse_snapshot",
+    "resolve_selector",
+    "AssertionKind",
+    "AssertionResult",
+    "PageEvidence",
+    "StepAssertion",
+    "StepVerification",
+    "StepVerifier",
+    "Verdict",
+    "VerificationStats",
+    "compile_step",
+    "genai_judge",
+]
@@ -1,35 +1,125 @@
+from typing import Optional, Union
+
 from google.adk.agents import Agent
-from .prompts import AGENT_DESCRIPTION, AGENT_INSTRUCTION
+from google.adk.models import BaseLlm
+from agent_workflow_suite.core.caching import ContextCacheManager
+from agent_workflow_suite.core.execution import WaitResolver
+from agent_workflow_suite.core.profiling import ExecutionProfiler
+from agent_workflow_suite.core.state import OutputCache, rehydrate_outputs
+from .hybrid import HybridBrowsing
+from .models import BrowserMode
+from .prompts import (
+    AGENT_DESCRIPTION,
+    AGENT_INSTRUCTION,
+    HYBRID_INSTRUCTION,
+    VERIFICATION_INSTRUCTION,
+)
+from .verify import StepVerifier
 from google.adk.tools.mcp_tool.mcp_toolset import (
     MCPToolset,
     StdioServerParameters,
     StdioConnectionParams,
 )
 
+# Workflow artifacts the worker reads from state
+WORKFLOW_STATE_KEYS = ["nl_transcription", "playwright_transcription", "sop_markdown"]
+
+# Default Playwright MCP locations (shared profile for single-session use)
+OUTPUT_DIR = ".data/mcp/playwright/output"
+USER_DATA_DIR = "./data/mcp/playwright/user"
+
+
+def build_server_params(
+    user_data_dir: str = USER_DATA_DIR,
+    output_dir: str = OUTPUT_DIR,
+    mode: BrowserMode = BrowserMode.VISION,
+) -> StdioServerParameters:
+    """Build Playwright MCP server parameters for a browser profile.
+
+    Vision mode exposes only screenshot and coordinate tools. Hybrid mode
+    keeps the accessibility snapshot tools and adds the coordinate tools as a
+    fallback.
+    """
+    return StdioServerParameters(
+        command="npx",
+        args=[
+            "-y",
+            "@playwright/mcp@latest",
+            "--image-responses=allow",
+            "--vision" if mode == BrowserMode.VISION else "--caps=vision",
+            f"--output-dir={output_dir}",
+            f"--user-data-dir={user_data_dir}",
+            "--browser=chrome"
+        ],
+    )
+
+
+def create_toolset(
+    user_data_dir: str = USER_DATA_DIR,
+    output_dir: str = OUTPUT_DIR,
+    server_params: Optional[StdioServerParameters] = None,
+    mode: BrowserMode = BrowserMode.VISION,
+) -> MCPToolset:
+    """Create a Playwright MCP toolset bound to its own browser profile."""
+    params = server_params or build_server_params(user_data_dir, output_dir, mode)
+    connection_params = StdioConnectionParams(server_params=params, timeout=60)
+    return MCPToolset(connection_params=connection_params)
+
+
+def create_execution_agent(
+    toolset: MCPToolset,
+    name: str = "execution_agent",
+    profiler: Optional[ExecutionProfiler] = None,
+    model: Union[str, BaseLlm] = "gemini-2.5-pro",
+    context_cache: Optional[ContextCacheManager] = None,
+    browsing: Optional[HybridBrowsing] = None,
+    verifier: Optional[StepVerifier] = None,
+    waits: Optional[WaitResolver] = None,
+) -> Agent:
+    """Create an execution agent that drives the given browser toolset.
+
+    Pass a profiler to record model and tool call timings for the agent (run
+    the agent inside ``profiler.guard()`` so calls that raise are recorded), and
+    a context cache shared by all agents of a workflow to send the instruction,
+    SOP and tool declarations once per workflow instead of once per request.
+    Pass ``browsing`` with a hybrid-mode toolset to work from accessibility
+    snapshots and fall back to vision only for elements it cannot resolve.
+    Pass ``verifier`` to check each SOP step with local assertions instead of
+    a screenshot, leaving screenshots for steps the checks cannot decide.
+    Pass ``waits``, a resolver calling the same toolset (``toolset_caller``)
+    and holding the conditions derived from the recording, to end the model's
+    fixed-time waits as soon as the page is ready.
+    """
+    instruction = HYBRID_INSTRUCTION if browsing else AGENT_INSTRUCTION
+    if verifier is not None:
+        instruction += VERIFICATION_INSTRUCTION
+    agent = Agent(
+        model=model,
+        name=name,
+        description=AGENT_DESCRIPTION,
+        instruction=instruction,
+        tools=[toolset],
+        before_model_callback=rehydrate_outputs(WORKFLOW_STATE_KEYS, OutputCache()),
+    )
+    if browsing is not None:
+        browsing.attach(agent)
+    if verifier is not None:
+        verifier.attach(agent)
+    if waits is not None:
+        waits.attach(agent)
+    if context_cache is not None:
+        context_cache.attach(agent)
+    if profiler is not None:
+        profiler.attach(agent)
+    return agent
+
+
 # Configure Playwright MCP server
-server_params = StdioServerParameters(
-    command="npx",
-    args=[
-        "-y",
-        "@playwright/mcp@latest",
-        "--image-responses=allow",
-        "--vision",
-        "--output-dir=.data/mcp/playwright/output",
-        "--user-data-dir=./data/mcp/playwright/user",
-        "--browser=chrome"
-    ],
-)
-connection_params = StdioConnectionParams(server_params=server_params, timeout=60)
-toolset = MCPToolset(connection_params=connection_params)
+server_params = build_server_params()
+toolset = create_toolset(server_params=server_params)
 
 
-execution_agent = Agent(
-    model="gemini-2.5-pro",
-    name="execution_agent",
-    description=AGENT_DESCRIPTION,
-    instruction=AGENT_INSTRUCTION,
-    tools=[toolset],
-)
+execution_agent = create_execution_agent(toolset)
 
 # For ADK tools compatibility, the root agent must be named `root_agent`
 root_agent = execution_agent
@@ -0,0 +1,383 @@
+"""Accessibility-snapshot browsing with a vision fallback.
+
+In hybrid mode the worker reads pages through Playwright MCP's text
+accessibility snapshots and acts on elements by ``ref``. Elements recorded in
+``PlaywrightTranscription`` are resolved against the latest snapshot by the
+``resolve_element`` tool, from their ``ElementSelector`` or description;
+only elements that cannot be resolved are handled with screenshots and
+coordinates. ``HybridBrowsing`` also counts how often each path was used.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.tools import BaseTool, FunctionTool, ToolContext
+
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ElementSelector,
+    PlaywrightTranscription,
+)
+from agent_workflow_suite.core.state import (
+    OutputCache,
+    chain_callback,
+    load_state_model,
+)
+
+from .models import InteractionUsage, SnapshotNode
+
+# Tools acting on an element by snapshot ref, and by screen coordinates
+SNAPSHOT_TOOLS = frozenset(
+    {
+        "browser_click",
+        "browser_type",
+        "browser_hover",
+        "browser_select_option",
+        "browser_drag",
+    }
+)
+VISION_TOOLS = frozenset(
+    {
+        "browser_mouse_click_xy",
+        "browser_mouse_move_xy",
+        "browser_mouse_drag_xy",
+        "browser_screen_click",
+        "browser_screen_move_mouse",
+        "browser_screen_drag",
+        "browser_screen_type",
+    }
+)
+SCREENSHOT_TOOLS = frozenset({"browser_take_screenshot", "browser_screen_capture"})
+
+_LINE = re.compile(r'^\s*-\s+([\w-]+)(?:\s+"((?:[^"\\]|\\.)*)")?((?:\s*\[[^\]]*\])*)')
+_ATTRIBUTE = re.compile(r"\[([\w-]+)(?:=([^\]]*))?\]")
+_QUOTED = re.compile(r"""["']([^"']+)["']""")
+
+# HTML tags whose implicit ARIA role is unambiguous
+_TAG_ROLES = {
+    "a": "link",
+    "button": "button",
+    "select": "combobox",
+    "textarea": "textbox",
+    "h1": "heading",
+    "h2": "heading",
+    "h3": "heading",
+    "h4": "heading",
+    "h5": "heading",
+    "h6": "heading",
+    "img": "img",
+}
+_INPUT_ROLES = {
+    "checkbox": "checkbox",
+    "radio": "radio",
+    "submit": "button",
+    "button": "button",
+    "search": "searchbox",
+}
+# Words in an element description that name a role
+_DESCRIPTION_ROLES = {
+    "button": "button",
+    "link": "link",
+    "field": "textbox",
+    "input": "textbox",
+    "textbox": "textbox",
+    "checkbox": "checkbox",
+    "dropdown": "combobox",
+    "tab": "tab",
+    "heading": "heading",
+}
+
+_SNAPSHOT_CACHE_SIZE = 256
+
+
+def parse_snapshot(text: str) -> List[SnapshotNode]:
+    """Elements with a ``ref`` in a Playwright MCP accessibility snapshot."""
+    nodes = []
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        role, name, attributes = match.groups()
+        attrs = {k: v or "" for k, v in _ATTRIBUTE.findall(attributes or "")}
+        ref = attrs.pop("ref", None)
+        if ref:
+            name = (name or "").replace('\\"', '"')
+            nodes.append(SnapshotNode(role=role, name=name, ref=ref, attributes=attrs))
+    return nodes
+
+
+def _norm(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def selector_hints(selector: ElementSelector) -> Tuple[Optional[str], Optional[str]]:
+    """Role and accessible name a recorded selector points at, when knowable.
+
+    Role, text, label and similar selectors carry the name directly; CSS and
+    XPath selectors only give hints through text, ARIA and placeholder
+    attributes and the element tag.
+    """
+    kind = selector.type.strip().lower()
+    value = selector.value.strip()
+    if kind in ("role", "getbyrole", "aria-role"):
+        match = re.match(r"^\s*([\w-]+)\s*(.*)$", value)
+        if not match:
+            return None, None
+        quoted = _QUOTED.search(match.group(2))
+        rest = match.group(2).strip(" :[]")
+        return match.group(1).lower(), quoted.group(1) if quoted else rest or None
+    if kind in ("css", "xpath"):
+        role = None
+        tag = re.match(r"^(?://|\.//)?([a-zA-Z][\w-]*)", value)
+        if tag:
+            name = tag.group(1).lower()
+            role = _TAG_ROLES.get(name)
+            if name == "input":
+                kind_match = re.search(r"type\s*=\s*['\"]?(\w+)", value)
+                input_type = kind_match.group(1).lower() if kind_match else "text"
+                role = _INPUT_ROLES.get(input_type, "textbox")
+        for pattern in (
+            r"(?:has-text|text\(\)\s*=|contains\(\s*text\(\)\s*,)\s*\(?\s*['\"]([^'\"]+)",
+            r"@?(?:aria-label|placeholder|title|alt)\s*=\s*['\"]([^'\"]+)",
+            r"text\s*=\s*['\"]?([^'\"\]]+)",
+        ):
+            found = re.search(pattern, value)
+            if found:
+                return role, found.group(1).strip()
+        return role, None
+    # text, label, placeholder, aria-label, alt, title, testid and friends
+    value = re.sub(r"^\w+=", "", value).strip("\"' ")
+    return None, value or None
+
+
+def _match(
+    nodes: List[SnapshotNode], role: Optional[str], name: Optional[str]
+) -> Optional[SnapshotNode]:
+    """The single node with this role and name, exact names preferred.
+
+    With a role, only nodes of that role are candidates.
+    """
+    if not name:
+        return None
+    wanted = _norm(name)
+    pool = [n for n in nodes if role is None or n.role == role]
+    for candidates in (
+        [n for n in pool if _norm(n.name) == wanted],
+        [n for n in pool if wanted and wanted in _norm(n.name)],
+    ):
+        if len(candidates) == 1:
+            return candidates[0]
+        if candidates:
+            return None
+    return None
+
+
+def _match_description(
+    nodes: List[SnapshotNode], description: str
+) -> Optional[SnapshotNode]:
+    """Node whose name appears in a free-text element description."""
+    text = f" {_norm(description)} "
+    roles = {role for word, role in _DESCRIPTION_ROLES.items() if f" {word} " in text}
+    named = [
+        n for n in nodes if len(_norm(n.name)) >= 3 and f" {_norm(n.name)} " in text
+    ]
+    if roles:
+        named = [n for n in named if n.role in roles] or named
+    if not named:
+        return None
+    longest = max(len(n.name) for n in named)
+    best = [n for n in named if len(n.name) == longest]
+    return best[0] if len(best) == 1 else None
+
+
+def resolve_selector(
+    nodes: List[SnapshotNode],
+    selector: Optional[ElementSelector] = None,
+    description: Optional[str] = None,
+) -> Tuple[Optional[SnapshotNode], str]:
+    """Find an element in a snapshot; returns the node and how it was found."""
+    if selector is not None:
+        node = _match(nodes, *selector_hints(selector))
+        if node is not None:
+            return node, "selector"
+    if description:
+        node = _match(nodes, None, description) or _match_description(
+            nodes, description
+        )
+        if node is not None:
+            return node, "description"
+    return None, ""
+
+
+def _response_text(response: Any) -> Tuple[str, int]:
+    """Text and image byte count of an MCP tool response."""
+    content = getattr(response, "content", None)
+    if content is None and isinstance(response, dict):
+        content = response.get("content")
+        if content is None and "result" in response:
+            return _response_text(response["result"])
+    if not isinstance(content, list):
+        return str(response or ""), 0
+    texts, image_bytes = [], 0
+    for item in content:
+        if isinstance(item, dict):
+            kind, data, text = item.get("type"), item.get("data"), item.get("text")
+        else:
+            kind = getattr(item, "type", None)
+            data = getattr(item, "data", None)
+            text = getattr(item, "text", None)
+        if kind == "image":
+            image_bytes += len(data or "")
+        elif text:
+            texts.append(text)
+    return "\n".join(texts), image_bytes
+
+
+class HybridBrowsing:
+    """Snapshot-first element resolution and usage accounting for a worker.
+
+    ``attach`` adds the ``resolve_element`` tool and an after_tool_callback
+    that keeps the latest snapshot of each invocation and tallies snapshot
+    and vision tool calls per invocation (``usage_for``) and in ``usage``,
+    the total since the last ``reset``.
+    """
+
+    def __init__(self, transcription_key: str = "playwright_transcription"):
+        self.transcription_key = transcription_key
+        self.usage = InteractionUsage()
+        self.outputs = OutputCache()
+        self._snapshots: "OrderedDict[str, str]" = OrderedDict()
+        self._usages: "OrderedDict[str, InteractionUsage]" = OrderedDict()
+
+    @property
+    def tool(self) -> FunctionTool:
+        """The ``resolve_element`` function tool."""
+
+        # No parameter defaults: Gemini function declarations do not support them
+        async def resolve_element(
+            step: int, description: str, tool_context: ToolContext
+        ) -> Dict[str, Any]:
+            """Find the snapshot ref of an element before interacting with it.
+
+            Args:
+              step: playwright_transcription step number whose recorded element
+                to find, or 0 to use the description only.
+              description: What the element looks like or says, used when the
+                step has no usable selector; may be empty when step is given.
+
+            Returns:
+              The ref and element to pass to browser_click, browser_type and
+              similar tools, or the reason it could not be found.
+            """
+            return await self.resolve(tool_context, step, description)
+
+        return FunctionTool(resolve_element)
+
+    def attach(self, agent: LlmAgent) -> LlmAgent:
+        """Add the resolver tool and usage tracking to an agent."""
+        agent.tools = list(agent.tools) + [self.tool]
+        return chain_callback(agent, "after_tool_callback", self.after_tool_callback)
+
+    def usage_for(self, invocation_id: str) -> InteractionUsage:
+        """Usage of one invocation, such as a single work item's run."""
+        return self._usages.get(invocation_id) or InteractionUsage()
+
+    def reset(self) -> None:
+        """Drop usage totals, per-invocation usage and snapshots."""
+        self.usage = InteractionUsage()
+        self._usages.clear()
+        self._snapshots.clear()
+
+    def _tallies(self, invocation_id: str) -> Tuple[InteractionUsage, ...]:
+        """The totals and the invocation's usage, both to be counted into."""
+        usage = self._usages.get(invocation_id)
+        if usage is None:
+            usage = self._usages[invocation_id] = InteractionUsage()
+        self._usages.move_to_end(invocation_id)
+        while len(self._usages) > _SNAPSHOT_CACHE_SIZE:
+            self._usages.popitem(last=False)
+        return self.usage, usage
+
+    def latest_snapshot(self, invocation_id: str) -> Optional[str]:
+        """Latest snapshot text seen in an invocation."""
+        return self._snapshots.get(invocation_id)
+
+    async def resolve(
+        self, tool_context: ToolContext, step: int = 0, description: str = ""
+    ) -> Dict[str, Any]:
+        """Resolve a recorded step's element or a description to a ref."""
+        snapshot = self._snapshots.get(tool_context.invocation_id)
+        if snapshot is None:
+            return self._unresolved(
+                tool_context.invocation_id,
+                description or f"step {step}",
+                "No snapshot yet; call browser_snapshot first",
+            )
+        selector = None
+        if step:
+            transcription = await load_state_model(
+                tool_context,
+                self.transcription_key,
+                PlaywrightTranscription,
+                self.outputs,
+            )
+            action = transcription.get_action(step) if transcription else None
+            if action is not None:
+                selector = action.selector
+                description = description or action.element_desc or ""
+        node, source = resolve_selector(
+            parse_snapshot(snapshot), selector, description or None
+        )
+        if node is None:
+            return self._unresolved(
+                tool_context.invocation_id,
+                description or f"step {step}",
+                "Not found in the latest snapshot; read the snapshot or fall "
+                "back to browser_take_screenshot and coordinates",
+            )
+        for usage in self._tallies(tool_context.invocation_id):
+            usage.resolved += 1
+        label = f'{node.role} "{node.name}"' if node.name else node.role
+        return {"resolved": True, "ref": node.ref, "element": label, "via": source}
+
+    def _unresolved(
+        self, invocation_id: str, element: str, reason: str
+    ) -> Dict[str, Any]:
+        for usage in self._tallies(invocation_id):
+            usage.unresolved += 1
+            usage.last_unresolved = element
+        return {"resolved": False, "reason": reason}
+
+    def after_tool_callback(
+        self,
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext,
+        tool_response: Any,
+    ) -> None:
+        name = tool.name
+        text, image_bytes = "", 0
+        if name != "resolve_element":
+            text, image_bytes = _response_text(tool_response)
+        for usage in self._tallies(tool_context.invocation_id):
+            usage.by_tool[name] = usage.by_tool.get(name, 0) + 1
+            if name in SNAPSHOT_TOOLS or "ref" in args or "startRef" in args:
+                usage.snapshot_calls += 1
+            elif name in VISION_TOOLS:
+                usage.vision_calls += 1
+            if name in SCREENSHOT_TOOLS:
+                usage.screenshots += 1
+                usage.screenshot_bytes += image_bytes
+            if name == "browser_snapshot":
+                usage.snapshots += 1
+                usage.snapshot_chars += len(text)
+        if name == "resolve_element":
+            return None
+        # Snapshots also come back with the results of most page actions
+        if "[ref=" in text:
+            self._snapshots[tool_context.invocation_id] = text
+            self._snapshots.move_to_end(tool_context.invocation_id)
+            while len(self._snapshots) > _SNAPSHOT_CACHE_SIZE:
+                self._snapshots.popitem(last=False)
+        return None
@@ -0,0 +1,164 @@
+from enum import Enum
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BrowserMode(str, Enum):
+    """How the worker reads and acts on pages."""
+
+    VISION = "vision"  # Screenshots and coordinates only
+    HYBRID = "hybrid"  # Accessibility snapshots first, vision as fallback
+
+
+class SnapshotNode(BaseModel):
+    """One element of a Playwright MCP accessibility snapshot."""
+
+    role: str = Field(..., description="ARIA role")
+    name: str = Field(default="", description="Accessible name")
+    ref: str = Field(..., description="Element reference for snapshot tools")
+    attributes: Dict[str, str] = Field(
+        default_factory=dict, description="Extra attributes such as url or level"
+    )
+
+
+class InteractionUsage(BaseModel):
+    """Snapshot versus vision usage of a worker run."""
+
+    snapshot_calls: int = Field(default=0, description="Ref-based tool calls")
+    vision_calls: int = Field(default=0, description="Coordinate-based tool calls")
+    snapshots: int = Field(default=0, description="Accessibility snapshots taken")
+    screenshots: int = Field(default=0, description="Screenshots taken")
+    resolved: int = Field(
+        default=0, description="Elements resolve_element found in a snapshot"
+    )
+    unresolved: int = Field(
+        default=0, description="Elements resolve_element could not find"
+    )
+    snapshot_chars: int = Field(default=0, description="Text returned by snapshots")
+    screenshot_bytes: int = Field(default=0, description="Image data returned")
+    by_tool: Dict[str, int] = Field(default_factory=dict, description="Calls per tool")
+    last_unresolved: Optional[str] = Field(
+        default=None, description="Most recent element that needed vision"
+    )
+
+    def interactions(self) -> int:
+        """Element interactions of either kind."""
+        return self.snapshot_calls + self.vision_calls
+
+    def vision_share(self) -> float:
+        """Fraction of element interactions that fell back to vision."""
+        total = self.interactions()
+        return self.vision_calls / total if total else 0.0
+
+    def resolve_rate(self) -> float:
+        """Fraction of resolve_element calls that found a ref."""
+        total = self.resolved + self.unresolved
+        return self.resolved / total if total else 0.0
+
+
+class AssertionKind(str, Enum):
+    """Local checks a step can be verified with."""
+
+    URL = "url"  # Current URL matches a URL or path
+    TEXT_PRESENT = "text_present"  # Text appears on the page
+    TEXT_ABSENT = "text_absent"  # Text no longer appears on the page
+    NO_CONSOLE_ERRORS = "no_console_errors"  # No new console errors
+    NETWORK_OK = "network_ok"  # No new failed requests
+
+
+class Verdict(str, Enum):
+    """Outcome of a check or a step verification."""
+
+    PASSED = "passed"
+    FAILED = "failed"
+    INCONCLUSIVE = "inconclusive"
+
+
+class StepAssertion(BaseModel):
+    """A local check compiled from an SOP step or recorded action."""
+
+    kind: AssertionKind = Field(..., description="What is checked")
+    expected: str = Field(default="", description="Expected URL, path or text")
+    required: bool = Field(
+        default=True,
+        description="A mismatch fails the step; otherwise it only makes the "
+        "step inconclusive",
+    )
+    source: str = Field(default="", description="Step field the check came from")
+
+
+class AssertionResult(BaseModel):
+    """Outcome of one check against the observed page."""
+
+    assertion: StepAssertion = Field(..., description="Check that was evaluated")
+    verdict: Verdict = Field(..., description="Check outcome")
+    observed: bool = Field(
+        default=True, description="The page state the check needs was seen"
+    )
+    detail: str = Field(default="", description="What was observed")
+
+
+class PageEvidence(BaseModel):
+    """Page state observed through tool responses since the last check."""
+
+    url: Optional[str] = Field(default=None, description="Current page URL")
+    text: Optional[str] = Field(
+        default=None, description="Latest accessibility snapshot, if still current"
+    )
+    before_text: Optional[str] = Field(
+        default=None, description="Snapshot taken before the step changed the page"
+    )
+    console_errors: Optional[List[str]] = Field(
+        default=None, description="Console errors new since the last check"
+    )
+    failed_requests: Optional[List[str]] = Field(
+        default=None,
+        description="Requests with an error status new since the last check",
+    )
+
+
+class StepVerification(BaseModel):
+    """Verification result of one SOP step."""
+
+    step_num: str = Field(..., description="SOP step number")
+    verdict: Verdict = Field(..., description="Final outcome")
+    results: List[AssertionResult] = Field(
+        default_factory=list, description="Outcome of each local check"
+    )
+    escalated: bool = Field(
+        default=False, description="Local checks were inconclusive and a model judged"
+    )
+    reason: Optional[str] = Field(default=None, description="Judge's explanation")
+    seconds: float = Field(default=0.0, description="Wall time of the verification")
+
+
+class VerificationStats(BaseModel):
+    """Totals over every step a verifier has checked."""
+
+    steps: int = Field(default=0, description="Steps verified")
+    passed: int = Field(default=0, description="Steps that passed")
+    failed: int = Field(default=0, description="Steps that failed")
+    inconclusive: int = Field(default=0, description="Steps left undecided")
+    escalations: int = Field(default=0, description="Steps sent to a model judge")
+    seconds: float = Field(default=0.0, description="Total verification wall time")
+    probe_failures: int = Field(default=0, description="Page state fetches that failed")
+    last_error: Optional[str] = Field(
+        default=None, description="Latest failed page state fetch"
+    )
+
+    def record(self, verification: "StepVerification") -> None:
+        """Add one step verification to the totals."""
+        self.steps += 1
+        self.seconds += verification.seconds
+        self.escalations += verification.escalated
+        if verification.verdict == Verdict.PASSED:
+            self.passed += 1
+        elif verification.verdict == Verdict.FAILED:
+            self.failed += 1
+        else:
+            self.inconclusive += 1
+
+    def local_share(self) -> float:
+        """Fraction of steps decided without a model call."""
+        return 1.0 - self.escalations / self.steps if self.steps else 0.0
@@ -0,0 +1,695 @@
+"""Deterministic verification of SOP steps, with a model only as tie-breaker.
+
+Each ``SOPStep``'s ``outputs``, ``quality_checks`` and ``verification_method``,
+and the URL and page of its recorded ``ActionStep``, are compiled once into
+local checks: URL match, text present or absent, no new console errors and
+no new failed requests. ``verify_step`` evaluates them against the page state
+seen in tool responses, probing the browser directly for anything stale, so
+most steps are decided in milliseconds with no model call. Only steps whose
+checks are inconclusive go to a judge model, or back to the agent to check
+with a screenshot.
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import google.genai.types as types
+import httpx
+from google.adk.agents import LlmAgent
+from google.adk.tools import BaseTool, FunctionTool, ToolContext
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+from google.genai import errors
+from pydantic import BaseModel, Field
+
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ActionStep,
+    PlaywrightAction,
+    PlaywrightTranscription,
+)
+from agent_workflow_suite.core.agents.sop_markdown.models import SOPMarkdown, SOPStep
+from agent_workflow_suite.core.execution import BROWSER_ERRORS
+from agent_workflow_suite.core.state import (
+    OutputCache,
+    chain_callback,
+    load_state_model,
+)
+
+from .hybrid import _response_text
+from .models import (
+    AssertionKind,
+    AssertionResult,
+    PageEvidence,
+    StepAssertion,
+    StepVerification,
+    Verdict,
+    VerificationStats,
+)
+
+# Takes a prompt; returns whether the step passed and why
+Judge = Callable[[str], Awaitable[Tuple[bool, str]]]
+
+VERIFY_MODEL = "gemini-2.5-flash"
+
+# Failures of a judge call; the step is left inconclusive
+JUDGE_ERRORS = (errors.APIError, httpx.HTTPError, OSError, ValueError)
+
+JUDGE_INSTRUCTION = """Decide whether a step of a standard operating procedure
+was completed, from the state of the web page after it ran. Local checks
+could not decide; their results are listed below.
+
+## Step {step_num}: {title}
+{description}
+
+## Expected
+{expected}
+
+## Local checks
+{checks}
+
+## Page
+URL: {url}
+Console errors: {errors}
+Failed requests: {requests}
+
+```yaml
+{text}
+```"""
+
+# Tools that only read the page; any other tool may change it
+READ_ONLY_TOOLS = frozenset(
+    {
+        "browser_snapshot",
+        "browser_console_messages",
+        "browser_network_requests",
+        "browser_tab_list",
+        "browser_take_screenshot",
+        "browser_screen_capture",
+        "browser_wait_for",
+        "browser_pdf_save",
+        "browser_generate_playwright_test",
+        "resolve_element",
+        "verify_step",
+    }
+)
+CONTENT_KINDS = frozenset(
+    {AssertionKind.URL, AssertionKind.TEXT_PRESENT, AssertionKind.TEXT_ABSENT}
+)
+
+_PAGE_URL = re.compile(r"^\s*-?\s*Page URL:\s*(\S+)", re.MULTILINE)
+_STATUS = re.compile(r"=>\s*\[(\d{3})\]")
+_CONSOLE_ERROR = re.compile(r"^\s*\[(?:error|ERROR|pageerror)\]")
+_URL = re.compile(r"https?://[^\s\"'<>)\]]+")
+_PATH = re.compile(
+    r"\b(?:url|path|page|redirect(?:ed|s)?\s+to|navigat\w*\s+to|lands?\s+on)\s+"
+    r"(?:contains\s+|is\s+|of\s+|at\s+)?[`\"']?(/[\w\-./?=&%]*)",
+    re.IGNORECASE,
+)
+_ELEMENT = re.compile(r"\belement\s*=\s*([\"'])(.+?)\1")
+_QUOTED = re.compile(r"[\"“`]([^\"”`\n]{2,80})[\"”`]")
+_NEGATION_BEFORE = re.compile(
+    r"\b(?:no|not|without|never)\s+(?:\w+\s+)?$", re.IGNORECASE
+)
+_NEGATION_AFTER = re.compile(
+    r"^\W*(?:\w+\s+){0,2}(?:disappears?|is\s+gone|goes\s+away|is\s+removed|"
+    r"is\s+hidden|no\s+longer)",
+    re.IGNORECASE,
+)
+_SHOWS = re.compile(
+    r"\b(?:shows?|displays?|reads?|says?|showing|displaying|titled|labell?ed|"
+    r"(?:with|has)\s+(?:the\s+)?(?:text|message|title|label))\s+"
+    r"(?:the\s+)?([A-Z0-9][^.;,:!?()\n]{0,59}?)"
+    r"(?=\s+(?:for|when|after|before|within|once|on|in|at|and|to)\b|[.;,:!?()\n]|$)"
+)
+_NO_ERRORS = re.compile(
+    r"\bno\s+(?:console\s+|javascript\s+|js\s+)?errors?\b|\bwithout\s+(?:any\s+)?"
+    r"(?:console\s+)?errors?\b|\berror[- ]free\b",
+    re.IGNORECASE,
+)
+_NETWORK_OK = re.compile(
+    r"\b(?:loads?|loaded|saves?|saved|submit(?:s|ted)?)\s+successfully\b|"
+    r"\bsuccessful(?:ly)?\s+(?:load|save|submi)|\b(?:HTTP|status)\s+2\d\d\b|\b200\s+OK\b",
+    re.IGNORECASE,
+)
+
+_PAGE_CACHE_SIZE = 256
+_PLAN_CACHE_SIZE = 4096
+_JUDGE_TEXT_CHARS = 8000
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _text_checks(text: str, source: str) -> List[StepAssertion]:
+    """Checks stated in one free-text expectation.
+
+    Quoted text must be on the page, or absent when negated; URLs and paths
+    must match the current page. Unquoted text after verbs such as "shows" or
+    "reads" is only a hint, so a mismatch makes the step inconclusive rather
+    than failed.
+    """
+    checks = []
+    for url in _URL.findall(text):
+        checks.append(
+            StepAssertion(
+                kind=AssertionKind.URL, expected=url.rstrip(".,"), source=source
+            )
+        )
+    for path in _PATH.findall(text):
+        if len(path) > 1:
+            checks.append(
+                StepAssertion(
+                    kind=AssertionKind.URL, expected=path.rstrip(".,"), source=source
+                )
+            )
+    quoted_spans = []
+    for match in _QUOTED.finditer(text):
+        value = match.group(1).strip()
+        if _URL.fullmatch(value) or value.startswith("/"):
+            continue
+        quoted_spans.append(match.span())
+        absent = _NEGATION_BEFORE.search(
+            text[: match.start()]
+        ) or _NEGATION_AFTER.match(text[match.end() :])
+        kind = AssertionKind.TEXT_ABSENT if absent else AssertionKind.TEXT_PRESENT
+        checks.append(StepAssertion(kind=kind, expected=value, source=source))
+    for match in _SHOWS.finditer(text):
+        if any(start <= match.start(1) < end for start, end in quoted_spans):
+            continue
+        value = match.group(1).strip()
+        if not _URL.match(value):
+            checks.append(
+                StepAssertion(
+                    kind=AssertionKind.TEXT_PRESENT,
+                    expected=value,
+                    required=False,
+                    source=source,
+                )
+            )
+    if _NO_ERRORS.search(text):
+        checks.append(
+            StepAssertion(kind=AssertionKind.NO_CONSOLE_ERRORS, source=source)
+        )
+    if _NETWORK_OK.search(text):
+        checks.append(StepAssertion(kind=AssertionKind.NETWORK_OK, source=source))
+    return checks
+
+
+def _is_url(value: Optional[str]) -> bool:
+    return bool(value) and (bool(_URL.fullmatch(value)) or value.startswith("/"))
+
+
+def _control_names(step: SOPStep, action: Optional[ActionStep]) -> List[str]:
+    """Names of the elements a step acts on, from its commands and action."""
+    names = [m.group(2) for c in step.mcp_commands for m in _ELEMENT.finditer(c)]
+    if action is not None and action.element_desc:
+        names.append(action.element_desc)
+    return [_norm(name) for name in names if name.strip()]
+
+
+def _names_control(value: str, controls: List[str]) -> bool:
+    """Whether quoted text is the label of an element the step acts on."""
+    pattern = re.compile(rf"(?<!\w){re.escape(_norm(value))}(?!\w)")
+    return any(pattern.search(name) for name in controls)
+
+
+def compile_step(
+    step: SOPStep, action: Optional[ActionStep] = None
+) -> List[StepAssertion]:
+    """Compile an SOP step and its recorded action into local checks.
+
+    A navigation's target URL must match; the page a recorded action ran on
+    is only a hint, since the action may have left it. Quoted labels of the
+    elements the step acts on, such as the "Save" in 'Click "Save"', say
+    nothing about its outcome and are not checked. New console errors and
+    failed requests are always checked, as hints unless the step asks for
+    them.
+    """
+    controls = _control_names(step, action)
+    checks: List[StepAssertion] = []
+    for source, texts in (
+        ("verification_method", [step.verification_method or ""]),
+        ("quality_checks", step.quality_checks),
+        ("outputs", step.outputs),
+    ):
+        for text in texts:
+            checks.extend(
+                c
+                for c in _text_checks(text, source)
+                if c.kind != AssertionKind.TEXT_PRESENT
+                or not _names_control(c.expected, controls)
+            )
+    if action is not None:
+        if action.action == PlaywrightAction.NAVIGATE and _is_url(action.url):
+            checks.append(
+                StepAssertion(
+                    kind=AssertionKind.URL, expected=action.url, source="action.url"
+                )
+            )
+        elif _is_url(action.page_context):
+            checks.append(
+                StepAssertion(
+                    kind=AssertionKind.URL,
+                    expected=action.page_context,
+                    required=False,
+                    source="action.page_context",
+                )
+            )
+    for kind in (AssertionKind.NO_CONSOLE_ERRORS, AssertionKind.NETWORK_OK):
+        if not any(c.kind == kind for c in checks):
+            checks.append(StepAssertion(kind=kind, required=False, source="default"))
+
+    unique: "OrderedDict[Tuple[AssertionKind, str], StepAssertion]" = OrderedDict()
+    for check in checks:
+        key = (check.kind, _norm(check.expected))
+        # A required duplicate wins over a hint
+        if key not in unique or (check.required and not unique[key].required):
+            unique[key] = check
+    return list(unique.values())
+
+
+def _url_matches(current: str, expected: str) -> bool:
+    if expected.startswith("/"):
+        path = urlparse(current).path.rstrip("/") or "/"
+        wanted = expected.split("?")[0].rstrip("/") or "/"
+        return path == wanted or path.startswith(wanted + "/")
+    wanted = expected.split("#")[0].rstrip("/")
+    current = current.split("#")[0]
+    if "?" not in wanted:
+        current = current.split("?")[0]
+    current = current.rstrip("/")
+    return current == wanted or current.startswith(wanted + "/")
+
+
+def evaluate(assertion: StepAssertion, evidence: PageEvidence) -> AssertionResult:
+    """Evaluate one check against observed page state.
+
+    Expected text only counts as present when the step made it appear: if
+    the snapshot from before the step already showed it as often, the check
+    is inconclusive.
+    """
+
+    def result(verdict: Verdict, detail: str) -> AssertionResult:
+        # A hint that does not hold cannot fail a step on its own
+        if verdict == Verdict.FAILED and not assertion.required:
+            verdict = Verdict.INCONCLUSIVE
+        return AssertionResult(assertion=assertion, verdict=verdict, detail=detail)
+
+    def unobserved(detail: str) -> AssertionResult:
+        return AssertionResult(
+            assertion=assertion,
+            verdict=Verdict.INCONCLUSIVE,
+            observed=False,
+            detail=detail,
+        )
+
+    kind = assertion.kind
+    if kind == AssertionKind.URL:
+        if evidence.url is None:
+            return unobserved("URL not observed")
+        ok = _url_matches(evidence.url, assertion.expected)
+        return result(Verdict.PASSED if ok else Verdict.FAILED, f"at {evidence.url}")
+    if kind in (AssertionKind.TEXT_PRESENT, AssertionKind.TEXT_ABSENT):
+        if evidence.text is None:
+            return unobserved("no current snapshot")
+        expected = _norm(assertion.expected)
+        count = _norm(evidence.text).count(expected)
+        if (
+            kind == AssertionKind.TEXT_PRESENT
+            and count
+            and evidence.before_text is not None
+            and count <= _norm(evidence.before_text).count(expected)
+        ):
+            return result(
+                Verdict.INCONCLUSIVE,
+                f"'{assertion.expected}' was already on the page before the step",
+            )
+        ok = bool(count) == (kind == AssertionKind.TEXT_PRESENT)
+        detail = f"'{assertion.expected}' {'found' if count else 'not found'}"
+        return result(Verdict.PASSED if ok else Verdict.FAILED, detail)
+    observed = (
+        evidence.console_errors
+        if kind == AssertionKind.NO_CONSOLE_ERRORS
+        else evidence.failed_requests
+    )
+    if observed is None:
+        return unobserved("not observed")
+    if observed:
+        return result(Verdict.FAILED, "; ".join(observed[:3]))
+    return result(Verdict.PASSED, "none")
+
+
+def decide(results: List[AssertionResult]) -> Verdict:
+    """Step outcome from its check results.
+
+    Any failed required check fails the step. It passes when at least one
+    URL or text check passed and no other check is in doubt; unobserved hints
+    are ignored.
+    """
+    if any(r.verdict == Verdict.FAILED for r in results):
+        return Verdict.FAILED
+    for r in results:
+        if r.verdict == Verdict.INCONCLUSIVE and (r.assertion.required or r.observed):
+            return Verdict.INCONCLUSIVE
+    if any(
+        r.verdict == Verdict.PASSED and r.assertion.kind in CONTENT_KINDS
+        for r in results
+    ):
+        return Verdict.PASSED
+    return Verdict.INCONCLUSIVE
+
+
+class _Judgement(BaseModel):
+    passed: bool = Field(..., description="The step was completed")
+    reason: str = Field(..., description="One sentence of evidence")
+
+
+def genai_judge(model: str = VERIFY_MODEL, client: Any = None) -> Judge:
+    """Judge calling a Gemini model on the step and the page snapshot text.
+
+    The client is created on first use from the usual environment variables
+    unless one is passed in.
+    """
+
+    async def judge(prompt: str) -> Tuple[bool, str]:
+        nonlocal client
+        if client is None:
+            from google import genai
+
+            client = genai.Client()
+        response = await client.aio.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=_Judgement,
+                temperature=0.0,
+            ),
+        )
+        judgement = _Judgement.model_validate_json(response.text or "")
+        return judgement.passed, judgement.reason
+
+    return judge
+
+
+class _PageState:
+    """Page state of one invocation, from tool responses."""
+
+    def __init__(self) -> None:
+        self.url: Optional[str] = None
+        self.text: Optional[str] = None
+        self.console: Optional[List[str]] = None
+        self.requests: Optional[List[str]] = None
+        # Snapshot from before the first page change since the last verification
+        self.before: Optional[str] = None
+        self.changed = False
+        # Lines already accounted for by an earlier verification
+        self.seen_console: set = set()
+        self.seen_requests: set = set()
+
+    def evidence(self) -> PageEvidence:
+        errors = failed = None
+        if self.console is not None:
+            errors = [
+                line
+                for line in self.console
+                if _CONSOLE_ERROR.match(line) and line not in self.seen_console
+            ]
+        if self.requests is not None:
+            failed = []
+            for line in self.requests:
+                status = _STATUS.search(line)
+                if (
+                    status
+                    and int(status.group(1)) >= 400
+                    and line not in self.seen_requests
+                ):
+                    failed.append(line)
+        return PageEvidence(
+            url=self.url,
+            text=self.text,
+            before_text=self.before,
+            console_errors=errors,
+            failed_requests=failed,
+        )
+
+    def settle(self) -> None:
+        """Treat current console errors and failed requests as checked."""
+        self.seen_console.update(self.console or [])
+        self.seen_requests.update(self.requests or [])
+        self.changed = False
+
+
+class StepVerifier:
+    """Verify SOP steps with local checks, escalating only when in doubt.
+
+    ``attach`` adds the ``verify_step`` tool and an after_tool_callback that
+    tracks each invocation's page URL, snapshot, console messages and network
+    requests; any tool that may change the page makes them stale. With a
+    ``toolset``, stale state is refreshed by calling the snapshot, console
+    and network tools directly instead of asking the agent to. Inconclusive
+    steps go to ``judge`` when one is set and a snapshot is available;
+    otherwise the agent is told what to check on a screenshot.
+    """
+
+    def __init__(
+        self,
+        toolset: Optional[MCPToolset] = None,
+        judge: Optional[Judge] = None,
+        sop_key: str = "sop_markdown",
+        transcription_key: str = "playwright_transcription",
+    ):
+        self.toolset = toolset
+        self.judge = judge
+        self.sop_key = sop_key
+        self.transcription_key = transcription_key
+        self.stats = VerificationStats()
+        self.outputs = OutputCache()
+        self.last: Optional[StepVerification] = None
+        self._pages: "OrderedDict[str, _PageState]" = OrderedDict()
+        self._plans: "OrderedDict[str, List[StepAssertion]]" = OrderedDict()
+        self._probes: Optional[Dict[str, BaseTool]] = None
+
+    @property
+    def tool(self) -> FunctionTool:
+        """The ``verify_step`` function tool."""
+
+        # No parameter defaults: Gemini function declarations do not support them
+        async def verify_step(
+            step: str, action: int, tool_context: ToolContext
+        ) -> Dict[str, Any]:
+            """Check that an SOP step was completed, after performing it.
+
+            Args:
+              step: sop_markdown step number, such as "2.3".
+              action: playwright_transcription step number recorded for this
+                SOP step, or 0 if there is none.
+
+            Returns:
+              The verdict with the checks that decided it. When inconclusive,
+              what to look for on a screenshot.
+            """
+            return await self.verify(tool_context, step, action)
+
+        return FunctionTool(verify_step)
+
+    def attach(self, agent: LlmAgent) -> LlmAgent:
+        """Add the verification tool and page tracking to an agent."""
+        agent.tools = list(agent.tools) + [self.tool]
+        return chain_callback(agent, "after_tool_callback", self.after_tool_callback)
+
+    def plan(
+        self, sop: SOPMarkdown, step: SOPStep, action: Optional[ActionStep] = None
+    ) -> List[StepAssertion]:
+        """Compiled checks of a step, cached by the content of step and action.
+
+        Keyed on a hash rather than SOP id and step number, so an edited SOP
+        or a new recording never reuses checks compiled from the old one.
+        """
+        digest = hashlib.sha256(step.model_dump_json().encode("utf-8"))
+        if action is not None:
+            digest.update(b"\0" + action.model_dump_json().encode("utf-8"))
+        key = digest.hexdigest()
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan
+        plan = self._plans[key] = compile_step(step, action)
+        while len(self._plans) > _PLAN_CACHE_SIZE:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _page(self, invocation_id: str) -> _PageState:
+        page = self._pages.get(invocation_id)
+        if page is None:
+            page = self._pages[invocation_id] = _PageState()
+        self._pages.move_to_end(invocation_id)
+        while len(self._pages) > _PAGE_CACHE_SIZE:
+            self._pages.popitem(last=False)
+        return page
+
+    def observe(self, invocation_id: str, tool_name: str, response: Any) -> None:
+        """Update an invocation's page state from one tool response."""
+        page = self._page(invocation_id)
+        text, _ = _response_text(response)
+        if tool_name not in READ_ONLY_TOOLS:
+            if not page.changed:
+                # The next step starts here; keep the page it started from
+                page.before, page.changed = page.text, True
+            page.url = page.text = page.console = page.requests = None
+        url = _PAGE_URL.search(text)
+        if url:
+            page.url = url.group(1)
+        if "[ref=" in text:
+            page.text = text
+        if tool_name == "browser_console_messages":
+            page.console = text.splitlines()
+        elif tool_name == "browser_network_requests":
+            page.requests = text.splitlines()
+
+    def after_tool_callback(
+        self,
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext,
+        tool_response: Any,
+    ) -> None:
+        if tool.name != "verify_step":
+            self.observe(tool_context.invocation_id, tool.name, tool_response)
+        return None
+
+    async def _refresh(
+        self, tool_context: ToolContext, page: _PageState, plan: List[StepAssertion]
+    ) -> None:
+        """Fetch stale page state the plan needs straight from the browser."""
+        if self.toolset is None:
+            return
+        if self._probes is None:
+            tools = await self.toolset.get_tools()
+            self._probes = {t.name: t for t in tools}
+        kinds = {c.kind for c in plan}
+        wanted = []
+        if (page.url is None or page.text is None) and kinds & CONTENT_KINDS:
+            wanted.append("browser_snapshot")
+        if page.console is None and AssertionKind.NO_CONSOLE_ERRORS in kinds:
+            wanted.append("browser_console_messages")
+        if page.requests is None and AssertionKind.NETWORK_OK in kinds:
+            wanted.append("browser_network_requests")
+        for name in wanted:
+            probe = self._probes.get(name)
+            if probe is None:
+                continue
+            try:
+                response = await probe.run_async(args={}, tool_context=tool_context)
+            except BROWSER_ERRORS as e:
+                # The checks needing this state stay unobserved
+                self.stats.probe_failures += 1
+                self.stats.last_error = f"{name}: {e}"
+                continue
+            self.observe(tool_context.invocation_id, name, response)
+
+    async def verify(
+        self, tool_context: ToolContext, step_num: str, action_num: int = 0
+    ) -> Dict[str, Any]:
+        """Verify one SOP step against the current page of an invocation."""
+        started = time.perf_counter()
+        sop = await load_state_model(
+            tool_context, self.sop_key, SOPMarkdown, self.outputs
+        )
+        step = None
+        if sop is not None:
+            step = next(
+                (s for s in sop.get_all_steps() if s.step_num == step_num.strip()), None
+            )
+        if step is None:
+            return {
+                "verdict": Verdict.INCONCLUSIVE.value,
+                "reason": f"Step {step_num} not found in {self.sop_key}",
+            }
+        action = None
+        if action_num:
+            transcription = await load_state_model(
+                tool_context,
+                self.transcription_key,
+                PlaywrightTranscription,
+                self.outputs,
+            )
+            action = transcription.get_action(action_num) if transcription else None
+
+        plan = self.plan(sop, step, action)
+        page = self._page(tool_context.invocation_id)
+        await self._refresh(tool_context, page, plan)
+        evidence = page.evidence()
+        results = [evaluate(check, evidence) for check in plan]
+        verification = StepVerification(
+            step_num=step.step_num, verdict=decide(results), results=results
+        )
+        if (
+            verification.verdict == Verdict.INCONCLUSIVE
+            and self.judge
+            and evidence.text
+        ):
+            verification.escalated = True
+            try:
+                passed, verification.reason = await self.judge(
+                    self._prompt(step, results, evidence)
+                )
+                verification.verdict = Verdict.PASSED if passed else Verdict.FAILED
+            except JUDGE_ERRORS as e:
+                verification.reason = f"Judge failed: {e}"
+        page.settle()
+        verification.seconds = time.perf_counter() - started
+        self.stats.record(verification)
+        self.last = verification
+        return self._reply(step, verification)
+
+    def _prompt(
+        self, step: SOPStep, results: List[AssertionResult], evidence: PageEvidence
+    ) -> str:
+        expected = [step.verification_method or ""] + step.quality_checks + step.outputs
+        return JUDGE_INSTRUCTION.format(
+            step_num=step.step_num,
+            title=step.title,
+            description=step.description,
+            expected="\n".join(f"- {e}" for e in expected if e) or "- (not stated)",
+            checks="\n".join(_describe(r) for r in results),
+            url=evidence.url or "unknown",
+            errors="; ".join(evidence.console_errors or []) or "none seen",
+            requests="; ".join(evidence.failed_requests or []) or "none seen",
+            text=(evidence.text or "")[:_JUDGE_TEXT_CHARS],
+        )
+
+    def _reply(self, step: SOPStep, verification: StepVerification) -> Dict[str, Any]:
+        """Compact tool response for the agent."""
+        reply: Dict[str, Any] = {"verdict": verification.verdict.value}
+        decided = [
+            _describe(r)
+            for r in verification.results
+            if r.observed or r.assertion.required
+        ]
+        if verification.verdict == Verdict.FAILED:
+            reply["failed"] = [
+                _describe(r)
+                for r in verification.results
+                if r.verdict == Verdict.FAILED
+            ] or decided
+        else:
+            reply["checks"] = decided
+        if verification.reason:
+            reply["reason"] = verification.reason
+        if verification.verdict == Verdict.INCONCLUSIVE:
+            expected = [step.verification_method or ""] + step.quality_checks
+            reply["next"] = "Take a screenshot and confirm: " + (
+                "; ".join(e for e in expected if e) or step.title
+            )
+        return reply
+
+
+def _describe(result: AssertionResult) -> str:
+    check = result.assertion
+    target = f" {check.expected}" if check.expected else ""
+    return f"{result.verdict.value}: {check.kind.value}{target} ({result.detail})"
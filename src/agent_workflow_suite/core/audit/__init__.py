@@ -0,0 +1,10 @@
+from .models import AuditRecord, AuditStats, BlobRef, RecordKind
+from .store import AuditStore
+
+__all__ = [
+    "AuditStore",
+    "AuditRecord",
+    "AuditStats",
+    "BlobRef",
+    "RecordKind",
+]
@@ -0,0 +1,56 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RecordKind(str, Enum):
+    """Kinds of audit records captured per work item step."""
+
+    SCREENSHOT = "screenshot"
+    CONSOLE = "console"
+    NETWORK = "network"
+    ACTION = "action"
+    VALIDATION = "validation"
+    NOTE = "note"
+
+
+class BlobRef(BaseModel):
+    """Reference to a content-addressed blob in the audit store."""
+
+    sha256: str = Field(..., description="Hex SHA-256 of the blob content")
+    size: int = Field(..., description="Blob size in bytes")
+    mime_type: Optional[str] = Field(None, description="Blob MIME type")
+    deduplicated: bool = Field(default=False, description="Blob already existed")
+
+
+class AuditRecord(BaseModel):
+    """A single audit trail record for one work item step."""
+
+    item_id: str = Field(..., description="Work item identifier")
+    step: int = Field(..., description="Execution step number")
+    kind: RecordKind = Field(..., description="Record kind")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Record body")
+    blob: Optional[BlobRef] = Field(None, description="Attached blob, if any")
+    recorded_at: datetime = Field(default_factory=datetime.now)
+
+
+class AuditStats(BaseModel):
+    """Storage counters for the audit store."""
+
+    records: int = Field(default=0, description="Records appended")
+    blocks_written: int = Field(default=0, description="Compressed blocks flushed")
+    blocks_read: int = Field(default=0, description="Blocks read and decompressed")
+    blobs_stored: int = Field(default=0, description="Unique blobs written")
+    blobs_deduplicated: int = Field(default=0, description="Blob writes skipped")
+    record_bytes_raw: int = Field(default=0, description="Uncompressed record bytes")
+    record_bytes_stored: int = Field(default=0, description="Compressed record bytes")
+    blob_bytes_stored: int = Field(default=0, description="Blob bytes written")
+    blob_bytes_saved: int = Field(default=0, description="Blob bytes avoided by dedup")
+
+    def compression_ratio(self) -> float:
+        """Raw to stored ratio for packed records."""
+        if not self.record_bytes_stored:
+            return 0.0
+        return self.record_bytes_raw / self.record_bytes_stored
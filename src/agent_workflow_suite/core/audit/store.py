@@ -0,0 +1,321 @@
+import hashlib
+import mimetypes
+import os
+import sqlite3
+import struct
+import tempfile
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .models import AuditRecord, AuditStats, BlobRef, RecordKind
+
+# Default audit location, next to the Playwright MCP output directory
+AUDIT_ROOT = ".data/audit"
+
+_BLOCK_HEADER = struct.Struct(">I")
+_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    item_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    block_offset INTEGER NOT NULL,
+    block_length INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    blob_sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS records_item_step ON records (item_id, step);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mime_type TEXT,
+    refs INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+
+class AuditStore:
+    """Content-addressed, append-only audit trail store.
+
+    Blobs (screenshots, PDFs, large logs) are stored once per SHA-256 under
+    ``blobs/``. Small records are buffered, packed into zlib-compressed blocks
+    and appended to rolling segment files, with a SQLite index keyed by
+    ``(item_id, step)`` pointing at each record's block. Reads keep the
+    ``block_cache_size`` most recently decompressed blocks, so an item whose
+    records interleave across blocks decompresses each block once.
+    """
+
+    def __init__(
+        self,
+        root: str = AUDIT_ROOT,
+        block_size: int = 64 * 1024,
+        segment_size: int = 64 * 1024 * 1024,
+        compression_level: int = 6,
+        block_cache_size: int = 16,
+    ):
+        self.root = root
+        self.block_size = block_size
+        self.segment_size = segment_size
+        self.compression_level = compression_level
+        self.block_cache_size = block_cache_size
+        self.stats = AuditStats()
+
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "segments"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"))
+        self._db.executescript(_SCHEMA)
+
+        self._segment = self._last_segment()
+        self._pending: List[Tuple[AuditRecord, bytes]] = []
+        self._pending_bytes = 0
+        self._block_cache: "OrderedDict[Tuple[int, int], List[bytes]]" = OrderedDict()
+
+    def __enter__(self) -> "AuditStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # Blobs
+
+    def put_blob(self, data: bytes, mime_type: Optional[str] = None) -> BlobRef:
+        """Store bytes once by content hash."""
+        sha = hashlib.sha256(data).hexdigest()
+        ref = self._register_blob(sha, len(data), mime_type)
+        if not ref.deduplicated:
+            self._write_blob(sha, [data])
+        return ref
+
+    def put_file(self, path: str, mime_type: Optional[str] = None) -> BlobRef:
+        """Store a file once by content hash, streaming it in chunks."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        mime_type = mime_type or mimetypes.guess_type(path)[0]
+        ref = self._register_blob(digest.hexdigest(), size, mime_type)
+        if not ref.deduplicated:
+            with open(path, "rb") as f:
+                self._write_blob(ref.sha256, iter(lambda: f.read(_CHUNK_SIZE), b""))
+        return ref
+
+    def open_blob(self, sha256: str) -> BinaryIO:
+        """Open a stored blob for streaming reads."""
+        return open(self._blob_path(sha256), "rb")
+
+    def get_blob(self, sha256: str) -> bytes:
+        """Read a stored blob fully."""
+        with self.open_blob(sha256) as f:
+            return f.read()
+
+    # Records
+
+    def append(
+        self,
+        item_id: str,
+        step: int,
+        kind: Union[RecordKind, str],
+        payload: Optional[Dict[str, object]] = None,
+        blob: Optional[BlobRef] = None,
+    ) -> AuditRecord:
+        """Buffer a record; it is packed into the next compressed block."""
+        record = AuditRecord(
+            item_id=item_id,
+            step=step,
+            kind=RecordKind(kind),
+            payload=payload or {},
+            blob=blob,
+        )
+        line = record.model_dump_json().encode("utf-8")
+        self._pending.append((record, line))
+        self._pending_bytes += len(line) + 1
+        self.stats.records += 1
+        if self._pending_bytes >= self.block_size:
+            self.flush()
+        return record
+
+    def record_screenshot(
+        self, item_id: str, step: int, path: str, label: Optional[str] = None
+    ) -> AuditRecord:
+        """Store a screenshot file and append a record pointing at it."""
+        ref = self.put_file(path)
+        payload = {"label": label or os.path.basename(path)}
+        return self.append(item_id, step, RecordKind.SCREENSHOT, payload, ref)
+
+    def ingest_output_dir(
+        self, item_id: str, step: int, output_dir: str, remove: bool = True
+    ) -> List[AuditRecord]:
+        """Move files written by Playwright MCP into the store for an item step."""
+        records = []
+        for name in sorted(os.listdir(output_dir)):
+            path = os.path.join(output_dir, name)
+            if not os.path.isfile(path):
+                continue
+            ref = self.put_file(path)
+            kind = (
+                RecordKind.SCREENSHOT
+                if (ref.mime_type or "").startswith("image/")
+                else RecordKind.NOTE
+            )
+            records.append(self.append(item_id, step, kind, {"file": name}, ref))
+            if remove:
+                os.remove(path)
+        return records
+
+    def read(
+        self,
+        item_id: str,
+        step_start: Optional[int] = None,
+        step_end: Optional[int] = None,
+        kinds: Optional[Iterable[Union[RecordKind, str]]] = None,
+    ) -> Iterator[AuditRecord]:
+        """Yield an item's records for an inclusive step range, in step order."""
+        self.flush()
+        query = "SELECT segment, block_offset, block_length, position FROM records"
+        query += " WHERE item_id = ?"
+        params: List[object] = [item_id]
+        if step_start is not None:
+            query += " AND step >= ?"
+            params.append(step_start)
+        if step_end is not None:
+            query += " AND step <= ?"
+            params.append(step_end)
+        if kinds is not None:
+            kind_values = [RecordKind(k).value for k in kinds]
+            query += f" AND kind IN ({','.join('?' * len(kind_values))})"
+            params.extend(kind_values)
+        query += " ORDER BY step, rowid"
+        for segment, offset, length, position in self._db.execute(query, params):
+            lines = self._read_block(segment, offset, length)
+            yield AuditRecord.model_validate_json(lines[position])
+
+    def item_ids(self) -> List[str]:
+        """All work item identifiers with audit records."""
+        self.flush()
+        rows = self._db.execute("SELECT DISTINCT item_id FROM records ORDER BY item_id")
+        return [row[0] for row in rows]
+
+    def flush(self) -> None:
+        """Compress pending records into one block and index it."""
+        if not self._pending:
+            return
+        raw = b"\n".join(line for _, line in self._pending)
+        block = zlib.compress(raw, self.compression_level)
+        offset = self._append_block(_BLOCK_HEADER.pack(len(block)) + block)
+        length = _BLOCK_HEADER.size + len(block)
+        rows = [
+            (
+                record.item_id,
+                record.step,
+                record.kind.value,
+                self._segment,
+                offset,
+                length,
+                position,
+                record.blob.sha256 if record.blob else None,
+            )
+            for position, (record, _) in enumerate(self._pending)
+        ]
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        self.stats.blocks_written += 1
+        self.stats.record_bytes_raw += len(raw)
+        self.stats.record_bytes_stored += length
+        self._pending = []
+        self._pending_bytes = 0
+
+    def close(self) -> None:
+        """Flush pending records and close the index."""
+        self.flush()
+        self._block_cache.clear()
+        self._db.close()
+
+    # Internals
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "blobs", sha256[:2], sha256[2:])
+
+    def _register_blob(
+        self, sha256: str, size: int, mime_type: Optional[str]
+    ) -> BlobRef:
+        """Record a blob reference, reporting whether content already exists."""
+        with self._db:
+            cursor = self._db.execute(
+                "UPDATE blobs SET refs = refs + 1 WHERE sha256 = ?", (sha256,)
+            )
+            exists = cursor.rowcount > 0 and os.path.exists(self._blob_path(sha256))
+            if cursor.rowcount == 0:
+                self._db.execute(
+                    "INSERT INTO blobs (sha256, size, mime_type) VALUES (?, ?, ?)",
+                    (sha256, size, mime_type),
+                )
+        if exists:
+            self.stats.blobs_deduplicated += 1
+            self.stats.blob_bytes_saved += size
+        else:
+            self.stats.blobs_stored += 1
+            self.stats.blob_bytes_stored += size
+        return BlobRef(
+            sha256=sha256, size=size, mime_type=mime_type, deduplicated=exists
+        )
+
+    def _write_blob(self, sha256: str, chunks: Iterable[bytes]) -> None:
+        """Atomically write blob content to its content-addressed path."""
+        path = self._blob_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, "segments", f"seg-{segment:06d}.zblk")
+
+    def _last_segment(self) -> int:
+        row = self._db.execute("SELECT MAX(segment) FROM records").fetchone()
+        return row[0] if row and row[0] is not None else 0
+
+    def _append_block(self, data: bytes) -> int:
+        """Append a block to the current segment, rolling over when it is full.
+
+        Returns the block's offset in the segment.
+        """
+        path = self._segment_path(self._segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_size:
+            self._segment += 1
+            path = self._segment_path(self._segment)
+        with open(path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+        return offset
+
+    def _read_block(self, segment: int, offset: int, length: int) -> List[bytes]:
+        """Read and decompress one block, keeping recent blocks decompressed."""
+        key = (segment, offset)
+        lines = self._block_cache.get(key)
+        if lines is not None:
+            self._block_cache.move_to_end(key)
+            return lines
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        (size,) = _BLOCK_HEADER.unpack_from(data)
+        raw = zlib.decompress(data[_BLOCK_HEADER.size : _BLOCK_HEADER.size + size])
+        lines = raw.split(b"\n")
+        self.stats.blocks_read += 1
+        self._block_cache[key] = lines
+        while len(self._block_cache) > self.block_cache_size:
+            self._block_cache.popitem(last=False)
+        return lines
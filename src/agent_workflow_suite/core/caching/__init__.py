@@ -0,0 +1,20 @@
+from .models import CacheEntry, CacheStats
+from .context_cache import (
+    MIN_CACHE_TOKENS,
+    CacheBackend,
+    ContextCacheManager,
+    GenaiCacheBackend,
+    LocalCacheBackend,
+    prefix_key,
+)
+
+__all__ = [
+    "CacheBackend",
+    "CacheEntry",
+    "CacheStats",
+    "ContextCacheManager",
+    "GenaiCacheBackend",
+    "LocalCacheBackend",
+    "MIN_CACHE_TOKENS",
+    "prefix_key",
+]
@@ -0,0 +1,408 @@
+"""Context caching for the static prefix of worker model requests.
+
+Every request of a workflow repeats the same system instruction (the agent
+prompt plus the SOP and transcriptions appended by ``rehydrate_outputs``) and
+the same tool declarations. ``ContextCacheManager`` moves that prefix into a
+cache once per workflow and sends only the cache name with each request, so
+all items of a queue share one cached prefix. A request whose cache expired
+or was deleted on the server is resent once with its full prefix.
+"""
+
+import abc
+import asyncio
+import hashlib
+import itertools
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple, Type
+
+import google.genai.types as types
+import httpx
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import errors
+
+from agent_workflow_suite.core.state import chain_callback
+
+from .models import CacheEntry, CacheStats
+
+# Smallest prefix Gemini 2.5 Pro accepts for explicit caching
+MIN_CACHE_TOKENS = 4096
+
+# Rough prefix size estimate used before the backend reports a token count
+CHARS_PER_TOKEN = 4
+
+# Failures of the cache service; the request is sent uncached, while anything
+# else is a bug and propagates
+CACHE_ERRORS: Tuple[Type[Exception], ...] = (
+    errors.APIError,
+    httpx.HTTPError,
+    LookupError,
+    OSError,
+)
+
+# What a model raises for a request naming a missing or expired cache
+STALE_CACHE_ERRORS: Tuple[Type[Exception], ...] = (errors.ClientError, LookupError)
+
+
+def prefix_key(
+    model: str, system_instruction: str, tools: Optional[List[types.Tool]]
+) -> str:
+    """Stable hash of everything a cache holds for a request."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(system_instruction.encode("utf-8"))
+    for tool in tools or []:
+        digest.update(b"\0")
+        digest.update(tool.model_dump_json(exclude_none=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CacheBackend(abc.ABC):
+    """Where cached prefixes live. Subclasses create, extend and delete them."""
+
+    def supports(self, model: str) -> bool:
+        """Whether requests to ``model`` can use this backend's caches."""
+        return True
+
+    @abc.abstractmethod
+    async def create(
+        self,
+        key: str,
+        model: str,
+        system_instruction: str,
+        tools: Optional[List[types.Tool]],
+        ttl: float,
+    ) -> CacheEntry:
+        """Cache a request prefix for ``ttl`` seconds."""
+
+    @abc.abstractmethod
+    async def extend(self, entry: CacheEntry, ttl: float) -> float:
+        """Push a cache's expiry ``ttl`` seconds out; returns the new expiry."""
+
+    @abc.abstractmethod
+    async def delete(self, entry: CacheEntry) -> None:
+        """Remove a cache."""
+
+
+class GenaiCacheBackend(CacheBackend):
+    """Explicit Gemini context caches through the ``google.genai`` client.
+
+    The client is created on first use from the usual environment variables
+    (API key or Vertex AI project) unless one is passed in.
+    """
+
+    def __init__(self, client: Any = None, display_name: str = "workflow-prefix"):
+        self._client = client
+        self.display_name = display_name
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client()
+        return self._client
+
+    def supports(self, model: str) -> bool:
+        return model.rsplit("/", 1)[-1].startswith("gemini")
+
+    async def create(
+        self,
+        key: str,
+        model: str,
+        system_instruction: str,
+        tools: Optional[List[types.Tool]],
+        ttl: float,
+    ) -> CacheEntry:
+        cached = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=f"{self.display_name}-{key[:12]}",
+                system_instruction=system_instruction,
+                tools=tools or None,
+                ttl=f"{int(ttl)}s",
+            ),
+        )
+        usage = cached.usage_metadata
+        return CacheEntry(
+            key=key,
+            name=cached.name,
+            model=model,
+            token_count=(usage.total_token_count or 0) if usage else 0,
+            expires_at=(
+                cached.expire_time.timestamp()
+                if cached.expire_time
+                else time.time() + ttl
+            ),
+        )
+
+    async def extend(self, entry: CacheEntry, ttl: float) -> float:
+        cached = await self.client.aio.caches.update(
+            name=entry.name,
+            config=types.UpdateCachedContentConfig(ttl=f"{int(ttl)}s"),
+        )
+        if cached.expire_time:
+            return cached.expire_time.timestamp()
+        return time.time() + ttl
+
+    async def delete(self, entry: CacheEntry) -> None:
+        await self.client.aio.caches.delete(name=entry.name)
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process stand-in for tests and offline runs.
+
+    Behaves like the Gemini cache service, including expiry, and lets a fake
+    model resolve a cache name back to its instruction with ``lookup``.
+    """
+
+    def __init__(self, chars_per_token: int = CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.caches: Dict[str, Tuple[CacheEntry, str, List[types.Tool]]] = {}
+        self._names = itertools.count(1)
+
+    async def create(
+        self,
+        key: str,
+        model: str,
+        system_instruction: str,
+        tools: Optional[List[types.Tool]],
+        ttl: float,
+    ) -> CacheEntry:
+        entry = CacheEntry(
+            key=key,
+            name=f"cachedContents/local-{next(self._names)}",
+            model=model,
+            token_count=len(system_instruction) // self.chars_per_token,
+            expires_at=time.time() + ttl,
+        )
+        self.caches[entry.name] = (entry, system_instruction, list(tools or []))
+        return entry
+
+    async def extend(self, entry: CacheEntry, ttl: float) -> float:
+        cached = self.lookup(entry.name)
+        if cached is None:
+            raise LookupError(f"Cache {entry.name} not found")
+        cached[0].expires_at = time.time() + ttl
+        return cached[0].expires_at
+
+    async def delete(self, entry: CacheEntry) -> None:
+        self.caches.pop(entry.name, None)
+
+    def lookup(self, name: str) -> Optional[Tuple[CacheEntry, str, List[types.Tool]]]:
+        """Entry, instruction and tools of a live cache, or ``None``."""
+        cached = self.caches.get(name)
+        if cached is None or cached[0].expires_at <= time.time():
+            self.caches.pop(name, None)
+            return None
+        return cached
+
+
+class _CacheFallbackLlm(BaseLlm):
+    """Model wrapper that resends a request uncached when its cache is gone."""
+
+    inner: BaseLlm
+    manager: Any
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        answered = False
+        try:
+            try:
+                async for response in self.inner.generate_content_async(
+                    llm_request, stream
+                ):
+                    answered = True
+                    yield response
+                return
+            except STALE_CACHE_ERRORS as e:
+                # Only a request that got no answer yet can be sent again
+                if answered or not self.manager.uncache(llm_request, e):
+                    raise
+            async for response in self.inner.generate_content_async(
+                llm_request, stream
+            ):
+                yield response
+        finally:
+            self.manager.sent(llm_request)
+
+
+class ContextCacheManager:
+    """Serve the static request prefix of an agent from a context cache.
+
+    Attach it to an agent after the callbacks that build the instruction.
+    Each request's system instruction and tool declarations are hashed; the
+    first request with a new prefix creates a cache and later requests reuse
+    it, so one cache serves every item of a workflow. A cache is extended
+    when fewer than ``refresh_margin`` seconds of its ``ttl`` remain. If the
+    backend fails the request is sent uncached and the prefix is not retried
+    for ``retry_after`` seconds; prefixes under ``min_tokens`` are never
+    cached. ``attach`` also wraps the agent's model so a request whose cache
+    has expired or been deleted drops the entry and is resent uncached.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: float = 3600,
+        refresh_margin: float = 300,
+        min_tokens: int = MIN_CACHE_TOKENS,
+        retry_after: float = 300,
+    ):
+        self.backend = backend or GenaiCacheBackend()
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.retry_after = retry_after
+        self.stats = CacheStats()
+        self.entries: Dict[str, CacheEntry] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._pending: Dict[Tuple[str, str], Tuple[Optional[CacheEntry], int]] = {}
+        # Prefixes moved into a cache, by request, until the request is sent
+        self._stripped: Dict[
+            int, Tuple[Tuple[str, str], CacheEntry, types.GenerateContentConfig]
+        ] = {}
+
+    def attach(self, agent: LlmAgent) -> LlmAgent:
+        """Add caching callbacks after the agent's own callbacks."""
+        chain_callback(agent, "before_model_callback", self.before_model_callback)
+        chain_callback(agent, "after_model_callback", self.after_model_callback)
+        model = agent.canonical_model
+        if not isinstance(model, _CacheFallbackLlm):
+            agent.model = _CacheFallbackLlm(
+                model=model.model, inner=model, manager=self
+            )
+        return agent
+
+    def uncache(self, llm_request: LlmRequest, error: Exception) -> bool:
+        """Put back the prefix of a request whose cache is gone.
+
+        Drops the cache entry so the next request creates a new one. Returns
+        whether the request had used a cache.
+        """
+        stripped = self._stripped.pop(id(llm_request), None)
+        if stripped is None or llm_request.config is None:
+            return False
+        pending_key, entry, config = stripped
+        self.stats.last_error = f"use {entry.name}: {error}"
+        if self.entries.get(entry.key) is entry:
+            del self.entries[entry.key]
+        llm_request.config.cached_content = None
+        llm_request.config.system_instruction = config.system_instruction
+        llm_request.config.tools = config.tools
+        llm_request.config.tool_config = config.tool_config
+        self.stats.hits -= 1
+        self.stats.fallbacks += 1
+        _, tokens = self._pending.get(pending_key, (None, 0))
+        self._pending[pending_key] = (None, tokens)
+        return True
+
+    def sent(self, llm_request: LlmRequest) -> None:
+        """Forget the prefix of a request that has been answered."""
+        self._stripped.pop(id(llm_request), None)
+
+    async def close(self) -> None:
+        """Delete every cache this manager created."""
+        entries = list(self.entries.values())
+        self.entries.clear()
+        for entry in entries:
+            try:
+                await self.backend.delete(entry)
+            except CACHE_ERRORS as e:
+                self.stats.last_error = f"delete {entry.name}: {e}"
+
+    async def _entry_for(
+        self,
+        key: str,
+        model: str,
+        system_instruction: str,
+        tools: Optional[List[types.Tool]],
+    ) -> Optional[CacheEntry]:
+        """Live cache for a prefix, creating or extending it as needed."""
+        if self._retry_at.get(key, 0.0) > time.time():
+            return None
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            now = time.time()
+            entry = self.entries.get(key)
+            try:
+                if entry is not None and entry.expires_at - now < self.refresh_margin:
+                    if entry.expires_at > now:
+                        entry.expires_at = await self.backend.extend(entry, self.ttl)
+                        self.stats.refreshed += 1
+                    else:
+                        del self.entries[key]
+                        entry = None
+            except CACHE_ERRORS as e:
+                self.stats.last_error = f"extend {entry.name}: {e}"
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                try:
+                    entry = await self.backend.create(
+                        key, model, system_instruction, tools, self.ttl
+                    )
+                except CACHE_ERRORS as e:
+                    self.stats.last_error = f"create: {e}"
+                    self._retry_at[key] = now + self.retry_after
+                    return None
+                self.entries[key] = entry
+                self.stats.created += 1
+            return entry
+
+    # ADK callbacks; both return None so the request is still sent
+
+    async def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        config = llm_request.config
+        if config is None or config.cached_content:
+            return None
+        instruction = config.system_instruction
+        if not isinstance(instruction, str) or not instruction:
+            return None
+        self.stats.requests += 1
+        tokens = len(instruction) // CHARS_PER_TOKEN
+        pending_key = (callback_context.invocation_id, callback_context.agent_name)
+        model = llm_request.model or ""
+        if tokens < self.min_tokens or not self.backend.supports(model):
+            self.stats.skipped += 1
+            self._pending[pending_key] = (None, tokens)
+            return None
+        key = prefix_key(model, instruction, config.tools)
+        entry = await self._entry_for(key, model, instruction, config.tools)
+        if entry is None:
+            self.stats.fallbacks += 1
+            self._pending[pending_key] = (None, tokens)
+            return None
+        # Instructions and tools now come from the cache; sending them as
+        # well is rejected by the API
+        self._stripped[id(llm_request)] = (pending_key, entry, config.model_copy())
+        config.cached_content = entry.name
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+        entry.uses += 1
+        self.stats.hits += 1
+        self._pending[pending_key] = (entry, entry.token_count or tokens)
+        return None
+
+    def after_model_callback(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        pending_key = (callback_context.invocation_id, callback_context.agent_name)
+        if llm_response.partial:
+            return None
+        entry, prefix_tokens = self._pending.pop(pending_key, (None, 0))
+        usage = llm_response.usage_metadata
+        if usage is not None and usage.prompt_token_count is not None:
+            self.stats.prompt_tokens += usage.prompt_token_count
+            self.stats.cached_tokens += usage.cached_content_token_count or 0
+        else:
+            # No usage reported (local models); count the prefix estimate
+            self.stats.prompt_tokens += prefix_tokens
+            self.stats.cached_tokens += prefix_tokens if entry is not None else 0
+        return None
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class CacheEntry(BaseModel):
+    """A cached request prefix held by a cache backend."""
+
+    key: str = Field(..., description="Hash of model, instructions and tools")
+    name: str = Field(..., description="Backend cache name sent with requests")
+    model: str = Field(..., description="Model the cache was created for")
+    token_count: int = Field(default=0, description="Tokens held in the cache")
+    expires_at: float = Field(..., description="Expiry as a Unix timestamp")
+    uses: int = Field(default=0, description="Requests served from this cache")
+
+
+class CacheStats(BaseModel):
+    """Context cache usage and token savings."""
+
+    requests: int = Field(default=0, description="Model requests seen")
+    hits: int = Field(default=0, description="Requests sent with a cached prefix")
+    created: int = Field(default=0, description="Caches created")
+    refreshed: int = Field(default=0, description="Cache TTL extensions")
+    fallbacks: int = Field(
+        default=0, description="Requests sent uncached after a cache error"
+    )
+    skipped: int = Field(
+        default=0, description="Requests whose prefix is too small to cache"
+    )
+    prompt_tokens: int = Field(default=0, description="Prompt tokens reported")
+    cached_tokens: int = Field(
+        default=0, description="Prompt tokens served from a cache"
+    )
+    last_error: Optional[str] = Field(default=None, description="Latest cache error")
+
+    def hit_rate(self) -> float:
+        """Fraction of requests that used a cached prefix."""
+        return self.hits / self.requests if self.requests else 0.0
+
+    def cached_share(self) -> float:
+        """Fraction of prompt tokens served from a cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def billed_token_savings(self, discount: float = 0.75) -> float:
+        """Prompt tokens saved, given the price discount on cached tokens."""
+        return self.cached_tokens * discount
@@ -0,0 +1,110 @@
+from .models import (
+    WorkItem,
+    SessionKey,
+    SessionState,
+    BrowserSession,
+    SessionStats,
+    WaitConditionType,
+    WaitCondition,
+    WaitOutcome,
+    WaitReport,
+    QueueColumns,
+    CompletionStatus,
+    CompletionRecord,
+    BrokerItemStatus,
+    BrokerStats,
+    Lease,
+    PlanNodeKind,
+    PlanNode,
+    ExecutionPlan,
+    StepRunResult,
+    PlanRunReport,
+)
+from .broker import WorkBroker, run_worker
+from .plan import (
+    Branch,
+    ExecutionPlanner,
+    PlanScheduler,
+    SessionPool,
+    StepRunner,
+    TabPool,
+    compile_plan,
+    parse_mcp_command,
+    run_mcp_commands,
+)
+from .sessions import (
+    BROWSER_ERRORS,
+    SessionScheduler,
+    call_browser_tool,
+    call_toolset_tool,
+    order_by_affinity,
+)
+from .workqueue import (
+    CompletionWriter,
+    completed_ids,
+    merge_completion_reports,
+    read_completions,
+    read_work_queue,
+    shard_for,
+    shard_report_path,
+)
+from .waits import (
+    WaitResolver,
+    current_url,
+    derive_wait_conditions,
+    make_fixed_wait_callback,
+    session_caller,
+    toolset_caller,
+)
+
+__all__ = [
+    "WorkItem",
+    "SessionKey",
+    "SessionState",
+    "BrowserSession",
+    "SessionStats",
+    "WaitConditionType",
+    "WaitCondition",
+    "WaitOutcome",
+    "WaitReport",
+    "BROWSER_ERRORS",
+    "SessionScheduler",
+    "call_browser_tool",
+    "call_toolset_tool",
+    "order_by_affinity",
+    "WaitResolver",
+    "current_url",
+    "derive_wait_conditions",
+    "make_fixed_wait_callback",
+    "session_caller",
+    "toolset_caller",
+    "QueueColumns",
+    "CompletionStatus",
+    "CompletionRecord",
+    "CompletionWriter",
+    "completed_ids",
+    "merge_completion_reports",
+    "read_completions",
+    "read_work_queue",
+    "shard_for",
+    "shard_report_path",
+    "BrokerItemStatus",
+    "BrokerStats",
+    "Lease",
+    "WorkBroker",
+    "run_worker",
+    "PlanNodeKind",
+    "PlanNode",
+    "ExecutionPlan",
+    "StepRunResult",
+    "PlanRunReport",
+    "Branch",
+    "ExecutionPlanner",
+    "PlanScheduler",
+    "SessionPool",
+    "StepRunner",
+    "TabPool",
+    "compile_plan",
+    "parse_mcp_command",
+    "run_mcp_commands",
+]
@@ -0,0 +1,482 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional
+
+from .models import (
+    BrokerItemStatus,
+    BrokerStats,
+    CompletionRecord,
+    CompletionStatus,
+    Lease,
+    WorkItem,
+)
+from .sessions import BROWSER_ERRORS
+from .workqueue import CompletionWriter
+
+# Default broker database, shared by every worker process on the host
+BROKER_PATH = ".data/queue/broker.sqlite3"
+
+LeaseHandler = Callable[[Lease], Awaitable[CompletionRecord]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_claim ON items (status, lease_expires);
+CREATE TABLE IF NOT EXISTS completions (
+    item_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    record TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    completed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_time ON completions (completed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class WorkBroker:
+    """SQLite-backed work queue where workers claim items under leases.
+
+    Any number of processes can open the same database. A claim leases items
+    for ``lease_seconds``; workers extend the lease with ``heartbeat`` while
+    they work. Leases that expire are reclaimed by the next claim, up to
+    ``max_attempts`` per item. Completing requires the current lease token
+    and writes the single completion record for the item in the same
+    transaction, so each item is completed exactly once even when a slow
+    worker and a reclaiming worker race.
+
+    WAL mode needs shared memory between processes; for hosts sharing a
+    network filesystem pass ``wal=False``.
+    """
+
+    def __init__(
+        self,
+        path: str = BROKER_PATH,
+        lease_seconds: float = 120.0,
+        max_attempts: int = 3,
+        busy_timeout: float = 30.0,
+        wal: bool = True,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._db.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "WorkBroker":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._db, self._lock)
+
+    # Producers
+
+    def enqueue(self, items: Iterable[WorkItem], batch_size: int = 1000) -> int:
+        """Add items, ignoring ids already known to the broker; returns added count."""
+        added = 0
+        batch: List[tuple] = []
+
+        def flush() -> int:
+            with self._transaction() as db:
+                before = db.total_changes
+                db.executemany(
+                    "INSERT OR IGNORE INTO items (item_id, payload, status, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    batch,
+                )
+                return db.total_changes - before
+
+        now = time.time()
+        for item in items:
+            batch.append(
+                (
+                    item.item_id,
+                    item.model_dump_json(),
+                    BrokerItemStatus.PENDING.value,
+                    now,
+                )
+            )
+            if len(batch) >= batch_size:
+                added += flush()
+                batch = []
+        if batch:
+            added += flush()
+        return added
+
+    # Workers
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Lease]:
+        """Lease up to ``limit`` pending or expired items for a worker."""
+        now = time.time()
+        expires = now + self.lease_seconds
+        leases = []
+        with self._transaction() as db:
+            # Expired leases with no attempts left are failed first
+            expired = db.execute(
+                "SELECT item_id, lease_owner, last_error FROM items"
+                " WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (BrokerItemStatus.LEASED.value, now, self.max_attempts),
+            ).fetchall()
+            for item_id, owner, last_error in expired:
+                _fail_expired(db, item_id, owner, last_error, self.max_attempts, now)
+            rows = db.execute(
+                "SELECT item_id, payload, status, attempts FROM items"
+                " WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                " ORDER BY rowid LIMIT ?",
+                (
+                    BrokerItemStatus.PENDING.value,
+                    BrokerItemStatus.LEASED.value,
+                    now,
+                    limit,
+                ),
+            ).fetchall()
+            reclaimed = 0
+            for item_id, payload, status, attempts in rows:
+                token = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE items SET status = ?, attempts = ?, lease_token = ?,"
+                    " lease_owner = ?, lease_expires = ?, updated_at = ?"
+                    " WHERE item_id = ?",
+                    (
+                        BrokerItemStatus.LEASED.value,
+                        attempts + 1,
+                        token,
+                        worker_id,
+                        expires,
+                        now,
+                        item_id,
+                    ),
+                )
+                reclaimed += status == BrokerItemStatus.LEASED.value
+                leases.append(
+                    Lease(
+                        item=WorkItem.model_validate_json(payload),
+                        token=token,
+                        worker_id=worker_id,
+                        attempt=attempts + 1,
+                        expires_at=expires,
+                    )
+                )
+            if reclaimed:
+                _bump(db, "reclaimed", reclaimed)
+        return leases
+
+    def heartbeat(self, lease: Lease) -> bool:
+        """Extend a lease; ``False`` means it was lost and work should stop."""
+        expires = time.time() + self.lease_seconds
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE items SET lease_expires = ?, updated_at = ?"
+                " WHERE item_id = ? AND lease_token = ? AND status = ?",
+                (
+                    expires,
+                    time.time(),
+                    lease.item.item_id,
+                    lease.token,
+                    BrokerItemStatus.LEASED.value,
+                ),
+            )
+            ok = cursor.rowcount == 1
+        if ok:
+            lease.expires_at = expires
+        return ok
+
+    def complete(self, lease: Lease, record: CompletionRecord) -> bool:
+        """Record an item's final outcome if the lease is still held.
+
+        Returns ``False`` when another worker has taken the item over, in
+        which case nothing is written.
+        """
+        now = time.time()
+        status = (
+            BrokerItemStatus.FAILED
+            if record.status == CompletionStatus.FAILED
+            else BrokerItemStatus.DONE
+        )
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE items SET status = ?, lease_token = NULL, updated_at = ?"
+                " WHERE item_id = ? AND lease_token = ? AND status = ?",
+                (
+                    status.value,
+                    now,
+                    lease.item.item_id,
+                    lease.token,
+                    BrokerItemStatus.LEASED.value,
+                ),
+            )
+            if cursor.rowcount != 1:
+                return False
+            db.execute(
+                "INSERT INTO completions (item_id, status, record, worker, completed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    lease.item.item_id,
+                    record.status.value,
+                    record.model_dump_json(),
+                    lease.worker_id,
+                    now,
+                ),
+            )
+        return True
+
+    def release(self, lease: Lease, error: Optional[str] = None) -> bool:
+        """Give an item back after a retryable failure.
+
+        The item returns to pending, or is failed with a completion record once
+        it has used ``max_attempts``.
+        """
+        if lease.attempt >= self.max_attempts:
+            now = datetime.now()
+            return self.complete(
+                lease,
+                CompletionRecord(
+                    item_id=lease.item.item_id,
+                    status=CompletionStatus.FAILED,
+                    start_time=now,
+                    end_time=now,
+                    notes=error,
+                ),
+            )
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE items SET status = ?, lease_token = NULL, lease_expires = NULL,"
+                " last_error = ?, updated_at = ?"
+                " WHERE item_id = ? AND lease_token = ? AND status = ?",
+                (
+                    BrokerItemStatus.PENDING.value,
+                    error,
+                    time.time(),
+                    lease.item.item_id,
+                    lease.token,
+                    BrokerItemStatus.LEASED.value,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    # Reporting
+
+    def stats(self, window_seconds: float = 60.0) -> BrokerStats:
+        """Queue depth by status and completion throughput over a window."""
+        with self._lock:
+            counts = dict(
+                self._db.execute("SELECT status, COUNT(*) FROM items GROUP BY status")
+            )
+            (recent,) = self._db.execute(
+                "SELECT COUNT(*) FROM completions WHERE completed_at >= ?",
+                (time.time() - window_seconds,),
+            ).fetchone()
+            row = self._db.execute(
+                "SELECT value FROM counters WHERE name = 'reclaimed'"
+            ).fetchone()
+        return BrokerStats(
+            pending=counts.get(BrokerItemStatus.PENDING.value, 0),
+            leased=counts.get(BrokerItemStatus.LEASED.value, 0),
+            done=counts.get(BrokerItemStatus.DONE.value, 0),
+            failed=counts.get(BrokerItemStatus.FAILED.value, 0),
+            reclaimed=row[0] if row else 0,
+            completions_in_window=recent,
+            window_seconds=window_seconds,
+        )
+
+    def completions(self) -> Iterator[CompletionRecord]:
+        """Stream completion records in completion order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT record FROM completions ORDER BY completed_at, rowid"
+            ).fetchall()
+        for (record,) in rows:
+            yield CompletionRecord.model_validate_json(record)
+
+    def export_completions(self, writer: CompletionWriter) -> int:
+        """Write every completion record to a completion report."""
+        count = 0
+        for record in self.completions():
+            writer.write(record)
+            count += 1
+        writer.flush()
+        return count
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` transaction serialised with the broker's lock."""
+
+    def __init__(self, db: sqlite3.Connection, lock: threading.Lock):
+        self.db = db
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.lock.release()
+
+
+def _fail_expired(
+    db: sqlite3.Connection,
+    item_id: str,
+    owner: Optional[str],
+    last_error: Optional[str],
+    attempts: int,
+    now: float,
+) -> None:
+    """Fail an item whose last lease expired, writing its completion record."""
+    db.execute(
+        "UPDATE items SET status = ?, lease_token = NULL, updated_at = ?"
+        " WHERE item_id = ?",
+        (BrokerItemStatus.FAILED.value, now, item_id),
+    )
+    moment = datetime.fromtimestamp(now)
+    record = CompletionRecord(
+        item_id=item_id,
+        status=CompletionStatus.FAILED,
+        start_time=moment,
+        end_time=moment,
+        notes=last_error or f"Lease expired on all {attempts} attempts",
+    )
+    db.execute(
+        "INSERT OR IGNORE INTO completions"
+        " (item_id, status, record, worker, completed_at) VALUES (?, ?, ?, ?, ?)",
+        (item_id, record.status.value, record.model_dump_json(), owner or "", now),
+    )
+
+
+def _bump(db: sqlite3.Connection, name: str, amount: int) -> None:
+    db.execute(
+        "INSERT INTO counters (name, value) VALUES (?, ?)"
+        " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount),
+    )
+
+
+async def run_worker(
+    broker: WorkBroker,
+    handler: LeaseHandler,
+    worker_id: Optional[str] = None,
+    concurrency: int = 1,
+    poll_interval: float = 1.0,
+    stop_when_empty: bool = True,
+) -> int:
+    """Claim and process items until the queue is drained; returns completions.
+
+    Each in-flight item gets a heartbeat task renewing its lease at a third of
+    the lease period. A heartbeat that fails on a busy or locked database is
+    retried sooner while the lease lasts. If the lease is lost or runs out the
+    handler is cancelled, since another worker may now own the item. Browser
+    failures (``BROWSER_ERRORS``) release the item for retry; any other
+    handler exception also releases it and then stops the worker.
+    """
+    worker_id = worker_id or f"{os.uname().nodename}-{os.getpid()}"
+    completed = 0
+    in_flight: set = set()
+    crashed: List[BaseException] = []
+
+    async def heartbeat(lease: Lease, task: asyncio.Task) -> None:
+        period = broker.lease_seconds / 3
+        delay = period
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                held = await asyncio.to_thread(broker.heartbeat, lease)
+            except sqlite3.Error:
+                remaining = lease.expires_at - time.time()
+                held = remaining > 0
+                delay = min(period, max(0.05, remaining / 2))
+            else:
+                delay = period
+            if not held:
+                task.cancel()
+                return
+
+    async def process(lease: Lease) -> None:
+        nonlocal completed
+        work = asyncio.ensure_future(handler(lease))
+        beat = asyncio.ensure_future(heartbeat(lease, work))
+        try:
+            record = await work
+        except asyncio.CancelledError:
+            if beat.done():
+                return
+            raise
+        except BROWSER_ERRORS as e:
+            await asyncio.to_thread(broker.release, lease, f"{type(e).__name__}: {e}")
+            return
+        except BaseException as e:
+            await asyncio.to_thread(broker.release, lease, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            beat.cancel()
+        if await asyncio.to_thread(broker.complete, lease, record):
+            completed += 1
+
+    def finished(task: asyncio.Task) -> None:
+        in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            crashed.append(task.exception())
+
+    while True:
+        if crashed:
+            for task in list(in_flight):
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            raise crashed[0]
+        free = concurrency - len(in_flight)
+        leases = await asyncio.to_thread(broker.claim, worker_id, free) if free else []
+        for lease in leases:
+            task = asyncio.ensure_future(process(lease))
+            in_flight.add(task)
+            task.add_done_callback(finished)
+        if not leases:
+            if not in_flight:
+                stats = await asyncio.to_thread(broker.stats)
+                if stop_when_empty and stats.remaining() == 0:
+                    return completed
+                await asyncio.sleep(poll_interval)
+            else:
+                await asyncio.wait(
+                    in_flight,
+                    timeout=poll_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
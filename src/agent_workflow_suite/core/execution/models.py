@@ -0,0 +1,328 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class WorkItem(BaseModel):
+    """A single work queue entry to be executed against a workflow."""
+
+    item_id: str = Field(..., description="Unique work item identifier")
+    data: Dict[str, str] = Field(default_factory=dict, description="Work item columns")
+
+    # Session affinity
+    target_app: str = Field(default="default", description="Target application")
+    credential_id: Optional[str] = Field(
+        None, description="Credential set used to log in"
+    )
+
+
+class SessionKey(BaseModel):
+    """Affinity key grouping work items that can share a browser session."""
+
+    model_config = ConfigDict(frozen=True)
+
+    target_app: str = Field(..., description="Target application")
+    credential_id: Optional[str] = Field(None, description="Credential set identifier")
+
+    @classmethod
+    def for_item(cls, item: WorkItem) -> "SessionKey":
+        """Build the affinity key for a work item."""
+        return cls(target_app=item.target_app, credential_id=item.credential_id)
+
+    def slug(self) -> str:
+        """Filesystem-safe name for this key."""
+        raw = f"{self.target_app}-{self.credential_id or 'anonymous'}"
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in raw)
+
+
+class SessionState(str, Enum):
+    """Lifecycle states of a long-lived browser session."""
+
+    STARTING = "starting"
+    IDLE = "idle"
+    BUSY = "busy"
+    CLOSED = "closed"
+
+
+class BrowserSession(BaseModel):
+    """A long-lived, authenticated browser session with its own profile."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    session_id: str = Field(..., description="Unique session identifier")
+    key: SessionKey = Field(..., description="Affinity key served by this session")
+    slot: int = Field(..., description="Profile slot index within the key")
+    profile_dir: str = Field(..., description="Isolated browser user data directory")
+    output_dir: str = Field(..., description="Isolated Playwright output directory")
+
+    # Lifecycle
+    state: SessionState = Field(default=SessionState.STARTING)
+    authenticated: bool = Field(default=False, description="Login completed")
+    items_processed: int = Field(default=0, description="Work items served")
+    created_at: datetime = Field(default_factory=datetime.now)
+    last_used_at: datetime = Field(default_factory=datetime.now)
+
+    # Runtime handle (MCPToolset), never serialized
+    toolset: Optional[Any] = Field(None, exclude=True, description="Browser toolset")
+
+
+class SessionStats(BaseModel):
+    """Counters describing how well session affinity is working."""
+
+    sessions_created: int = Field(default=0, description="Browser sessions started")
+    sessions_reused: int = Field(
+        default=0, description="Items served by a warm session"
+    )
+    sessions_evicted: int = Field(
+        default=0, description="Sessions closed to free a slot"
+    )
+    sessions_recycled: int = Field(
+        default=0, description="Sessions closed after max items"
+    )
+    logins: int = Field(default=0, description="Login hook executions")
+    resets: int = Field(default=0, description="Page state resets between items")
+    failures: int = Field(default=0, description="Sessions discarded as unhealthy")
+
+    def reuse_rate(self) -> float:
+        """Fraction of leases served by an already-warm session (0-1)."""
+        total = self.sessions_created + self.sessions_reused
+        return self.sessions_reused / total if total else 0.0
+
+
+class WaitConditionType(str, Enum):
+    """Observable conditions that replace recorded fixed delays."""
+
+    NETWORK_IDLE = "network_idle"
+    TEXT_VISIBLE = "text_visible"
+    TEXT_GONE = "text_gone"
+    ELEMENT_VISIBLE = "element_visible"
+    URL_CHANGE = "url_change"
+    FIXED = "fixed"
+
+
+class WaitCondition(BaseModel):
+    """A wait to resolve by observing the page instead of sleeping."""
+
+    type: WaitConditionType = Field(..., description="Condition to wait for")
+    value: Optional[str] = Field(None, description="Text, selector or URL fragment")
+    timeout: float = Field(..., description="Maximum seconds to wait")
+    recorded_seconds: float = Field(default=0.0, description="Pause in the recording")
+    source_step: Optional[int] = Field(None, description="Originating action step")
+
+
+class WaitOutcome(BaseModel):
+    """Measured result of resolving one wait condition."""
+
+    condition: WaitCondition = Field(..., description="Resolved condition")
+    satisfied: bool = Field(..., description="Condition observed before timeout")
+    waited_seconds: float = Field(..., description="Actual time spent waiting")
+
+    def saved_seconds(self) -> float:
+        """Idle time avoided compared with the recorded delay."""
+        return max(0.0, self.condition.recorded_seconds - self.waited_seconds)
+
+
+class WaitReport(BaseModel):
+    """Wait savings for one work item."""
+
+    item_id: Optional[str] = Field(None, description="Work item identifier")
+    outcomes: List[WaitOutcome] = Field(default_factory=list)
+
+    def recorded_seconds(self) -> float:
+        """Total recorded delay for the item."""
+        return sum(o.condition.recorded_seconds for o in self.outcomes)
+
+    def waited_seconds(self) -> float:
+        """Total time actually spent waiting."""
+        return sum(o.waited_seconds for o in self.outcomes)
+
+    def saved_seconds(self) -> float:
+        """Total idle time saved for the item."""
+        return sum(o.saved_seconds() for o in self.outcomes)
+
+    def timeouts(self) -> int:
+        """Conditions that were not observed before their timeout."""
+        return sum(1 for o in self.outcomes if not o.satisfied)
+
+
+class QueueColumns(BaseModel):
+    """Column mapping from a work queue CSV onto ``WorkItem`` fields."""
+
+    item_id: str = Field(
+        default="Item_ID", description="Column holding the item identifier"
+    )
+    target_app: Optional[str] = Field(
+        None, description="Column holding the target application"
+    )
+    credential_id: Optional[str] = Field(
+        None, description="Column holding the credential set"
+    )
+
+
+class CompletionStatus(str, Enum):
+    """Final status of a work item in the completion report."""
+
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+    SKIPPED = "Skipped"
+
+
+class CompletionRecord(BaseModel):
+    """One row of the work completion CSV."""
+
+    item_id: str = Field(..., description="Work item identifier")
+    status: CompletionStatus = Field(..., description="Final item status")
+    start_time: datetime = Field(..., description="Processing start")
+    end_time: datetime = Field(..., description="Processing end")
+    screenshots: List[str] = Field(default_factory=list, description="Screenshot files")
+    validation_urls: List[str] = Field(
+        default_factory=list, description="URLs proving completion"
+    )
+    log_reference: Optional[str] = Field(None, description="Detailed log identifier")
+    notes: Optional[str] = Field(None, description="Outcome notes")
+
+
+class BrokerItemStatus(str, Enum):
+    """Lifecycle of a work item in the lease broker."""
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Lease(BaseModel):
+    """A time-limited claim on one work item by one worker."""
+
+    item: WorkItem = Field(..., description="Claimed work item")
+    token: str = Field(..., description="Lease token proving ownership")
+    worker_id: str = Field(..., description="Worker holding the lease")
+    attempt: int = Field(..., description="Attempt number, starting at 1")
+    expires_at: float = Field(..., description="Lease expiry as a UNIX timestamp")
+
+
+class BrokerStats(BaseModel):
+    """Queue depth and throughput counters for the lease broker."""
+
+    pending: int = Field(default=0, description="Items waiting to be claimed")
+    leased: int = Field(default=0, description="Items under an active or expired lease")
+    done: int = Field(default=0, description="Items completed")
+    failed: int = Field(default=0, description="Items that exhausted their attempts")
+    reclaimed: int = Field(
+        default=0, description="Expired leases taken over by another claim"
+    )
+    completions_in_window: int = Field(
+        default=0, description="Completion records in the throughput window"
+    )
+    window_seconds: float = Field(default=60.0, description="Throughput window length")
+
+    def items_per_second(self) -> float:
+        """Completion throughput over the window."""
+        return (
+            self.completions_in_window / self.window_seconds
+            if self.window_seconds
+            else 0.0
+        )
+
+    def remaining(self) -> int:
+        """Items not yet in a final state."""
+        return self.pending + self.leased
+
+
+class PlanNodeKind(str, Enum):
+    """Role of an SOP step in an execution plan."""
+
+    STEP = "step"  # Runs as soon as its dependencies are done
+    JOIN = "join"  # Decision or verification step waiting for every earlier branch
+
+
+class PlanNode(BaseModel):
+    """One SOP step of an execution plan with the steps it waits for."""
+
+    step_num: str = Field(..., description="SOP step number")
+    title: str = Field(default="", description="SOP step title")
+    kind: PlanNodeKind = Field(default=PlanNodeKind.STEP, description="Scheduling role")
+    depends_on: List[str] = Field(
+        default_factory=list, description="Step numbers that must finish first"
+    )
+    level: int = Field(
+        default=0, description="Longest dependency chain before this step"
+    )
+
+
+class ExecutionPlan(BaseModel):
+    """Dependency graph of an SOP's steps, in document order."""
+
+    sop_id: str = Field(..., description="SOP the plan was compiled from")
+    nodes: List[PlanNode] = Field(
+        default_factory=list, description="Steps in document order"
+    )
+
+    def get_node(self, step_num: str) -> Optional[PlanNode]:
+        """Get node by step number."""
+        for node in self.nodes:
+            if node.step_num == step_num:
+                return node
+        return None
+
+    def levels(self) -> List[List[str]]:
+        """Step numbers grouped by dependency depth; each group can run at once."""
+        groups: List[List[str]] = [[] for _ in range(self.depth())]
+        for node in self.nodes:
+            groups[node.level].append(node.step_num)
+        return groups
+
+    def depth(self) -> int:
+        """Steps on the longest dependency chain."""
+        return max((node.level for node in self.nodes), default=-1) + 1
+
+    def width(self) -> int:
+        """Most steps that can run at the same time by depth."""
+        return max((len(group) for group in self.levels()), default=0)
+
+
+class StepRunResult(BaseModel):
+    """Outcome of one scheduled step."""
+
+    step_num: str = Field(..., description="SOP step number")
+    status: CompletionStatus = Field(..., description="Final step status")
+    tab: Optional[int] = Field(None, description="Browser tab the step ran in")
+    started: float = Field(default=0.0, description="Seconds after the run started")
+    seconds: float = Field(default=0.0, description="Time the step took")
+    error: Optional[str] = Field(None, description="Failure or skip reason")
+
+
+class PlanRunReport(BaseModel):
+    """Outcome and parallelism of running an execution plan."""
+
+    sop_id: str = Field(..., description="SOP that was run")
+    results: List[StepRunResult] = Field(
+        default_factory=list, description="Step outcomes in completion order"
+    )
+    seconds: float = Field(default=0.0, description="Wall time of the run")
+    max_parallel: int = Field(default=0, description="Most steps running at once")
+    tabs_opened: int = Field(
+        default=0, description="Browser tabs or sessions opened for branches"
+    )
+    serialized_seconds: float = Field(
+        default=0.0,
+        description="Browser call time in tab mode, which branches cannot overlap",
+    )
+
+    def busy_seconds(self) -> float:
+        """Total step time, i.e. the wall time of running them one by one."""
+        return sum(r.seconds for r in self.results)
+
+    def speedup(self) -> float:
+        """Step time over wall time."""
+        return self.busy_seconds() / self.seconds if self.seconds else 0.0
+
+    def failed_steps(self) -> List[str]:
+        """Steps that failed."""
+        return [r.step_num for r in self.results if r.status == CompletionStatus.FAILED]
+
+    def ok(self) -> bool:
+        """Every step completed."""
+        return all(r.status == CompletionStatus.COMPLETED for r in self.results)
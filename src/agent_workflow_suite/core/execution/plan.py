@@ -0,0 +1,621 @@
+"""Dependency-aware execution of SOP steps across browser tabs.
+
+``compile_plan`` turns an ``SOPMarkdown`` into a DAG of its steps from
+``SOPStep.dependencies`` and the ``process_flow`` edges, with decision and
+verification steps as joins that wait for every earlier branch. Steps that
+declare neither keep their document order. ``PlanScheduler`` starts each
+step as soon as the steps it depends on are done, running independent
+branches at the same time. With a ``SessionPool`` each branch has its own
+browser session, so a workflow that gathers data from several pages takes
+about as long as its longest branch. A ``TabPool`` keeps branches in tabs of
+one session, whose browser calls still run one at a time. A branch that
+forks into another tab or session is first brought to the page its parent
+step left off on.
+"""
+
+import ast
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from agent_workflow_suite.core.agents.sop_markdown.models import (
+    SOPMarkdown,
+    SOPStep,
+    StepType,
+)
+
+from .models import (
+    BrowserSession,
+    CompletionStatus,
+    ExecutionPlan,
+    PlanNode,
+    PlanNodeKind,
+    PlanRunReport,
+    StepRunResult,
+    WorkItem,
+)
+from .sessions import BROWSER_ERRORS, SessionScheduler
+from .waits import ToolCaller, current_url, session_caller
+
+# Step types every earlier branch must finish before
+JOIN_STEP_TYPES = frozenset({StepType.DECISION, StepType.VERIFICATION})
+
+_STEP_REF = re.compile(r"\d+(?:[._]\d+)*")
+# Flow element ids naming a step, such as "2.1", "step_2_1" or "s2.1"
+_FLOW_STEP_ID = re.compile(r"^(?:step[\s_-]*|s)?(\d+(?:[._]\d+)*)$", re.IGNORECASE)
+_PLAN_CACHE_SIZE = 128
+
+
+def _norm(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def _resolve_refs(
+    ref: str, steps: Dict[str, SOPStep], sections: Dict[str, List[str]]
+) -> List[str]:
+    """Step numbers a dependency entry names.
+
+    Accepts step numbers ("1.2", "Step 1.2") and section numbers, which stand
+    for every step of the section. Free text such as "User is logged in" names
+    no step.
+    """
+    ref = ref.strip()
+    if ref in steps:
+        return [ref]
+    match = _STEP_REF.search(ref)
+    if not match:
+        return []
+    num = match.group(0).replace("_", ".")
+    if num in steps:
+        return [num]
+    if num in sections and not re.search(r"\bstep\b", ref, re.IGNORECASE):
+        return list(sections[num])
+    return []
+
+
+def _flow_steps(sop: SOPMarkdown, steps: Dict[str, SOPStep]) -> Dict[str, str]:
+    """Step number of each process flow element that stands for a step."""
+    by_title = {_norm(s.title): num for num, s in steps.items()}
+    mapped = {}
+    for element in sop.process_flow:
+        num = None
+        if element.element_id in steps:
+            num = element.element_id
+        else:
+            match = _FLOW_STEP_ID.match(element.element_id)
+            candidate = match.group(1).replace("_", ".") if match else None
+            if candidate in steps:
+                num = candidate
+        if num is None:
+            num = by_title.get(_norm(element.label))
+        if num is None:
+            match = re.match(
+                r"^\s*(?:step\s+)?(\d+(?:\.\d+)*)[\s.:)-]", element.label, re.IGNORECASE
+            )
+            if match and match.group(1) in steps:
+                num = match.group(1)
+        if num is not None:
+            mapped[element.element_id] = num
+    return mapped
+
+
+def _flow_edges(sop: SOPMarkdown, mapped: Dict[str, str]) -> Set[Tuple[str, str]]:
+    """(before, after) step pairs connected in the process flow.
+
+    Elements that stand for no step, such as start, end and decision
+    diamonds, are passed through, so every step before such an element
+    connects to every step after it.
+    """
+    targets = {e.element_id: e.connected_to for e in sop.process_flow}
+    edges = set()
+    for element_id, before in mapped.items():
+        seen: Set[str] = set()
+        stack = list(targets.get(element_id, []))
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            after = mapped.get(current)
+            if after is not None:
+                if after != before:
+                    edges.add((before, after))
+            else:
+                stack.extend(targets.get(current, []))
+    return edges
+
+
+def compile_plan(sop: SOPMarkdown) -> ExecutionPlan:
+    """Compile an SOP's steps into a dependency graph.
+
+    Steps depend on the steps their ``dependencies`` name and on the steps
+    leading to them in ``process_flow``. A step that declares neither waits
+    for the step before it, as when walking the SOP in order. Decision and
+    verification steps are joins: they wait for every earlier step, and
+    later steps that would not otherwise wait for them do.
+
+    Raises ``ValueError`` when the dependencies form a cycle.
+    """
+    ordered = sop.get_all_steps()
+    steps = {s.step_num: s for s in ordered}
+    position = {s.step_num: i for i, s in enumerate(ordered)}
+    sections = {
+        section.section_num: [s.step_num for s in section.steps]
+        for section in sop.sections
+    }
+    deps: Dict[str, Set[str]] = {num: set() for num in steps}
+
+    mapped = _flow_steps(sop, steps)
+    for before, after in _flow_edges(sop, mapped):
+        deps[after].add(before)
+    in_flow = set(mapped.values())
+    for step in ordered:
+        for ref in step.dependencies:
+            deps[step.step_num].update(_resolve_refs(ref, steps, sections))
+        deps[step.step_num].discard(step.step_num)
+
+    for i, step in enumerate(ordered):
+        num = step.step_num
+        if i and not deps[num] and num not in in_flow:
+            deps[num].add(ordered[i - 1].step_num)
+
+    joins = [s.step_num for s in ordered if s.step_type in JOIN_STEP_TYPES]
+    for join in joins:
+        index = position[join]
+        deps[join].update(s.step_num for s in ordered[:index])
+        for step in ordered[index + 1 :]:
+            if all(position[d] < index for d in deps[step.step_num]):
+                deps[step.step_num].add(join)
+
+    levels = _levels(ordered, deps)
+    nodes = []
+    for step in ordered:
+        num = step.step_num
+        # Keep only direct waits: drop dependencies implied by another one
+        implied = set()
+        for d in deps[num]:
+            implied |= _ancestors(d, deps)
+        nodes.append(
+            PlanNode(
+                step_num=num,
+                title=step.title,
+                kind=PlanNodeKind.JOIN
+                if step.step_type in JOIN_STEP_TYPES
+                else PlanNodeKind.STEP,
+                depends_on=sorted(deps[num] - implied, key=position.__getitem__),
+                level=levels[num],
+            )
+        )
+    return ExecutionPlan(sop_id=sop.metadata.sop_id, nodes=nodes)
+
+
+def _levels(ordered: List[SOPStep], deps: Dict[str, Set[str]]) -> Dict[str, int]:
+    """Longest dependency chain before each step; raises on cycles."""
+    levels: Dict[str, int] = {}
+    visiting: Set[str] = set()
+
+    def visit(num: str) -> int:
+        if num in levels:
+            return levels[num]
+        if num in visiting:
+            raise ValueError(f"Dependency cycle through step {num}")
+        visiting.add(num)
+        levels[num] = max((visit(d) + 1 for d in deps[num]), default=0)
+        visiting.discard(num)
+        return levels[num]
+
+    for step in ordered:
+        visit(step.step_num)
+    return levels
+
+
+def _page_url(tool_name: str, args: Dict[str, Any], result: Any) -> Optional[str]:
+    """Page a tool call left its tab on, when the call or its result says."""
+    url = current_url(result)
+    if url is None and tool_name in ("browser_navigate", "browser_tab_new"):
+        url = args.get("url")
+    return url
+
+
+def _ancestors(num: str, deps: Dict[str, Set[str]]) -> Set[str]:
+    found: Set[str] = set()
+    stack = list(deps[num])
+    while stack:
+        current = stack.pop()
+        if current not in found:
+            found.add(current)
+            stack.extend(deps[current])
+    return found
+
+
+class ExecutionPlanner:
+    """Compile SOPs into execution plans once, keyed by their content."""
+
+    def __init__(self, cache_size: int = _PLAN_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[str, ExecutionPlan]" = OrderedDict()
+
+    def plan(self, sop: SOPMarkdown) -> ExecutionPlan:
+        """Execution plan of an SOP, compiled on first use."""
+        key = hashlib.sha256(sop.model_dump_json().encode("utf-8")).hexdigest()
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+        self.misses += 1
+        plan = self._plans[key] = compile_plan(sop)
+        while len(self._plans) > self.cache_size:
+            self._plans.popitem(last=False)
+        return plan
+
+
+class TabPool:
+    """Browser tabs of one session, shared by concurrently running branches.
+
+    Playwright MCP acts on the selected tab, so calls are serialized and each
+    is preceded by ``browser_tab_select`` when another branch's tab is
+    selected. Tab mode does not overlap browser I/O: branches only overlap
+    where they wait on something other than the browser, such as model turns,
+    and ``io_seconds`` counts the time calls held the browser. Use a
+    ``SessionPool`` to run branches' browser calls in parallel. Tab 0 is the
+    session's existing tab; up to ``max_tabs - 1`` more are opened on demand
+    and reused. ``urls`` holds the page each tab was last seen on.
+    """
+
+    # Tabs share the session's cookies, so a new tab is already logged in
+    replay_roots = False
+
+    def __init__(self, call: ToolCaller, max_tabs: int = 4):
+        if max_tabs < 1:
+            raise ValueError("max_tabs must be at least 1")
+        self.max_tabs = max_tabs
+        self.opened = 0
+        self.io_seconds = 0.0
+        self.urls: Dict[int, str] = {}
+        self._call = call
+        self._tabs = 1
+        self._selected = 0
+        self._free: List[int] = [0]
+        self._io = asyncio.Lock()
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, prefer: Optional[int] = None) -> int:
+        """Reserve a tab, ``prefer`` if it is free, opening one if needed."""
+        async with self._cond:
+            while not self._free and self._tabs >= self.max_tabs:
+                await self._cond.wait()
+            if prefer in self._free:
+                self._free.remove(prefer)
+                return prefer
+            if self._free:
+                return self._free.pop(0)
+            tab = self._tabs
+            self._tabs += 1
+        try:
+            async with self._io:
+                started = time.perf_counter()
+                try:
+                    await self._call("browser_tab_new", {})
+                finally:
+                    self.io_seconds += time.perf_counter() - started
+                self._selected = tab
+        except Exception:
+            async with self._cond:
+                self._tabs -= 1
+                self._cond.notify_all()
+            raise
+        self.opened += 1
+        return tab
+
+    async def release(self, tab: int) -> None:
+        """Make a tab available to other branches."""
+        async with self._cond:
+            self._free.append(tab)
+            self._cond.notify_all()
+
+    async def call(self, tab: int, tool_name: str, args: Dict[str, Any]) -> Any:
+        """Call a browser tool in a tab."""
+        async with self._io:
+            started = time.perf_counter()
+            try:
+                if self._selected != tab:
+                    await self._call("browser_tab_select", {"index": tab})
+                    self._selected = tab
+                result = await self._call(tool_name, args)
+            finally:
+                self.io_seconds += time.perf_counter() - started
+        url = _page_url(tool_name, args, result)
+        if url is not None:
+            self.urls[tab] = url
+        return result
+
+    async def close(self) -> None:
+        """Close the opened tabs, leaving tab 0 selected."""
+        async with self._io:
+            for tab in range(self._tabs - 1, 0, -1):
+                await self._call("browser_tab_close", {"index": tab})
+            if self._tabs > 1:
+                await self._call("browser_tab_select", {"index": 0})
+            self._tabs, self._selected, self._free = 1, 0, [0]
+            self.urls = {tab: url for tab, url in self.urls.items() if tab == 0}
+
+
+class SessionPool:
+    """Browser sessions leased from a ``SessionScheduler``, one per branch.
+
+    Every branch gets its own browser and MCP server, so branches' browser
+    calls run in parallel. Sessions are leased for ``item``, so all share its
+    target app and login, and are held until ``close`` so a branch keeps its
+    page from step to step. Up to ``max_tabs`` sessions are leased, by default
+    as many as the scheduler allows; they are numbered like tabs.
+
+    Sessions share no cookies, so before a branch continues in a session
+    that has not run them, the plan's root steps (typically logging in) are
+    replayed there. Pass ``replay_roots=False`` when the scheduler's login
+    hook already authenticates every session.
+    """
+
+    def __init__(
+        self,
+        scheduler: SessionScheduler,
+        item: WorkItem,
+        max_tabs: Optional[int] = None,
+        replay_roots: bool = True,
+    ):
+        self.max_tabs = max_tabs or scheduler.max_sessions
+        if self.max_tabs < 1:
+            raise ValueError("max_tabs must be at least 1")
+        self.replay_roots = replay_roots
+        self.opened = 0
+        self.urls: Dict[int, str] = {}
+        self._scheduler = scheduler
+        self._item = item
+        self._callers: Dict[int, ToolCaller] = {}
+        self._sessions: Dict[int, BrowserSession] = {}
+        self._leasing = 0
+        self._free: List[int] = []
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, prefer: Optional[int] = None) -> int:
+        """Reserve a session, ``prefer`` if it is free, leasing one if needed."""
+        async with self._cond:
+            while not self._free and self._leased() >= self.max_tabs:
+                await self._cond.wait()
+            if prefer in self._free:
+                self._free.remove(prefer)
+                return prefer
+            if self._free:
+                return self._free.pop(0)
+            self._leasing += 1
+        try:
+            session = await self._scheduler.acquire(self._item)
+        except Exception:
+            async with self._cond:
+                self._leasing -= 1
+                self._cond.notify_all()
+            raise
+        async with self._cond:
+            self._leasing -= 1
+            tab = len(self._sessions)
+            self._sessions[tab] = session
+            self._callers[tab] = session_caller(session)
+        self.opened += 1
+        return tab
+
+    def _leased(self) -> int:
+        return len(self._sessions) + self._leasing
+
+    async def release(self, tab: int) -> None:
+        """Make a session available to other branches."""
+        async with self._cond:
+            self._free.append(tab)
+            self._cond.notify_all()
+
+    async def call(self, tab: int, tool_name: str, args: Dict[str, Any]) -> Any:
+        """Call a browser tool in a branch's session."""
+        result = await self._callers[tab](tool_name, args)
+        url = _page_url(tool_name, args, result)
+        if url is not None:
+            self.urls[tab] = url
+        return result
+
+    async def close(self) -> None:
+        """Return every leased session to the scheduler."""
+        async with self._cond:
+            sessions = list(self._sessions.values())
+            self._sessions, self._callers, self._free = {}, {}, []
+            self.urls = {}
+        for session in sessions:
+            await self._scheduler.release(session)
+
+
+BranchPool = Union[TabPool, SessionPool]
+
+
+class Branch:
+    """The tab or session a scheduled step runs in."""
+
+    def __init__(self, tab: Optional[int], pool: Optional[BranchPool]):
+        self.tab = tab
+        self._pool = pool
+
+    async def call(self, tool_name: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a browser tool in this branch's tab or session."""
+        if self._pool is None or self.tab is None:
+            raise RuntimeError("Scheduler has no browser tabs")
+        return await self._pool.call(self.tab, tool_name, args or {})
+
+
+StepRunner = Callable[[SOPStep, Branch], Awaitable[Any]]
+
+
+def parse_mcp_command(command: str) -> Tuple[str, Dict[str, Any]]:
+    """Tool name and arguments of a ``browser_click(element='Save', ...)`` command."""
+    try:
+        call = ast.parse(command.strip(), mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"Not an MCP command: {command}") from e
+    if (
+        not isinstance(call, ast.Call)
+        or not isinstance(call.func, ast.Name)
+        or call.args
+    ):
+        raise ValueError(f"Not an MCP command: {command}")
+    return call.func.id, {
+        kw.arg: ast.literal_eval(kw.value) for kw in call.keywords if kw.arg
+    }
+
+
+async def run_mcp_commands(step: SOPStep, branch: Branch) -> None:
+    """Step runner replaying a step's ``mcp_commands`` in its tab."""
+    for command in step.mcp_commands:
+        tool_name, args = parse_mcp_command(command)
+        await branch.call(tool_name, args)
+
+
+class PlanScheduler:
+    """Run an SOP's steps in dependency order, independent branches at once.
+
+    Each step starts as soon as the steps it depends on are done, in its
+    first dependency's tab or session when that is free so a branch keeps its
+    page, or else in another one of ``tabs``. A step running anywhere else is
+    first navigated to the page its first dependency left off on, after
+    replaying the root steps there if the pool asks for it. At most
+    ``max_branches`` steps run at once, one per tab or session.
+
+    A runner fails a step by raising one of ``BROWSER_ERRORS``; a tab or
+    session that cannot be acquired fails the step too. The steps depending
+    on a failed step are skipped and independent branches carry on. Any
+    other exception cancels the remaining steps and propagates.
+    """
+
+    def __init__(
+        self,
+        runner: StepRunner = run_mcp_commands,
+        tabs: Optional[BranchPool] = None,
+        max_branches: int = 4,
+        planner: Optional[ExecutionPlanner] = None,
+    ):
+        self.runner = runner
+        self.tabs = tabs
+        self.max_branches = tabs.max_tabs if tabs is not None else max_branches
+        self.planner = planner or ExecutionPlanner()
+
+    async def run(self, sop: SOPMarkdown) -> PlanRunReport:
+        """Run every step of an SOP and report outcomes and parallelism."""
+        plan = self.planner.plan(sop)
+        steps = {s.step_num: s for s in sop.get_all_steps()}
+        waiting = {node.step_num: set(node.depends_on) for node in plan.nodes}
+        dependents: Dict[str, List[str]] = {node.step_num: [] for node in plan.nodes}
+        for node in plan.nodes:
+            for dep in node.depends_on:
+                dependents[dep].append(node.step_num)
+
+        depends_on = {node.step_num: set(node.depends_on) for node in plan.nodes}
+        roots = [node.step_num for node in plan.nodes if not node.depends_on]
+
+        report = PlanRunReport(sop_id=plan.sop_id)
+        tab_of: Dict[str, Optional[int]] = {}
+        url_of: Dict[str, Optional[str]] = {}
+        # Last step run in each tab, and the root steps each tab has run
+        last_in: Dict[int, str] = {}
+        roots_in: Dict[int, Set[str]] = {}
+        limiter = asyncio.Semaphore(self.max_branches)
+        running = 0
+        io_before = self.tabs.io_seconds if isinstance(self.tabs, TabPool) else 0.0
+        started = time.perf_counter()
+
+        async def catch_up(num: str, tab: int, parent: str) -> None:
+            """Bring a tab to the page ``parent`` left off on."""
+            if self.tabs.replay_roots:
+                ancestors = _ancestors(num, depends_on)
+                for root in roots:
+                    if root in ancestors and root not in roots_in.get(tab, set()):
+                        await self.runner(steps[root], Branch(tab, self.tabs))
+                        roots_in.setdefault(tab, set()).add(root)
+            url = url_of.get(parent)
+            if url is not None and self.tabs.urls.get(tab) != url:
+                await self.tabs.call(tab, "browser_navigate", {"url": url})
+
+        async def run_step(num: str) -> bool:
+            nonlocal running
+            node = plan.get_node(num)
+            parent = node.depends_on[0] if node.depends_on else None
+            prefer = tab_of.get(parent) if parent is not None else 0
+            async with limiter:
+                running += 1
+                report.max_parallel = max(report.max_parallel, running)
+                result = StepRunResult(
+                    step_num=num,
+                    status=CompletionStatus.COMPLETED,
+                    started=time.perf_counter() - started,
+                )
+                tab: Optional[int] = None
+                try:
+                    if self.tabs is not None:
+                        tab = result.tab = await self.tabs.acquire(prefer)
+                        if parent is not None and last_in.get(tab) != parent:
+                            await catch_up(num, tab, parent)
+                    await self.runner(steps[num], Branch(tab, self.tabs))
+                except BROWSER_ERRORS as e:
+                    result.status = CompletionStatus.FAILED
+                    result.error = f"{type(e).__name__}: {e}"
+                finally:
+                    running -= 1
+                    result.seconds = time.perf_counter() - started - result.started
+                    tab_of[num] = tab
+                    if tab is not None:
+                        last_in[tab] = num
+                        url_of[num] = self.tabs.urls.get(tab)
+                        if parent is None:
+                            roots_in.setdefault(tab, set()).add(num)
+                        await self.tabs.release(tab)
+            report.results.append(result)
+            return result.status == CompletionStatus.COMPLETED
+
+        def skip(num: str, reason: str) -> None:
+            if any(r.step_num == num for r in report.results):
+                return
+            report.results.append(
+                StepRunResult(
+                    step_num=num, status=CompletionStatus.SKIPPED, error=reason
+                )
+            )
+            for after in dependents[num]:
+                skip(after, f"Step {num} was skipped")
+
+        tasks: Dict["asyncio.Task[bool]", str] = {}
+        for num, deps in waiting.items():
+            if not deps:
+                tasks[asyncio.ensure_future(run_step(num))] = num
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    num = tasks.pop(task)
+                    if not task.result():
+                        for after in dependents[num]:
+                            skip(after, f"Step {num} failed")
+                        continue
+                    for after in dependents[num]:
+                        waiting[after].discard(num)
+                        if not waiting[after] and not any(
+                            r.step_num == after for r in report.results
+                        ):
+                            tasks[asyncio.ensure_future(run_step(after))] = after
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        report.seconds = time.perf_counter() - started
+        if self.tabs is not None:
+            report.tabs_opened = self.tabs.opened
+            if isinstance(self.tabs, TabPool):
+                report.serialized_seconds = self.tabs.io_seconds - io_before
+        return report
@@ -0,0 +1,323 @@
+import asyncio
+import os
+import shutil
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+import anyio
+from mcp.shared.exceptions import McpError
+
+from .models import BrowserSession, SessionKey, SessionState, SessionStats, WorkItem
+
+# Root directory for per-session browser profiles and outputs
+SESSION_ROOT = "./data/mcp/playwright/sessions"
+
+# Failures of a browser, its MCP server or a tool call; they end the current
+# item or step, while anything else is a bug and propagates
+BROWSER_ERRORS: Tuple[Type[Exception], ...] = (
+    McpError,
+    anyio.BrokenResourceError,
+    anyio.ClosedResourceError,
+    OSError,
+    RuntimeError,
+    ValueError,
+)
+
+ToolsetFactory = Callable[[str, str], Any]
+LoginHook = Callable[[BrowserSession], Awaitable[None]]
+ItemHandler = Callable[[WorkItem, BrowserSession], Awaitable[Any]]
+
+
+def _default_toolset_factory(profile_dir: str, output_dir: str) -> Any:
+    """Create a Playwright MCP toolset for an isolated profile."""
+    from agent_workflow_suite.core.agents.worker import create_toolset
+
+    return create_toolset(user_data_dir=profile_dir, output_dir=output_dir)
+
+
+async def call_browser_tool(
+    session: BrowserSession, tool_name: str, args: Optional[Dict[str, Any]] = None
+) -> Any:
+    """Invoke a single Playwright MCP tool on a session outside of an agent run."""
+    if session.toolset is None:
+        raise RuntimeError(f"Session {session.session_id} has no toolset")
+    return await call_toolset_tool(session.toolset, tool_name, args)
+
+
+async def call_toolset_tool(
+    toolset: Any, tool_name: str, args: Optional[Dict[str, Any]] = None
+) -> Any:
+    """Invoke a single MCP tool of a toolset outside of an agent run."""
+    for tool in await toolset.get_tools():
+        if tool.name == tool_name:
+            return await tool.run_async(args=args or {}, tool_context=None)
+    raise ValueError(f"Tool {tool_name} not available")
+
+
+def order_by_affinity(items: Iterable[WorkItem]) -> List[WorkItem]:
+    """Stable-group work items by session key so warm sessions are reused."""
+    groups: Dict[SessionKey, List[WorkItem]] = {}
+    for item in items:
+        groups.setdefault(SessionKey.for_item(item), []).append(item)
+    return [item for group in groups.values() for item in group]
+
+
+class SessionScheduler:
+    """Assigns work items to long-lived browser sessions grouped by app and login.
+
+    Each session owns a dedicated profile directory, so concurrent sessions never
+    share a Chrome user data dir. A session is authenticated once through the
+    login hook and afterwards only has its page state reset between items.
+    Its MCP toolset is connected and closed by one long-lived task, since MCP
+    transports must be exited in the task that entered them.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 4,
+        max_items_per_session: int = 500,
+        session_root: str = SESSION_ROOT,
+        toolset_factory: ToolsetFactory = _default_toolset_factory,
+        login_hook: Optional[LoginHook] = None,
+        home_urls: Optional[Dict[str, str]] = None,
+        keep_profiles: bool = True,
+    ):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.max_sessions = max_sessions
+        self.max_items_per_session = max_items_per_session
+        self.session_root = session_root
+        self.toolset_factory = toolset_factory
+        self.login_hook = login_hook
+        self.home_urls = home_urls or {}
+        self.keep_profiles = keep_profiles
+        self.stats = SessionStats()
+        self._sessions: List[BrowserSession] = []
+        self._reserved: Set[Tuple[SessionKey, int]] = set()
+        self._owners: Dict[str, Tuple["asyncio.Task[None]", asyncio.Event]] = {}
+        self._cond = asyncio.Condition()
+
+    @property
+    def sessions(self) -> List[BrowserSession]:
+        """Currently open sessions."""
+        return list(self._sessions)
+
+    # Acquisition
+
+    async def acquire(self, item: WorkItem) -> BrowserSession:
+        """Get a ready session for the item, preferring a warm one with the same key."""
+        key = SessionKey.for_item(item)
+        async with self._cond:
+            while True:
+                warm = self._find_idle(key)
+                if warm is not None:
+                    warm.state = SessionState.BUSY
+                    reused = True
+                    break
+                if len(self._sessions) + len(self._reserved) < self.max_sessions:
+                    reused = False
+                    break
+                victim = self._find_evictable()
+                if victim is not None:
+                    self._sessions.remove(victim)
+                    self.stats.sessions_evicted += 1
+                    await self._close_session(victim)
+                    reused = False
+                    break
+                await self._cond.wait()
+            if not reused:
+                slot = self._free_slot(key)
+                self._reserved.add((key, slot))
+
+        if reused:
+            try:
+                await self.reset_page_state(warm)
+            except BROWSER_ERRORS:
+                await self.release(warm, healthy=False)
+                return await self.acquire(item)
+            self.stats.sessions_reused += 1
+            return warm
+
+        try:
+            session = await self._open_session(key, slot)
+        except Exception:
+            async with self._cond:
+                self._reserved.discard((key, slot))
+                self._cond.notify_all()
+            raise
+        async with self._cond:
+            self._reserved.discard((key, slot))
+            self._sessions.append(session)
+        self.stats.sessions_created += 1
+        return session
+
+    async def release(self, session: BrowserSession, healthy: bool = True) -> None:
+        """Return a session to the pool, recycling it if unhealthy or worn out.
+
+        Only items that finished cleanly count towards ``max_items_per_session``.
+        """
+        session.last_used_at = datetime.now()
+        if healthy:
+            session.items_processed += 1
+        recycle = healthy and session.items_processed >= self.max_items_per_session
+        async with self._cond:
+            if not healthy or recycle:
+                if session in self._sessions:
+                    self._sessions.remove(session)
+                if not healthy:
+                    self.stats.failures += 1
+                else:
+                    self.stats.sessions_recycled += 1
+                await self._close_session(session)
+            else:
+                session.state = SessionState.IDLE
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def lease(self, item: WorkItem) -> AsyncIterator[BrowserSession]:
+        """Hold a session for the duration of one work item."""
+        session = await self.acquire(item)
+        healthy = True
+        try:
+            yield session
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            await self.release(session, healthy=healthy)
+
+    async def run(self, items: Iterable[WorkItem], handler: ItemHandler) -> List[Any]:
+        """Process items concurrently, one in-flight item per session slot.
+
+        Items are grouped by session key first, and results (or exceptions) are
+        returned in that affinity order.
+        """
+        ordered = order_by_affinity(items)
+        limiter = asyncio.Semaphore(self.max_sessions)
+
+        async def _run_one(item: WorkItem) -> Any:
+            async with limiter:
+                async with self.lease(item) as session:
+                    return await handler(item, session)
+
+        return await asyncio.gather(
+            *(_run_one(item) for item in ordered), return_exceptions=True
+        )
+
+    async def close(self) -> None:
+        """Close every open session."""
+        async with self._cond:
+            sessions, self._sessions = self._sessions, []
+            for session in sessions:
+                await self._close_session(session)
+            self._cond.notify_all()
+
+    # Session lifecycle
+
+    async def reset_page_state(self, session: BrowserSession) -> None:
+        """Clear per-item page state while keeping cookies and storage."""
+        home_url = self.home_urls.get(session.key.target_app, "about:blank")
+        await call_browser_tool(session, "browser_navigate", {"url": home_url})
+        self.stats.resets += 1
+
+    async def _open_session(self, key: SessionKey, slot: int) -> BrowserSession:
+        """Start a browser session in a reserved profile slot and authenticate it."""
+        base = os.path.join(self.session_root, key.slug(), f"slot-{slot}")
+        session = BrowserSession(
+            session_id=f"{key.slug()}-{slot}-{uuid.uuid4().hex[:8]}",
+            key=key,
+            slot=slot,
+            profile_dir=os.path.join(base, "profile"),
+            output_dir=os.path.join(base, "output"),
+            state=SessionState.BUSY,
+        )
+        os.makedirs(session.profile_dir, exist_ok=True)
+        os.makedirs(session.output_dir, exist_ok=True)
+        await self._start_toolset(session)
+        if self.login_hook is not None:
+            try:
+                await self.login_hook(session)
+            except Exception:
+                await self._close_session(session)
+                raise
+            self.stats.logins += 1
+        session.authenticated = True
+        return session
+
+    async def _start_toolset(self, session: BrowserSession) -> None:
+        """Connect a session's toolset in a task that owns it until closed."""
+        connected = asyncio.Event()
+        closing = asyncio.Event()
+
+        async def own() -> None:
+            toolset = self.toolset_factory(session.profile_dir, session.output_dir)
+            try:
+                await toolset.get_tools()
+                session.toolset = toolset
+                connected.set()
+                await closing.wait()
+            finally:
+                session.toolset = None
+                await toolset.close()
+
+        owner = asyncio.create_task(own())
+        waiter = asyncio.create_task(connected.wait())
+        try:
+            await asyncio.wait({owner, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            closing.set()
+            raise
+        finally:
+            waiter.cancel()
+        if owner.done():
+            # Connecting failed; re-raise its error
+            owner.result()
+        self._owners[session.session_id] = (owner, closing)
+
+    async def _close_session(self, session: BrowserSession) -> None:
+        """Shut down a session's browser and optionally drop its profile."""
+        session.state = SessionState.CLOSED
+        owner = self._owners.pop(session.session_id, None)
+        if owner is not None:
+            task, closing = owner
+            closing.set()
+            await task
+        if not self.keep_profiles:
+            shutil.rmtree(os.path.dirname(session.profile_dir), ignore_errors=True)
+
+    def _find_idle(self, key: SessionKey) -> Optional[BrowserSession]:
+        """Find an idle session serving the given key."""
+        for session in self._sessions:
+            if session.key == key and session.state == SessionState.IDLE:
+                return session
+        return None
+
+    def _find_evictable(self) -> Optional[BrowserSession]:
+        """Least recently used idle session, if any."""
+        idle = [s for s in self._sessions if s.state == SessionState.IDLE]
+        return min(idle, key=lambda s: s.last_used_at) if idle else None
+
+    def _free_slot(self, key: SessionKey) -> int:
+        """Lowest profile slot not used by an open session of this key."""
+        used = {s.slot for s in self._sessions if s.key == key}
+        used.update(
+            slot for reserved_key, slot in self._reserved if reserved_key == key
+        )
+        slot = 0
+        while slot in used:
+            slot += 1
+        return slot
@@ -0,0 +1,382 @@
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.tools import BaseTool, ToolContext
+
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ActionStep,
+    PlaywrightAction,
+    PlaywrightTranscription,
+)
+from agent_workflow_suite.core.state import chain_callback
+
+from .models import (
+    BrowserSession,
+    WaitCondition,
+    WaitConditionType,
+    WaitOutcome,
+    WaitReport,
+)
+from .sessions import call_browser_tool, call_toolset_tool
+
+ToolCaller = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+# Actions after which the page is likely to load or re-render
+_TRIGGERS = {
+    PlaywrightAction.CLICK,
+    PlaywrightAction.SCREEN_CLICK,
+    PlaywrightAction.PRESS_KEY,
+    PlaywrightAction.SELECT,
+    PlaywrightAction.CHECK,
+    PlaywrightAction.NAVIGATE,
+    PlaywrightAction.NAVIGATE_BACK,
+    PlaywrightAction.NAVIGATE_FORWARD,
+    PlaywrightAction.FILE_UPLOAD,
+    PlaywrightAction.HANDLE_DIALOG,
+    PlaywrightAction.TAB_NEW,
+}
+
+_TEXT_SELECTOR_TYPES = {"text", "label", "placeholder", "title"}
+
+_PAGE_URL = re.compile(r"^\s*-?\s*Page URL:\s*(\S+)", re.MULTILINE)
+_TAB_URL = re.compile(r"\b((?:https?|file|about):[^\s()\[\]]*)")
+
+
+def session_caller(session: BrowserSession) -> ToolCaller:
+    """Tool caller bound to a scheduled browser session."""
+
+    async def _call(tool_name: str, args: Dict[str, Any]) -> Any:
+        return await call_browser_tool(session, tool_name, args)
+
+    return _call
+
+
+def toolset_caller(toolset: Any) -> ToolCaller:
+    """Tool caller bound to an agent's MCP toolset."""
+
+    async def _call(tool_name: str, args: Dict[str, Any]) -> Any:
+        return await call_toolset_tool(toolset, tool_name, args)
+
+    return _call
+
+
+def _result_text(result: Any) -> str:
+    """Flatten an MCP tool result into plain text."""
+    content = getattr(result, "content", None)
+    if content is None and isinstance(result, dict):
+        content = result.get("content")
+    if not isinstance(content, list):
+        return str(result)
+    texts = []
+    for part in content:
+        if isinstance(part, dict):
+            text = part.get("text")
+        else:
+            text = getattr(part, "text", None)
+        if text:
+            texts.append(str(text))
+    return "\n".join(texts)
+
+
+def current_url(result: Any) -> Optional[str]:
+    """URL of the selected page named in an MCP tool result, if any.
+
+    Reads the ``Page URL:`` line of action and snapshot results, or the
+    ``(current)`` entry of a ``browser_tab_list`` result.
+    """
+    text = _result_text(result)
+    match = _PAGE_URL.search(text)
+    if match:
+        return match.group(1)
+    for line in text.splitlines():
+        if "(current)" in line:
+            match = _TAB_URL.search(line)
+            return match.group(1) if match else None
+    return None
+
+
+def _looks_like_url(value: Optional[str]) -> bool:
+    return value is not None and ("://" in value or value.startswith("/"))
+
+
+def _condition_for_next(
+    previous: Optional[ActionStep], following: Optional[ActionStep]
+) -> Tuple[WaitConditionType, Optional[str]]:
+    """Pick the observable condition the next recorded action depends on."""
+    if following is None:
+        return WaitConditionType.NETWORK_IDLE, None
+    if (
+        previous is not None
+        and _looks_like_url(following.page_context)
+        and following.page_context != previous.page_context
+    ):
+        return WaitConditionType.URL_CHANGE, following.page_context
+    if following.selector is not None:
+        if following.selector.type.lower() in _TEXT_SELECTOR_TYPES:
+            return WaitConditionType.TEXT_VISIBLE, following.selector.value
+        return WaitConditionType.ELEMENT_VISIBLE, following.selector.value
+    return WaitConditionType.NETWORK_IDLE, None
+
+
+def _recorded_wait(step: ActionStep) -> float:
+    """Seconds a WAIT_FOR step paused for in the recording."""
+    value = step.mcp_params.get("time")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return max(0.0, step.end - step.start)
+
+
+def derive_wait_conditions(
+    transcription: PlaywrightTranscription,
+    min_pause: float = 1.0,
+    timeout_factor: float = 3.0,
+    min_timeout: float = 5.0,
+) -> List[WaitCondition]:
+    """Convert recorded waits and human pauses into observable conditions.
+
+    Explicit ``WAIT_FOR`` steps and pauses of at least ``min_pause`` seconds
+    after page-changing actions are mapped, in order of preference, to their
+    own text condition, the URL the next action happens on, the element the
+    next action targets, or network idle.
+    """
+    actions = sorted(transcription.actions, key=lambda a: a.start)
+    # Nearest non-wait actions around each step and the next WAIT_FOR after
+    # it, found in two passes rather than a scan per step
+    previous_of: List[Optional[ActionStep]] = []
+    last: Optional[ActionStep] = None
+    for step in actions:
+        previous_of.append(last)
+        if step.action != PlaywrightAction.WAIT_FOR:
+            last = step
+    following_of: List[Optional[ActionStep]] = [None] * len(actions)
+    next_wait_of: List[Optional[ActionStep]] = [None] * len(actions)
+    following: Optional[ActionStep] = None
+    next_wait: Optional[ActionStep] = None
+    for i in reversed(range(len(actions))):
+        following_of[i], next_wait_of[i] = following, next_wait
+        if actions[i].action == PlaywrightAction.WAIT_FOR:
+            next_wait = actions[i]
+        else:
+            following = actions[i]
+    conditions: List[WaitCondition] = []
+    for i, step in enumerate(actions):
+        previous, following = previous_of[i], following_of[i]
+        if step.action == PlaywrightAction.WAIT_FOR:
+            recorded = _recorded_wait(step)
+            if "text" in step.mcp_params:
+                kind = WaitConditionType.TEXT_VISIBLE
+                value: Optional[str] = str(step.mcp_params["text"])
+            elif "textGone" in step.mcp_params:
+                kind = WaitConditionType.TEXT_GONE
+                value = str(step.mcp_params["textGone"])
+            else:
+                kind, value = _condition_for_next(previous, following)
+        elif step.action in _TRIGGERS and following is not None:
+            recorded = following.start - step.end
+            next_wait = next_wait_of[i]
+            if recorded < min_pause or (
+                next_wait is not None and next_wait.start < following.start
+            ):
+                # Too short to matter, or already covered by a WAIT_FOR step
+                continue
+            kind, value = _condition_for_next(step, following)
+        else:
+            continue
+        conditions.append(
+            WaitCondition(
+                type=kind,
+                value=value,
+                timeout=max(min_timeout, recorded * timeout_factor),
+                recorded_seconds=recorded,
+                source_step=step.num,
+            )
+        )
+    return conditions
+
+
+class WaitResolver:
+    """Resolves wait conditions by observing the browser through MCP tools.
+
+    Attached to an agent, it resolves the model's fixed-time waits on the
+    given recorded conditions in order, then on network idle once they run out.
+    """
+
+    def __init__(
+        self,
+        caller: ToolCaller,
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 1.0,
+        idle_window: float = 0.5,
+        item_id: Optional[str] = None,
+        conditions: Optional[List[WaitCondition]] = None,
+    ):
+        self.caller = caller
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.idle_window = idle_window
+        self.conditions = list(conditions or [])
+        self.report = WaitReport(item_id=item_id)
+        self._next = 0
+
+    def attach(self, agent: LlmAgent) -> LlmAgent:
+        """Resolve the agent's fixed-time waits instead of sleeping."""
+        return chain_callback(
+            agent, "before_tool_callback", make_fixed_wait_callback(self)
+        )
+
+    def start_item(self, item_id: str) -> WaitReport:
+        """Begin a fresh savings report and condition queue for the next item."""
+        self.report = WaitReport(item_id=item_id)
+        self._next = 0
+        return self.report
+
+    def next_condition(self, requested: float) -> WaitCondition:
+        """Condition for a fixed wait of ``requested`` seconds.
+
+        The next unused recorded condition, bounded by the requested time, or
+        network idle when none is left.
+        """
+        if self._next < len(self.conditions):
+            condition = self.conditions[self._next]
+            self._next += 1
+            return condition.model_copy(
+                update={"timeout": requested, "recorded_seconds": requested}
+            )
+        return WaitCondition(
+            type=WaitConditionType.NETWORK_IDLE,
+            timeout=requested,
+            recorded_seconds=requested,
+        )
+
+    async def resolve(self, condition: WaitCondition) -> WaitOutcome:
+        """Wait for one condition, returning the measured outcome."""
+        started = time.monotonic()
+        try:
+            satisfied = await asyncio.wait_for(
+                self._wait(condition), timeout=condition.timeout
+            )
+        except asyncio.TimeoutError:
+            satisfied = False
+        outcome = WaitOutcome(
+            condition=condition,
+            satisfied=satisfied,
+            waited_seconds=time.monotonic() - started,
+        )
+        self.report.outcomes.append(outcome)
+        return outcome
+
+    async def resolve_all(self, conditions: List[WaitCondition]) -> WaitReport:
+        """Resolve conditions in order and return the current item's report."""
+        for condition in conditions:
+            await self.resolve(condition)
+        return self.report
+
+    async def _wait(self, condition: WaitCondition) -> bool:
+        kind = condition.type
+        if kind == WaitConditionType.TEXT_VISIBLE:
+            await self.caller("browser_wait_for", {"text": condition.value})
+            return True
+        if kind == WaitConditionType.TEXT_GONE:
+            await self.caller("browser_wait_for", {"textGone": condition.value})
+            return True
+        if kind == WaitConditionType.URL_CHANGE:
+            return await self._poll_url(condition.value)
+        if kind == WaitConditionType.ELEMENT_VISIBLE:
+            return await self._poll_snapshot(condition.value or "")
+        if kind == WaitConditionType.NETWORK_IDLE:
+            return await self._poll_network_idle()
+        await self.caller("browser_wait_for", {"time": condition.recorded_seconds})
+        return True
+
+    async def _sleep(self, attempt: int) -> None:
+        """Poll delay with exponential backoff."""
+        await asyncio.sleep(
+            min(self.max_poll_interval, self.poll_interval * (2 ** min(attempt, 10)))
+        )
+
+    async def _poll_url(self, expected: Optional[str]) -> bool:
+        """Wait until the current tab's URL contains ``expected`` or changes."""
+        initial = current_url(await self.caller("browser_tab_list", {}))
+        attempt = 0
+        while True:
+            current = current_url(await self.caller("browser_tab_list", {}))
+            if expected and current and expected in current:
+                return True
+            if not expected and current != initial:
+                return True
+            await self._sleep(attempt)
+            attempt += 1
+
+    async def _poll_snapshot(self, needle: str) -> bool:
+        attempt = 0
+        while True:
+            try:
+                snapshot = _result_text(await self.caller("browser_snapshot", {}))
+            except ValueError:
+                # No accessibility snapshots in vision mode
+                return await self._poll_network_idle()
+            if needle in snapshot:
+                return True
+            await self._sleep(attempt)
+            attempt += 1
+
+    async def _poll_network_idle(self) -> bool:
+        """Wait until the network request log stops growing for the idle window."""
+        last = _result_text(await self.caller("browser_network_requests", {}))
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.idle_window:
+            await asyncio.sleep(self.poll_interval)
+            current = _result_text(await self.caller("browser_network_requests", {}))
+            if current != last:
+                last = current
+                quiet_since = time.monotonic()
+        return True
+
+
+BeforeToolCallback = Callable[
+    [BaseTool, Dict[str, Any], ToolContext], Awaitable[Optional[Dict[str, Any]]]
+]
+
+
+def make_fixed_wait_callback(resolver: WaitResolver) -> BeforeToolCallback:
+    """Build a before_tool_callback that turns fixed-time waits into conditions.
+
+    Model-issued ``browser_wait_for`` calls that only pass ``time`` are resolved
+    as soon as the resolver's next condition holds, or the page goes quiet,
+    with the requested time as the timeout. Waits on text are passed through
+    to the browser unchanged.
+    """
+
+    async def before_tool_callback(
+        tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Optional[Dict[str, Any]]:
+        if tool.name != "browser_wait_for" or "text" in args or "textGone" in args:
+            return None
+        requested = float(args.get("time", 0) or 0)
+        if requested <= 0:
+            return None
+        outcome = await resolver.resolve(resolver.next_condition(requested))
+        condition = outcome.condition
+        if condition.type == WaitConditionType.NETWORK_IDLE:
+            target, observed = "the page to go idle", "Page idle"
+        else:
+            target = f"{condition.type.value} {condition.value or ''}".strip()
+            observed = f"Observed {target}"
+        if not outcome.satisfied:
+            return {
+                "result": (
+                    f"Timed out after {outcome.waited_seconds:.2f}s waiting for "
+                    f"{target} (requested fixed wait of {requested:g}s)"
+                )
+            }
+        return {
+            "result": (
+                f"{observed} after {outcome.waited_seconds:.2f}s "
+                f"(requested fixed wait of {requested:g}s)"
+            )
+        }
+
+    return before_tool_callback
@@ -0,0 +1,279 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Set
+
+from .models import CompletionRecord, CompletionStatus, QueueColumns, WorkItem
+
+# Completion report header, as specified in the execution agent PRD
+COMPLETION_COLUMNS = [
+    "Item_ID",
+    "Status",
+    "Start_Time",
+    "End_Time",
+    "Screenshots",
+    "Validation_URLs",
+    "Log_Reference",
+    "Notes",
+]
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Bits of a packed (file, row) position used for the row index
+_ROW_BITS = 40
+
+
+def shard_for(key: str, shard_count: int) -> int:
+    """Stable shard index for a key, identical on every host and process."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def read_work_queue(
+    path: str,
+    columns: Optional[QueueColumns] = None,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    shard_column: Optional[str] = None,
+    skip_ids: Optional[Container[str]] = None,
+) -> Iterator[WorkItem]:
+    """Stream work items from a CSV without loading the file.
+
+    With ``shard_count > 1`` only rows whose ``shard_column`` value (the item
+    id by default) hashes to ``shard_index`` are yielded, so several hosts can
+    split one file without coordination. Shard on the credential or target
+    app column to keep each login's items on one host. Items listed in
+    ``skip_ids`` (for example from ``completed_ids``) are skipped to resume.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard {shard_index} outside 0..{shard_count - 1}")
+    columns = columns or QueueColumns()
+    shard_column = shard_column or columns.item_id
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames or []
+        for column in (columns.item_id, shard_column):
+            if column not in header:
+                raise ValueError(f"Column {column!r} not found in {path}")
+        for row in reader:
+            item_id = (row.get(columns.item_id) or "").strip()
+            if not item_id:
+                raise ValueError(f"Missing {columns.item_id} on line {reader.line_num}")
+            if (
+                shard_count > 1
+                and shard_for(row[shard_column] or "", shard_count) != shard_index
+            ):
+                continue
+            if skip_ids is not None and item_id in skip_ids:
+                continue
+            yield WorkItem(
+                item_id=item_id,
+                data={k: v or "" for k, v in row.items() if k is not None},
+                target_app=(columns.target_app and row.get(columns.target_app))
+                or "default",
+                credential_id=(columns.credential_id and row.get(columns.credential_id))
+                or None,
+            )
+
+
+def _to_row(record: CompletionRecord) -> List[str]:
+    return [
+        record.item_id,
+        record.status.value,
+        record.start_time.strftime(_TIME_FORMAT),
+        record.end_time.strftime(_TIME_FORMAT),
+        json.dumps(record.screenshots),
+        json.dumps(record.validation_urls),
+        record.log_reference or "",
+        record.notes or "",
+    ]
+
+
+def _list_cell(value: Optional[str]) -> List[str]:
+    """A list column: a JSON array, or comma-joined in older reports."""
+    value = (value or "").strip()
+    if value.startswith("["):
+        return [str(item) for item in json.loads(value)]
+    return [item for item in value.split(",") if item]
+
+
+def _from_row(row: Dict[str, str]) -> CompletionRecord:
+    return CompletionRecord(
+        item_id=row["Item_ID"],
+        status=CompletionStatus(row["Status"]),
+        start_time=datetime.strptime(row["Start_Time"], _TIME_FORMAT),
+        end_time=datetime.strptime(row["End_Time"], _TIME_FORMAT),
+        screenshots=_list_cell(row.get("Screenshots")),
+        validation_urls=_list_cell(row.get("Validation_URLs")),
+        log_reference=row.get("Log_Reference") or None,
+        notes=row.get("Notes") or None,
+    )
+
+
+def read_completions(path: str) -> Iterator[CompletionRecord]:
+    """Stream records from a completion report."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield _from_row(row)
+
+
+def completed_ids(
+    path: str, statuses: Iterable[CompletionStatus] = (CompletionStatus.COMPLETED,)
+) -> Set[str]:
+    """Item ids whose latest record in a report has one of ``statuses``."""
+    wanted = set(statuses)
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    for record in read_completions(path):
+        if record.status in wanted:
+            done.add(record.item_id)
+        else:
+            done.discard(record.item_id)
+    return done
+
+
+def shard_report_path(report_dir: str, shard_index: int, shard_count: int) -> str:
+    """Per-shard completion report location."""
+    return os.path.join(
+        report_dir,
+        f"completion_report.shard-{shard_index:03d}-of-{shard_count:03d}.csv",
+    )
+
+
+class CompletionWriter:
+    """Append-only completion report writer that batches flushes.
+
+    Records are encoded into an in-memory buffer and appended to the file once
+    ``flush_rows`` records are pending or ``flush_interval`` seconds have
+    passed, so millions of items cost a few thousand writes. A background
+    thread flushes records left pending when no further writes arrive.
+    Earlier records are never rewritten; a retried item simply gets a later
+    record, and the latest record wins when reports are read or merged.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_rows: int = 500,
+        flush_interval: float = 5.0,
+        fsync: bool = False,
+    ):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rows_written = 0
+        self.flushes = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._writer.writerow(COMPLETION_COLUMNS)
+        self._flusher = threading.Thread(
+            target=self._flush_idle, name=f"flush {path}", daemon=True
+        )
+        self._flusher.start()
+
+    def __enter__(self) -> "CompletionWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def write(self, record: CompletionRecord) -> None:
+        """Buffer a record, flushing when the batch is full or stale."""
+        with self._lock:
+            if self._closed.is_set():
+                raise ValueError(f"Completion report {self.path} is closed")
+            self._writer.writerow(_to_row(record))
+            self._pending += 1
+            if (
+                self._pending >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Append all buffered records to the report."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush the remaining records and stop the idle flusher."""
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+
+    def _flush_idle(self) -> None:
+        """Flush records that have waited ``flush_interval`` without a write."""
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if (
+                    self._pending
+                    and time.monotonic() - self._last_flush >= self.flush_interval
+                ):
+                    self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        data = self._buffer.getvalue()
+        self._last_flush = time.monotonic()
+        if not data:
+            return
+        # Opened per flush, so no handle outlives the writer
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self.rows_written += self._pending
+        self.flushes += 1
+        self._pending = 0
+
+
+def merge_completion_reports(
+    paths: Iterable[str], output: str, dedupe: bool = True
+) -> int:
+    """Merge shard reports into one, streaming rows; returns rows written.
+
+    With ``dedupe`` only the latest record per item is kept. A first pass
+    indexes the position of each item's latest row, so memory grows with the
+    number of distinct item ids (one id and one integer each); the rows
+    themselves are streamed and never held.
+    """
+    paths = [p for p in paths if os.path.exists(p)]
+    latest: Dict[str, int] = {}
+    if dedupe:
+        for file_index, path in enumerate(paths):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row_index, row in enumerate(csv.DictReader(f)):
+                    latest[row["Item_ID"]] = file_index << _ROW_BITS | row_index
+
+    written = 0
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(COMPLETION_COLUMNS)
+        for file_index, path in enumerate(paths):
+            with open(path, newline="", encoding="utf-8") as f:
+                for row_index, row in enumerate(csv.DictReader(f)):
+                    position = file_index << _ROW_BITS | row_index
+                    if dedupe and latest[row["Item_ID"]] != position:
+                        continue
+                    writer.writerow([row.get(c, "") for c in COMPLETION_COLUMNS])
+                    written += 1
+    os.replace(tmp_path, output)
+    return written
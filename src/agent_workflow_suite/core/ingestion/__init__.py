@@ -0,0 +1,35 @@
+from .models import RecordingRef
+from .recording import (
+    RECORDING_STATE_KEY,
+    SPILL_DIR,
+    attach_recording,
+    hash_file,
+    ingest_recording,
+    iter_chunks,
+    prepare_recording,
+    recording_from_state,
+    recording_message,
+    recording_part,
+    recording_state,
+    spill_recording,
+    upload_recording,
+    verify_recording,
+)
+
+__all__ = [
+    "RecordingRef",
+    "RECORDING_STATE_KEY",
+    "SPILL_DIR",
+    "attach_recording",
+    "hash_file",
+    "ingest_recording",
+    "iter_chunks",
+    "prepare_recording",
+    "recording_from_state",
+    "recording_message",
+    "recording_part",
+    "recording_state",
+    "spill_recording",
+    "upload_recording",
+    "verify_recording",
+]
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class RecordingRef(BaseModel):
+    """Reference to a screen recording on disk, passed through state instead of bytes."""
+
+    path: str = Field(..., description="Absolute path of the recording")
+    sha256: str = Field(..., description="Hex SHA-256 of the file content")
+    size: int = Field(..., description="File size in bytes")
+    mime_type: str = Field(..., description="Recording MIME type")
+    modified_at: datetime = Field(..., description="File modification time when hashed")
+
+    # Remote copy for model requests
+    file_uri: Optional[str] = Field(None, description="Gemini Files API URI")
+    file_name: Optional[str] = Field(None, description="Gemini Files API resource name")
+
+    def recording_id(self) -> str:
+        """Short stable identifier derived from the content hash."""
+        return self.sha256[:16]
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Union
+
+import google.genai.types as types
+from google import genai
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from .models import RecordingRef
+
+# State key holding the current recording reference
+RECORDING_STATE_KEY = "recording"
+
+# Read buffer for hashing and streaming; peak memory stays around this size
+CHUNK_SIZE = 8 * 1024 * 1024
+
+SUPPORTED_MIME_TYPES = {"video/mp4", "video/webm", "video/quicktime"}
+
+# Where videos that arrive inline in the user message are written
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "agent_workflow_recordings")
+
+
+def iter_chunks(
+    path: str, chunk_size: int = CHUNK_SIZE, offset: int = 0
+) -> Iterator[memoryview]:
+    """Stream a file through one reusable buffer.
+
+    Each yielded view is only valid until the next iteration; copy it if it
+    must outlive the loop.
+    """
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        f.seek(offset)
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            yield view[:read]
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Compute a file's SHA-256 incrementally without loading it."""
+    digest = hashlib.sha256()
+    for chunk in iter_chunks(path, chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ingest_recording(
+    path: Union[str, os.PathLike[str]],
+    mime_type: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> RecordingRef:
+    """Validate and hash a recording on disk, returning a lightweight reference."""
+    path = os.path.abspath(os.fspath(path))
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Recording not found: {path}")
+    mime_type = mime_type or mimetypes.guess_type(path)[0]
+    if mime_type not in SUPPORTED_MIME_TYPES:
+        raise ValueError(f"Unsupported recording type {mime_type!r} for {path}")
+    stat = os.stat(path)
+    return RecordingRef(
+        path=path,
+        sha256=hash_file(path, chunk_size),
+        size=stat.st_size,
+        mime_type=mime_type,
+        modified_at=datetime.fromtimestamp(stat.st_mtime),
+    )
+
+
+def verify_recording(ref: RecordingRef) -> bool:
+    """Cheap check that the file behind a reference has not changed."""
+    try:
+        stat = os.stat(ref.path)
+    except FileNotFoundError:
+        return False
+    return (
+        stat.st_size == ref.size
+        and datetime.fromtimestamp(stat.st_mtime) == ref.modified_at
+    )
+
+
+async def upload_recording(
+    ref: RecordingRef,
+    client: Optional[genai.Client] = None,
+    poll_interval: float = 2.0,
+    timeout: float = 600.0,
+) -> RecordingRef:
+    """Upload a recording to the Gemini Files API from disk in chunks.
+
+    The SDK streams the file in 8 MB pieces, so the process never holds the
+    whole video. Returns a copy of the reference carrying the file URI once
+    the service has finished processing the video.
+    """
+    if ref.file_uri:
+        return ref
+    client = client or genai.Client()
+    uploaded = await client.aio.files.upload(
+        file=ref.path,
+        config=types.UploadFileConfig(
+            mime_type=ref.mime_type, display_name=ref.recording_id()
+        ),
+    )
+    elapsed = 0.0
+    while uploaded.state == types.FileState.PROCESSING:
+        if elapsed >= timeout:
+            raise TimeoutError(f"Recording {ref.path} still processing")
+        await asyncio.sleep(poll_interval)
+        elapsed += poll_interval
+        uploaded = await client.aio.files.get(name=uploaded.name or "")
+    if uploaded.state == types.FileState.FAILED:
+        raise RuntimeError(f"Files API failed to process {ref.path}")
+    return ref.model_copy(update={"file_uri": uploaded.uri, "file_name": uploaded.name})
+
+
+def recording_part(ref: RecordingRef) -> types.Part:
+    """Model request part that points at the uploaded recording by URI."""
+    if not ref.file_uri:
+        raise ValueError(f"Recording {ref.path} has not been uploaded")
+    return types.Part.from_uri(file_uri=ref.file_uri, mime_type=ref.mime_type)
+
+
+def recording_message(ref: RecordingRef, prompt: str) -> types.Content:
+    """User message referencing the recording, for ``Runner.run_async``."""
+    return types.Content(
+        role="user", parts=[recording_part(ref), types.Part.from_text(text=prompt)]
+    )
+
+
+def recording_state(ref: RecordingRef) -> Dict[str, Any]:
+    """Session state delta carrying the reference instead of the video bytes."""
+    return {RECORDING_STATE_KEY: ref.model_dump(mode="json")}
+
+
+def recording_from_state(state: Mapping[str, Any]) -> Optional[RecordingRef]:
+    """The recording reference held in session state, if any."""
+    value = state.get(RECORDING_STATE_KEY)
+    return RecordingRef.model_validate(value) if value else None
+
+
+def _inline_video(content: Optional[types.Content]) -> Optional[types.Blob]:
+    """First inline video blob of a message."""
+    for part in (content.parts or []) if content else []:
+        blob = part.inline_data
+        if blob and blob.data and blob.mime_type in SUPPORTED_MIME_TYPES:
+            return blob
+    return None
+
+
+def spill_recording(blob: types.Blob, directory: str = SPILL_DIR) -> RecordingRef:
+    """Write an inline video to disk once and ingest it by reference."""
+    data = blob.data or b""
+    extension = mimetypes.guess_extension(blob.mime_type or "") or ".bin"
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, hashlib.sha256(data).hexdigest() + extension)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return ingest_recording(path, blob.mime_type)
+
+
+def prepare_recording(
+    client: Optional[genai.Client] = None, spill_dir: str = SPILL_DIR
+) -> Callable[[CallbackContext], Any]:
+    """Build a before_agent_callback that uploads the run's recording once.
+
+    The recording comes from ``recording_state`` passed as the run's state
+    delta, or, failing that, from a video sent inline in the user message,
+    which is written to ``spill_dir``. The uploaded reference is put back in
+    state so the agents below send its file URI instead of the video bytes.
+    """
+
+    async def before_agent_callback(
+        callback_context: CallbackContext,
+    ) -> Optional[types.Content]:
+        ref = recording_from_state(callback_context.state)
+        if ref is None:
+            blob = _inline_video(callback_context.user_content)
+            if blob is None:
+                return None
+            ref = spill_recording(blob, spill_dir)
+        elif not verify_recording(ref):
+            raise ValueError(f"Recording {ref.path} changed since it was ingested")
+        if not ref.file_uri:
+            ref = await upload_recording(ref, client)
+            callback_context.state.update(recording_state(ref))
+        return None
+
+    return before_agent_callback
+
+
+def attach_recording(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback that sends the uploaded recording by URI.
+
+    Inline copies of the video in the request are dropped and a single file
+    part for the recording leads the first user message.
+    """
+    ref = recording_from_state(callback_context.state)
+    if ref is None or not ref.file_uri:
+        return None
+    for content in llm_request.contents:
+        content.parts = [
+            part
+            for part in content.parts or []
+            if not (
+                part.inline_data and part.inline_data.mime_type in SUPPORTED_MIME_TYPES
+            )
+            and not (part.file_data and part.file_data.file_uri == ref.file_uri)
+        ]
+    llm_request.contents = [c for c in llm_request.contents if c.parts]
+    first = next((c for c in llm_request.contents if c.role == "user"), None)
+    if first is None:
+        first = types.Content(role="user", parts=[])
+        llm_request.contents.insert(0, first)
+    first.parts = [recording_part(ref)] + (first.parts or [])
+    return None
@@ -0,0 +1,26 @@
+from .fake_mcp import FakeBrowser, build_server
+from .harness import (
+    fake_server_params,
+    fake_toolset_factory,
+    format_results,
+    run_load_matrix,
+    run_load_test,
+)
+from .models import FakeServerConfig, LoadTestResult, ScriptedCall
+from .scripted import DEFAULT_ITEM_SCRIPT, HYBRID_ITEM_SCRIPT, ScriptedLlm
+
+__all__ = [
+    "DEFAULT_ITEM_SCRIPT",
+    "FakeBrowser",
+    "HYBRID_ITEM_SCRIPT",
+    "FakeServerConfig",
+    "LoadTestResult",
+    "ScriptedCall",
+    "ScriptedLlm",
+    "build_server",
+    "fake_server_params",
+    "fake_toolset_factory",
+    "format_results",
+    "run_load_matrix",
+    "run_load_test",
+]
@@ -0,0 +1,381 @@
+"""Stand-in Playwright MCP server for load tests.
+
+Implements the tool surface the worker prompts rely on, with no browser
+behind it: each call sleeps for a configurable latency, fails at a
+configurable rate, and screen captures return a synthetic PNG of a fixed size.
+Started with ``--vision`` it exposes the vision-mode tools; otherwise it
+exposes the accessibility snapshot tools of a small form page plus the
+coordinate fallback tools, like the real server with ``--caps=vision``.
+
+Run with ``python -m agent_workflow_suite.core.loadtest.fake_mcp``.
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+import zlib
+from typing import Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP, Image
+
+
+def synthetic_png(size_kb: int) -> bytes:
+    """Valid PNG whose encoded size is about ``size_kb`` KiB."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    width = 256
+    rows = max(1, size_kb * 1024 // (width * 3 + 1))
+    rng = random.Random(0)
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(rows))
+    header = struct.pack(">IIBBBBB", width, rows, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw, 0))
+        + chunk(b"IEND", b"")
+    )
+
+
+# Elements of the fake page as (role, name) by snapshot ref
+PAGE_ELEMENTS: Dict[str, tuple] = {
+    "e2": ("heading", "Form"),
+    "e3": ("textbox", "Name"),
+    "e4": ("textbox", "Email"),
+    "e5": ("checkbox", "Subscribe"),
+    "e6": ("button", "Submit"),
+    "e7": ("link", "Help"),
+}
+
+
+class FakeBrowser:
+    """Minimal page and tab state so tool responses look plausible."""
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.5,
+        capture_latency: Optional[float] = None,
+        failure_rate: float = 0.0,
+        image_kb: int = 200,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.capture_latency = latency if capture_latency is None else capture_latency
+        self.failure_rate = failure_rate
+        self.image = synthetic_png(image_kb)
+        self.rng = random.Random(seed)
+        self.tabs: List[str] = ["about:blank"]
+        self.current = 0
+        self.history: List[str] = []
+        self.forward: List[str] = []
+        self.console: List[str] = []
+        self.requests: List[str] = []
+
+    async def act(self, tool: str, latency: Optional[float] = None) -> None:
+        """Simulate browser work for one call and inject failures."""
+        base = self.latency if latency is None else latency
+        delay = base * (1 + self.jitter * self.rng.uniform(-1.0, 1.0))
+        await asyncio.sleep(max(0.0, delay))
+        if self.rng.random() < self.failure_rate:
+            raise RuntimeError(f"Injected failure in {tool}")
+
+    @property
+    def url(self) -> str:
+        return self.tabs[self.current]
+
+    def snapshot(self) -> str:
+        """Accessibility snapshot of the fake page, as the real server formats it."""
+        lines = [f"- Page URL: {self.url}", "- Page Snapshot:", "```yaml"]
+        lines.append("- main [ref=e1]:")
+        for ref, (role, name) in PAGE_ELEMENTS.items():
+            lines.append(f'  - {role} "{name}" [ref={ref}]')
+        lines.append("```")
+        return "\n".join(lines)
+
+    def element(self, ref: str) -> str:
+        if ref not in PAGE_ELEMENTS:
+            raise ValueError(f"Ref {ref} not found in the current page snapshot")
+        role, name = PAGE_ELEMENTS[ref]
+        return f'{role} "{name}"'
+
+    def go(self, url: str) -> str:
+        self.history.append(self.url)
+        self.forward.clear()
+        self.tabs[self.current] = url
+        self.requests.append(f"[GET] {url} => [200] OK")
+        return f"Navigated to {url}"
+
+
+def build_server(browser: FakeBrowser, vision: bool = True) -> FastMCP:
+    """Register the fake Playwright tools on a FastMCP server.
+
+    ``vision`` selects the vision-mode tool set; otherwise snapshot tools and
+    coordinate fallback tools are registered.
+    """
+    server = FastMCP("fake-playwright", log_level="WARNING")
+    if vision:
+        _add_vision_tools(server, browser)
+    else:
+        _add_snapshot_tools(server, browser)
+    _add_common_tools(server, browser)
+    return server
+
+
+def _add_vision_tools(server: FastMCP, browser: FakeBrowser) -> None:
+    @server.tool()
+    async def browser_screen_capture() -> Image:
+        """Take a screenshot of the current page."""
+        await browser.act("browser_screen_capture", browser.capture_latency)
+        return Image(data=browser.image, format="png")
+
+    @server.tool()
+    async def browser_screen_click(element: str, x: float, y: float) -> str:
+        """Click at screen coordinates."""
+        await browser.act("browser_screen_click")
+        return f"Clicked {element} at ({x}, {y})"
+
+    @server.tool()
+    async def browser_screen_move_mouse(element: str, x: float, y: float) -> str:
+        """Move the mouse to screen coordinates."""
+        await browser.act("browser_screen_move_mouse")
+        return f"Moved mouse to {element} at ({x}, {y})"
+
+    @server.tool()
+    async def browser_screen_drag(
+        element: str, startX: float, startY: float, endX: float, endY: float
+    ) -> str:
+        """Drag between two screen coordinates."""
+        await browser.act("browser_screen_drag")
+        return f"Dragged {element} from ({startX}, {startY}) to ({endX}, {endY})"
+
+    @server.tool()
+    async def browser_screen_type(text: str, submit: bool = False) -> str:
+        """Type text at the focused element."""
+        await browser.act("browser_screen_type")
+        return f"Typed {len(text)} characters" + (" and submitted" if submit else "")
+
+
+def _add_snapshot_tools(server: FastMCP, browser: FakeBrowser) -> None:
+    @server.tool()
+    async def browser_snapshot() -> str:
+        """Capture an accessibility snapshot of the current page."""
+        await browser.act("browser_snapshot")
+        return browser.snapshot()
+
+    @server.tool()
+    async def browser_click(element: str, ref: str) -> str:
+        """Click an element by snapshot ref."""
+        await browser.act("browser_click")
+        return f"Clicked {browser.element(ref)}\n\n{browser.snapshot()}"
+
+    @server.tool()
+    async def browser_type(
+        element: str, ref: str, text: str, submit: bool = False
+    ) -> str:
+        """Type text into an element by snapshot ref."""
+        await browser.act("browser_type")
+        done = f"Typed {len(text)} characters into {browser.element(ref)}"
+        return f"{done}\n\n{browser.snapshot()}"
+
+    @server.tool()
+    async def browser_hover(element: str, ref: str) -> str:
+        """Hover over an element by snapshot ref."""
+        await browser.act("browser_hover")
+        return f"Hovered {browser.element(ref)}"
+
+    @server.tool()
+    async def browser_select_option(element: str, ref: str, values: List[str]) -> str:
+        """Select options in a dropdown by snapshot ref."""
+        await browser.act("browser_select_option")
+        return f"Selected {', '.join(values)} in {browser.element(ref)}"
+
+    @server.tool()
+    async def browser_take_screenshot() -> Image:
+        """Take a screenshot of the current page."""
+        await browser.act("browser_take_screenshot", browser.capture_latency)
+        return Image(data=browser.image, format="png")
+
+    @server.tool()
+    async def browser_mouse_click_xy(element: str, x: float, y: float) -> str:
+        """Click at screen coordinates."""
+        await browser.act("browser_mouse_click_xy")
+        return f"Clicked {element} at ({x}, {y})"
+
+    @server.tool()
+    async def browser_mouse_move_xy(element: str, x: float, y: float) -> str:
+        """Move the mouse to screen coordinates."""
+        await browser.act("browser_mouse_move_xy")
+        return f"Moved mouse to {element} at ({x}, {y})"
+
+
+def _add_common_tools(server: FastMCP, browser: FakeBrowser) -> None:
+    @server.tool()
+    async def browser_navigate(url: str) -> str:
+        """Navigate to a URL."""
+        await browser.act("browser_navigate")
+        return browser.go(url)
+
+    @server.tool()
+    async def browser_navigate_back() -> str:
+        """Go back to the previous page."""
+        await browser.act("browser_navigate_back")
+        if browser.history:
+            browser.forward.append(browser.url)
+            browser.tabs[browser.current] = browser.history.pop()
+        return f"Page URL: {browser.url}"
+
+    @server.tool()
+    async def browser_navigate_forward() -> str:
+        """Go forward to the next page."""
+        await browser.act("browser_navigate_forward")
+        if browser.forward:
+            browser.history.append(browser.url)
+            browser.tabs[browser.current] = browser.forward.pop()
+        return f"Page URL: {browser.url}"
+
+    @server.tool()
+    async def browser_press_key(key: str) -> str:
+        """Press a key."""
+        await browser.act("browser_press_key")
+        return f"Pressed {key}"
+
+    @server.tool()
+    async def browser_file_upload(paths: List[str]) -> str:
+        """Upload files to the open file chooser."""
+        await browser.act("browser_file_upload")
+        return f"Uploaded {len(paths)} file(s)"
+
+    @server.tool()
+    async def browser_handle_dialog(
+        accept: bool, promptText: Optional[str] = None
+    ) -> str:
+        """Accept or dismiss a dialog."""
+        await browser.act("browser_handle_dialog")
+        return "Dialog accepted" if accept else "Dialog dismissed"
+
+    @server.tool()
+    async def browser_wait_for(
+        time: Optional[float] = None,
+        text: Optional[str] = None,
+        textGone: Optional[str] = None,
+    ) -> str:
+        """Wait for text to appear or disappear, or for a time to pass."""
+        if time is not None:
+            await asyncio.sleep(time)
+        await browser.act("browser_wait_for")
+        return f"Waited for {text or textGone or f'{time}s'}"
+
+    @server.tool()
+    async def browser_resize(width: int, height: int) -> str:
+        """Resize the browser window."""
+        await browser.act("browser_resize")
+        return f"Resized to {width}x{height}"
+
+    @server.tool()
+    async def browser_tab_list() -> str:
+        """List open tabs."""
+        await browser.act("browser_tab_list")
+        return "\n".join(
+            f"- {i}:{' (current)' if i == browser.current else ''} {url}"
+            for i, url in enumerate(browser.tabs)
+        )
+
+    @server.tool()
+    async def browser_tab_new(url: Optional[str] = None) -> str:
+        """Open a new tab."""
+        await browser.act("browser_tab_new")
+        browser.tabs.append(url or "about:blank")
+        browser.current = len(browser.tabs) - 1
+        return f"Opened tab {browser.current}"
+
+    @server.tool()
+    async def browser_tab_select(index: int) -> str:
+        """Select a tab by index."""
+        await browser.act("browser_tab_select")
+        if not 0 <= index < len(browser.tabs):
+            raise ValueError(f"No tab {index}")
+        browser.current = index
+        return f"Selected tab {index}"
+
+    @server.tool()
+    async def browser_tab_close(index: Optional[int] = None) -> str:
+        """Close a tab, the current one by default."""
+        await browser.act("browser_tab_close")
+        index = browser.current if index is None else index
+        if len(browser.tabs) > 1:
+            browser.tabs.pop(index)
+            browser.current = min(browser.current, len(browser.tabs) - 1)
+        else:
+            browser.tabs[0] = "about:blank"
+        return f"Closed tab {index}"
+
+    @server.tool()
+    async def browser_close() -> str:
+        """Close the page."""
+        await browser.act("browser_close")
+        browser.tabs, browser.current = ["about:blank"], 0
+        return "Browser closed"
+
+    @server.tool()
+    async def browser_network_requests() -> str:
+        """Network requests since the page loaded."""
+        await browser.act("browser_network_requests")
+        return "\n".join(browser.requests[-20:])
+
+    @server.tool()
+    async def browser_console_messages() -> str:
+        """Console messages of the page."""
+        await browser.act("browser_console_messages")
+        return "\n".join(browser.console)
+
+    @server.tool()
+    async def browser_pdf_save(filename: Optional[str] = None) -> str:
+        """Save the page as PDF."""
+        await browser.act("browser_pdf_save")
+        return f"Saved page as {filename or 'page.pdf'}"
+
+    @server.tool()
+    async def browser_generate_playwright_test(
+        name: str, description: str, steps: List[str]
+    ) -> str:
+        """Generate a Playwright test from steps."""
+        await browser.act("browser_generate_playwright_test")
+        body = "\n".join(f"  // {step}" for step in steps)
+        return f"test('{name}', async ({{ page }}) => {{\n{body}\n}});"
+
+    @server.tool()
+    async def browser_install() -> str:
+        """Install the browser."""
+        await browser.act("browser_install")
+        return "Browser already installed"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--capture-latency", type=float, default=None)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--image-kb", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--vision", action="store_true")
+    # Accepted for drop-in compatibility with the real server's arguments
+    args, _ = parser.parse_known_args(argv)
+    browser = FakeBrowser(
+        latency=args.latency,
+        jitter=args.jitter,
+        capture_latency=args.capture_latency,
+        failure_rate=args.failure_rate,
+        image_kb=args.image_kb,
+        seed=args.seed,
+    )
+    build_server(browser, vision=args.vision).run("stdio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Load-test the execution worker against the fake Playwright MCP server.
+
+Runs the real worker agent, session scheduler and MCP stdio transport with a
+scripted model and a fake browser, so results reflect orchestration, MCP and
+payload overhead on one Linux box without network access. Browser memory is
+not represented; ``memory_per_session_mb`` covers the MCP server processes and
+worker-side growth only.
+
+Run with ``python -m agent_workflow_suite.core.loadtest``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import google.genai.types as types
+from google.adk.runners import InMemoryRunner
+from google.adk.tools import BaseTool, ToolContext
+from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
+
+from agent_workflow_suite.core.agents.worker import (
+    BrowserMode,
+    HybridBrowsing,
+    create_execution_agent,
+    create_toolset,
+)
+from agent_workflow_suite.core.execution import (
+    BrowserSession,
+    SessionScheduler,
+    WorkItem,
+)
+from agent_workflow_suite.core.execution.sessions import ToolsetFactory
+
+from . import fake_mcp
+from .models import FakeServerConfig, LoadTestResult, ScriptedCall
+from .scripted import DEFAULT_ITEM_SCRIPT, HYBRID_ITEM_SCRIPT, ScriptedLlm
+
+DEFAULT_LEVELS = (1, 8, 32)
+
+_TOOL_ERRORS_KEY = "loadtest_tool_errors"
+_TOOL_CALLS_KEY = "loadtest_tool_calls"
+
+
+def fake_server_params(config: FakeServerConfig) -> StdioServerParameters:
+    """Stdio parameters that start the fake Playwright MCP server.
+
+    The server is launched by file path; it only needs the ``mcp`` package, so
+    it runs even when this package is not installed in the interpreter.
+    """
+    return StdioServerParameters(
+        command=sys.executable,
+        args=[
+            fake_mcp.__file__,
+            f"--latency={config.latency}",
+            f"--jitter={config.jitter}",
+            f"--capture-latency={config.capture_latency}",
+            f"--failure-rate={config.failure_rate}",
+            f"--image-kb={config.image_kb}",
+            f"--seed={config.seed}",
+            "--vision" if config.mode == BrowserMode.VISION else "--caps=vision",
+        ],
+    )
+
+
+def fake_toolset_factory(config: FakeServerConfig) -> ToolsetFactory:
+    """Session scheduler factory that gives every session its own fake server.
+
+    Each server gets a distinct seed so injected failures are independent.
+    """
+    started = itertools.count()
+
+    def factory(profile_dir: str, output_dir: str) -> Any:
+        server = config.model_copy(update={"seed": config.seed + next(started)})
+        return create_toolset(
+            profile_dir, output_dir, server_params=fake_server_params(server)
+        )
+
+    return factory
+
+
+async def _start_server(session: BrowserSession) -> None:
+    """Login hook that starts the MCP server before the session takes items.
+
+    Server start-up then counts towards wall time but not item latency.
+    """
+    await session.toolset.get_tools()
+
+
+def _count_tool_result(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+) -> None:
+    """after_tool_callback tallying calls and MCP error results in state."""
+    is_error = getattr(tool_response, "isError", None)
+    if is_error is None and isinstance(tool_response, dict):
+        is_error = tool_response.get("isError")
+    state = tool_context.state
+    state[_TOOL_CALLS_KEY] = state.get(_TOOL_CALLS_KEY, 0) + 1
+    if is_error:
+        state[_TOOL_ERRORS_KEY] = state.get(_TOOL_ERRORS_KEY, 0) + 1
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _descendants(root: int) -> List[int]:
+    """Child process ids of ``root``, recursively, from ``/proc``."""
+    parents: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(name))
+    found, stack = [], [root]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+class _MemorySampler:
+    """Tracks peak RSS of the worker and its MCP server processes."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.baseline_kb = _rss_kb(os.getpid())
+        self.peak_worker_kb = self.baseline_kb
+        self.peak_servers_kb = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self) -> None:
+        self.peak_worker_kb = max(self.peak_worker_kb, _rss_kb(os.getpid()))
+        servers = sum(_rss_kb(pid) for pid in _descendants(os.getpid()))
+        self.peak_servers_kb = max(self.peak_servers_kb, servers)
+
+    async def _loop(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        self.sample()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+async def run_load_test(
+    concurrency: int,
+    items: int,
+    server: Optional[FakeServerConfig] = None,
+    script: Optional[Sequence[ScriptedCall]] = None,
+    think_time: float = 0.0,
+    session_root: Optional[str] = None,
+) -> LoadTestResult:
+    """Process ``items`` work items through ``concurrency`` browser sessions.
+
+    The script defaults to the one matching the server's browsing mode.
+    """
+    server = server or FakeServerConfig()
+    hybrid = server.mode == BrowserMode.HYBRID
+    if script is None:
+        script = HYBRID_ITEM_SCRIPT if hybrid else DEFAULT_ITEM_SCRIPT
+    result = LoadTestResult(concurrency=concurrency, items=items)
+    runners: Dict[str, InMemoryRunner] = {}
+    model = ScriptedLlm(script=list(script), think_time=think_time)
+    # One resolver per run, so its totals cover exactly this run's items
+    browsing = HybridBrowsing() if hybrid else None
+
+    async def handler(item: WorkItem, session: BrowserSession) -> bool:
+        runner = runners.get(session.session_id)
+        if runner is None:
+            agent = create_execution_agent(
+                session.toolset, model=model, browsing=browsing
+            )
+            agent.after_tool_callback = [_count_tool_result] + (
+                agent.after_tool_callback or []
+            )
+            runner = InMemoryRunner(agent=agent, app_name="loadtest")
+            runners[session.session_id] = runner
+        adk_session = await runner.session_service.create_session(
+            app_name="loadtest", user_id="loadtest", state={"item_id": item.item_id}
+        )
+        started = time.perf_counter()
+        async for _ in runner.run_async(
+            user_id="loadtest",
+            session_id=adk_session.id,
+            new_message=types.Content(
+                role="user", parts=[types.Part(text=f"Process {item.item_id}")]
+            ),
+        ):
+            pass
+        result.latencies.append(time.perf_counter() - started)
+        finished = await runner.session_service.get_session(
+            app_name="loadtest", user_id="loadtest", session_id=adk_session.id
+        )
+        state = finished.state if finished else {}
+        result.tool_calls += state.get(_TOOL_CALLS_KEY, 0)
+        return not state.get(_TOOL_ERRORS_KEY, 0)
+
+    with tempfile.TemporaryDirectory(dir=session_root) as root:
+        scheduler = SessionScheduler(
+            max_sessions=concurrency,
+            session_root=root,
+            toolset_factory=fake_toolset_factory(server),
+            login_hook=_start_server,
+            keep_profiles=False,
+        )
+        sampler = _MemorySampler()
+        sampler.start()
+        work = [WorkItem(item_id=f"item-{i:05d}") for i in range(items)]
+        started = time.perf_counter()
+        outcomes: List[Any] = []
+        try:
+            outcomes = await scheduler.run(work, handler)
+            result.wall_seconds = time.perf_counter() - started
+        finally:
+            await sampler.stop()
+            await scheduler.close()
+    result.succeeded = sum(1 for outcome in outcomes if outcome is True)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            name = type(outcome).__name__
+            result.errors[name] = result.errors.get(name, 0) + 1
+    result.failed = items - result.succeeded
+    result.sessions_created = scheduler.stats.sessions_created
+    if browsing is not None:
+        result.usage = browsing.usage
+    result.peak_server_rss_kb = sampler.peak_servers_kb
+    result.peak_worker_rss_delta_kb = sampler.peak_worker_kb - sampler.baseline_kb
+    return result
+
+
+async def run_load_matrix(
+    levels: Sequence[int] = DEFAULT_LEVELS,
+    items_per_session: int = 4,
+    **kwargs: Any,
+) -> List[LoadTestResult]:
+    """Run one load test per concurrency level, sequentially."""
+    return [
+        await run_load_test(level, level * items_per_session, **kwargs)
+        for level in levels
+    ]
+
+
+def format_results(results: Sequence[LoadTestResult]) -> str:
+    """Plain-text table of load test results."""
+    lines = [
+        f"{'sessions':>8} {'items':>6} {'ok':>6} {'failed':>6} {'items/s':>8} "
+        f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'MB/sess':>8} {'vision':>7}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.concurrency:>8} {r.items:>6} {r.succeeded:>6} {r.failed:>6} "
+            f"{r.items_per_second():>8.2f} {r.percentile(50):>7.3f} "
+            f"{r.percentile(95):>7.3f} {r.percentile(99):>7.3f} "
+            f"{r.memory_per_session_mb():>8.1f} "
+            f"{r.usage.vision_share() if r.usage else 1.0:>7.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=list(DEFAULT_LEVELS))
+    parser.add_argument("--items-per-session", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--capture-latency", type=float, default=0.15)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--image-kb", type=int, default=200)
+    parser.add_argument(
+        "--mode", choices=[m.value for m in BrowserMode], default="vision"
+    )
+    parser.add_argument("--json", action="store_true", help="Print raw results")
+    args = parser.parse_args(argv)
+    server = FakeServerConfig(
+        latency=args.latency,
+        capture_latency=args.capture_latency,
+        failure_rate=args.failure_rate,
+        image_kb=args.image_kb,
+        mode=BrowserMode(args.mode),
+    )
+    results = asyncio.run(
+        run_load_matrix(
+            args.levels,
+            args.items_per_session,
+            server=server,
+            think_time=args.think_time,
+        )
+    )
+    if args.json:
+        for r in results:
+            print(r.model_dump_json())
+    else:
+        print(format_results(results))
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from agent_workflow_suite.core.agents.worker.models import BrowserMode, InteractionUsage
+
+
+class ScriptedCall(BaseModel):
+    """One tool call the scripted model issues."""
+
+    tool: str = Field(..., description="Playwright MCP tool name")
+    args: Dict[str, Any] = Field(default_factory=dict, description="Tool arguments")
+
+
+class FakeServerConfig(BaseModel):
+    """Behaviour of the fake Playwright MCP server."""
+
+    latency: float = Field(default=0.05, description="Mean seconds per tool call")
+    jitter: float = Field(default=0.5, description="Relative latency spread (0-1)")
+    capture_latency: float = Field(
+        default=0.15, description="Mean seconds per screen capture"
+    )
+    failure_rate: float = Field(
+        default=0.0, description="Probability a tool call fails"
+    )
+    image_kb: int = Field(default=200, description="Screen capture size in KiB")
+    seed: int = Field(default=0, description="Random seed for latency and failures")
+    mode: BrowserMode = Field(
+        default=BrowserMode.VISION, description="Tool surface the server exposes"
+    )
+
+
+class LoadTestResult(BaseModel):
+    """Measurements for one concurrency level."""
+
+    concurrency: int = Field(..., description="Concurrent browser sessions")
+    items: int = Field(default=0, description="Work items submitted")
+    succeeded: int = Field(default=0, description="Items finished without tool errors")
+    failed: int = Field(default=0, description="Items with tool errors or exceptions")
+    wall_seconds: float = Field(default=0.0, description="Wall time for all items")
+    latencies: List[float] = Field(default_factory=list, description="Per-item seconds")
+    tool_calls: int = Field(default=0, description="Tool calls issued")
+    errors: Dict[str, int] = Field(
+        default_factory=dict, description="Item exceptions by type"
+    )
+    sessions_created: int = Field(default=0, description="Browser sessions started")
+    peak_server_rss_kb: int = Field(
+        default=0, description="Peak RSS of MCP server processes"
+    )
+    peak_worker_rss_delta_kb: int = Field(
+        default=0, description="Peak worker RSS growth"
+    )
+    usage: Optional[InteractionUsage] = Field(
+        default=None, description="Snapshot versus vision usage in hybrid mode"
+    )
+
+    def items_per_second(self) -> float:
+        """Completed items per wall-clock second."""
+        return self.items / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Item latency at percentile ``p`` (0-100)."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def memory_per_session_mb(self) -> float:
+        """Peak server plus worker memory divided by sessions started."""
+        if not self.sessions_created:
+            return 0.0
+        total_kb = self.peak_server_rss_kb + self.peak_worker_rss_delta_kb
+        return total_kb / 1024 / self.sessions_created
@@ -0,0 +1,76 @@
+import asyncio
+from typing import AsyncGenerator, List
+
+import google.genai.types as types
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from .models import ScriptedCall
+
+# One work item following the worker prompt's mandatory patterns
+DEFAULT_ITEM_SCRIPT = [
+    ScriptedCall(tool="browser_screen_capture"),
+    ScriptedCall(tool="browser_console_messages"),
+    ScriptedCall(tool="browser_network_requests"),
+    ScriptedCall(tool="browser_navigate", args={"url": "https://example.test/form"}),
+    ScriptedCall(tool="browser_wait_for", args={"text": "Submit"}),
+    ScriptedCall(tool="browser_screen_capture"),
+    ScriptedCall(
+        tool="browser_screen_click", args={"element": "Name field", "x": 320, "y": 240}
+    ),
+    ScriptedCall(tool="browser_screen_type", args={"text": "Jane Doe"}),
+    ScriptedCall(tool="browser_press_key", args={"key": "Enter"}),
+    ScriptedCall(tool="browser_wait_for", args={"text": "Saved"}),
+    ScriptedCall(tool="browser_screen_capture"),
+]
+
+# The same item in hybrid mode: snapshots and refs, one evidence screenshot
+HYBRID_ITEM_SCRIPT = [
+    ScriptedCall(tool="browser_snapshot"),
+    ScriptedCall(tool="browser_console_messages"),
+    ScriptedCall(tool="browser_network_requests"),
+    ScriptedCall(tool="browser_navigate", args={"url": "https://example.test/form"}),
+    ScriptedCall(tool="browser_wait_for", args={"text": "Submit"}),
+    ScriptedCall(tool="browser_snapshot"),
+    ScriptedCall(tool="resolve_element", args={"step": 0, "description": "Name field"}),
+    ScriptedCall(
+        tool="browser_type",
+        args={"element": "Name field", "ref": "e3", "text": "Jane Doe"},
+    ),
+    ScriptedCall(tool="browser_click", args={"element": "Submit button", "ref": "e6"}),
+    ScriptedCall(tool="browser_wait_for", args={"text": "Saved"}),
+    ScriptedCall(tool="browser_take_screenshot"),
+]
+
+
+class ScriptedLlm(BaseLlm):
+    """Model stand-in that replays a fixed sequence of tool calls.
+
+    The next call is chosen by counting tool responses already in the request,
+    so every session replays the script from the start. ``think_time`` models
+    per-turn model latency without a network.
+    """
+
+    model: str = "scripted"
+    script: List[ScriptedCall] = DEFAULT_ITEM_SCRIPT
+    think_time: float = 0.0
+    final_text: str = "Work item completed."
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+        done = sum(
+            1
+            for content in llm_request.contents
+            for part in content.parts or []
+            if part.function_response is not None
+        )
+        if done < len(self.script):
+            call = self.script[done]
+            part = types.Part(
+                function_call=types.FunctionCall(name=call.tool, args=call.args)
+            )
+        else:
+            part = types.Part(text=self.final_text)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
@@ -0,0 +1,22 @@
+from .models import ProfileReport, ProfileRow, ProfileSpan, SpanKind
+from .profiler import (
+    ITEM_STATE_KEY,
+    STEP_STATE_KEY,
+    ExecutionProfiler,
+    collapsed_stacks,
+    summary_table,
+    write_collapsed,
+)
+
+__all__ = [
+    "ExecutionProfiler",
+    "ProfileReport",
+    "ProfileRow",
+    "ProfileSpan",
+    "SpanKind",
+    "ITEM_STATE_KEY",
+    "STEP_STATE_KEY",
+    "collapsed_stacks",
+    "summary_table",
+    "write_collapsed",
+]
@@ -0,0 +1,110 @@
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SpanKind(str, Enum):
+    """What a profiled span measured."""
+
+    MODEL = "model"
+    TOOL = "tool"
+
+
+class ProfileSpan(BaseModel):
+    """One timed model call or tool call."""
+
+    kind: SpanKind = Field(..., description="Model or tool span")
+    name: str = Field(..., description="Tool name, or agent name for model spans")
+    item_id: str = Field(..., description="Work item the span belongs to")
+    step: str = Field(default="-", description="SOP step being executed")
+    agent: str = Field(..., description="Agent that issued the call")
+    started: float = Field(..., description="Monotonic start time in seconds")
+    seconds: float = Field(default=0.0, description="Wall time of the call")
+    round_trip_seconds: float = Field(
+        default=0.0, description="Estimated MCP transport share of a tool call"
+    )
+    payload_bytes: int = Field(default=0, description="Size of the tool response")
+    images: int = Field(default=0, description="Images in the tool response")
+    failed: bool = Field(
+        default=False, description="The call raised instead of returning"
+    )
+
+    @property
+    def browser_seconds(self) -> float:
+        """Tool time not explained by MCP transport."""
+        return max(0.0, self.seconds - self.round_trip_seconds)
+
+
+class ProfileRow(BaseModel):
+    """Aggregated timings for one group of spans."""
+
+    key: str = Field(..., description="Group key (tool, step or item)")
+    calls: int = Field(default=0, description="Number of spans")
+    total_seconds: float = Field(default=0.0, description="Summed wall time")
+    mean_seconds: float = Field(default=0.0, description="Mean wall time")
+    p95_seconds: float = Field(default=0.0, description="95th percentile wall time")
+    max_seconds: float = Field(default=0.0, description="Slowest span")
+    share: float = Field(default=0.0, description="Fraction of all profiled time")
+    payload_bytes: int = Field(default=0, description="Summed response bytes")
+    images: int = Field(default=0, description="Summed response images")
+
+
+class ProfileReport(BaseModel):
+    """All spans of a profiled run with aggregation helpers."""
+
+    spans: List[ProfileSpan] = Field(default_factory=list, description="Recorded spans")
+    round_trip_seconds: float = Field(
+        default=0.0, description="Estimated MCP round trip per tool call"
+    )
+
+    def model_seconds(self) -> float:
+        """Total model think time."""
+        return sum(s.seconds for s in self.spans if s.kind == SpanKind.MODEL)
+
+    def round_trip_total(self) -> float:
+        """Total estimated MCP transport time."""
+        return sum(s.round_trip_seconds for s in self.spans if s.kind == SpanKind.TOOL)
+
+    def browser_seconds(self) -> float:
+        """Total tool time spent in the browser."""
+        return sum(s.browser_seconds for s in self.spans if s.kind == SpanKind.TOOL)
+
+    def group(
+        self, key: Callable[[ProfileSpan], str], kind: Optional[SpanKind] = None
+    ) -> List[ProfileRow]:
+        """Aggregate spans by key, slowest group first."""
+        groups: Dict[str, List[ProfileSpan]] = {}
+        for span in self.spans:
+            if kind is None or span.kind == kind:
+                groups.setdefault(key(span), []).append(span)
+        total = sum(s.seconds for s in self.spans) or 1.0
+        rows = []
+        for name, spans in groups.items():
+            times = sorted(s.seconds for s in spans)
+            rows.append(
+                ProfileRow(
+                    key=name,
+                    calls=len(times),
+                    total_seconds=sum(times),
+                    mean_seconds=sum(times) / len(times),
+                    p95_seconds=times[min(len(times) - 1, int(0.95 * len(times)))],
+                    max_seconds=times[-1],
+                    share=sum(times) / total,
+                    payload_bytes=sum(s.payload_bytes for s in spans),
+                    images=sum(s.images for s in spans),
+                )
+            )
+        return sorted(rows, key=lambda r: r.total_seconds, reverse=True)
+
+    def by_tool(self) -> List[ProfileRow]:
+        """Tool time per tool name."""
+        return self.group(lambda s: s.name, SpanKind.TOOL)
+
+    def by_step(self) -> List[ProfileRow]:
+        """Model and tool time per SOP step."""
+        return self.group(lambda s: s.step)
+
+    def by_item(self) -> List[ProfileRow]:
+        """Model and tool time per work item."""
+        return self.group(lambda s: s.item_id)
@@ -0,0 +1,258 @@
+import asyncio
+import contextlib
+import statistics
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+
+from agent_workflow_suite.core.state import chain_callback
+
+from .models import ProfileReport, ProfileRow, ProfileSpan, SpanKind
+
+# State keys the execution loop sets so spans can be attributed
+ITEM_STATE_KEY = "item_id"
+STEP_STATE_KEY = "sop_step"
+
+# Cheap tools whose duration approximates a bare MCP round trip
+PROBE_TOOLS = ("browser_tab_list", "browser_console_messages")
+
+
+def _payload_stats(response: Any) -> Tuple[int, int]:
+    """Approximate size and image count of an MCP tool response."""
+    content = getattr(response, "content", None)
+    if content is None and isinstance(response, dict):
+        content = response.get("content")
+        if content is None and "result" in response:
+            return _payload_stats(response["result"])
+    if not isinstance(content, list):
+        return len(str(response or "")), 0
+    size = images = 0
+    for item in content:
+        if isinstance(item, dict):
+            kind, data, text = item.get("type"), item.get("data"), item.get("text")
+        else:
+            kind = getattr(item, "type", None)
+            data = getattr(item, "data", None)
+            text = getattr(item, "text", None)
+        if kind == "image":
+            images += 1
+        size += len(data or "") + len(text or "")
+    return size, images
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class ExecutionProfiler:
+    """Attributes execution wall time to model calls and browser tool calls.
+
+    Attach it to an agent with ``attach``; spans are keyed by the work item and
+    SOP step found in session state under ``ITEM_STATE_KEY`` and
+    ``STEP_STATE_KEY`` (falling back to the invocation id and ``-``). A tool
+    call's MCP transport share is estimated from the median duration of cheap
+    probe tools, or of the fastest tool calls when no probe was called; the
+    rest is attributed to the browser.
+
+    ADK has no error callback, so a call that raises never reaches the after
+    callbacks; run the agent inside ``guard()`` to record such calls as failed
+    spans instead of leaving them open.
+    """
+
+    def __init__(self, probe_tools: Tuple[str, ...] = PROBE_TOOLS):
+        self.probe_tools = probe_tools
+        self.spans: List[ProfileSpan] = []
+        self._open: Dict[Tuple[str, str], ProfileSpan] = {}
+        self._tasks: Dict[Tuple[str, str], Optional[asyncio.Task]] = {}
+
+    def attach(self, agent: LlmAgent) -> LlmAgent:
+        """Add profiling callbacks around the call itself.
+
+        The before callbacks run after the agent's own, so time spent in them
+        (rehydrating state, cache lookups) is not counted as model or tool
+        time, and the after callbacks run first.
+        """
+        chain_callback(agent, "before_model_callback", self.before_model_callback)
+        chain_callback(agent, "before_tool_callback", self.before_tool_callback)
+        chain_callback(
+            agent, "after_model_callback", self.after_model_callback, first=True
+        )
+        chain_callback(
+            agent, "after_tool_callback", self.after_tool_callback, first=True
+        )
+        return agent
+
+    @contextlib.contextmanager
+    def guard(self) -> Iterator[None]:
+        """Record calls still open when the wrapped agent run raises as failed."""
+        try:
+            yield
+        except BaseException:
+            self.close_failed()
+            raise
+
+    def close_failed(self) -> List[ProfileSpan]:
+        """Close the spans opened in the current task as failed calls."""
+        task = _current_task()
+        keys = [key for key, owner in self._tasks.items() if owner is task]
+        spans = [self._finish(key, failed=True) for key in keys]
+        return [span for span in spans if span is not None]
+
+    def _start(
+        self, key: Tuple[str, str], kind: SpanKind, name: str, context: CallbackContext
+    ) -> None:
+        # A span still open under the same key belongs to a call that raised
+        if key in self._open:
+            self._finish(key, failed=True)
+        self._tasks[key] = _current_task()
+        self._open[key] = ProfileSpan(
+            kind=kind,
+            name=name,
+            item_id=str(context.state.get(ITEM_STATE_KEY) or context.invocation_id),
+            step=str(context.state.get(STEP_STATE_KEY) or "-"),
+            agent=context.agent_name,
+            started=time.perf_counter(),
+        )
+
+    def _finish(
+        self, key: Tuple[str, str], failed: bool = False
+    ) -> Optional[ProfileSpan]:
+        self._tasks.pop(key, None)
+        span = self._open.pop(key, None)
+        if span is not None:
+            span.seconds = time.perf_counter() - span.started
+            span.failed = failed
+            self.spans.append(span)
+        return span
+
+    # ADK callbacks; all return None so they never alter the run
+
+    def before_model_callback(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        key = (
+            "model",
+            f"{callback_context.invocation_id}/{callback_context.agent_name}",
+        )
+        self._start(key, SpanKind.MODEL, callback_context.agent_name, callback_context)
+
+    def after_model_callback(
+        self, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        if llm_response.partial:
+            return
+        self._finish(
+            ("model", f"{callback_context.invocation_id}/{callback_context.agent_name}")
+        )
+
+    def before_tool_callback(
+        self, tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
+    ) -> None:
+        key = ("tool", tool_context.function_call_id or tool.name)
+        self._start(key, SpanKind.TOOL, tool.name, tool_context)
+
+    def after_tool_callback(
+        self,
+        tool: BaseTool,
+        args: Dict[str, Any],
+        tool_context: ToolContext,
+        tool_response: Any,
+    ) -> None:
+        span = self._finish(("tool", tool_context.function_call_id or tool.name))
+        if span is not None:
+            span.payload_bytes, span.images = _payload_stats(tool_response)
+
+    # Reporting
+
+    def round_trip_estimate(self) -> float:
+        """Median duration of probe tools, else of the fastest tenth of tool calls."""
+        tools = [s for s in self.spans if s.kind == SpanKind.TOOL]
+        probes = [s.seconds for s in tools if s.name in self.probe_tools]
+        if not probes:
+            fastest = sorted(s.seconds for s in tools)
+            probes = fastest[: max(1, len(fastest) // 10)]
+        return statistics.median(probes) if probes else 0.0
+
+    def report(self) -> ProfileReport:
+        """Snapshot of recorded spans with transport time attributed."""
+        rtt = self.round_trip_estimate()
+        spans = []
+        for span in self.spans:
+            span = span.model_copy()
+            if span.kind == SpanKind.TOOL:
+                span.round_trip_seconds = min(rtt, span.seconds)
+            spans.append(span)
+        return ProfileReport(spans=spans, round_trip_seconds=rtt)
+
+    def reset(self) -> None:
+        """Drop recorded and in-flight spans."""
+        self.spans = []
+        self._open = {}
+        self._tasks = {}
+
+
+def _frame(name: str) -> str:
+    """Frame name safe for the folded stack format."""
+    return name.replace(";", ",").replace(" ", "_") or "-"
+
+
+def collapsed_stacks(report: ProfileReport) -> List[str]:
+    """Folded ``item;step;frame;... microseconds`` lines for flamegraph tools."""
+    weights: Dict[str, int] = {}
+
+    def add(stack: str, seconds: float) -> None:
+        weights[stack] = weights.get(stack, 0) + int(round(seconds * 1_000_000))
+
+    for span in report.spans:
+        base = ";".join(_frame(f) for f in (span.item_id, span.step, span.agent))
+        if span.kind == SpanKind.MODEL:
+            add(f"{base};model;think", span.seconds)
+        else:
+            add(f"{base};tool:{span.name};mcp_round_trip", span.round_trip_seconds)
+            add(f"{base};tool:{span.name};browser", span.browser_seconds)
+    return [f"{stack} {us}" for stack, us in weights.items() if us > 0]
+
+
+def write_collapsed(report: ProfileReport, path: str) -> None:
+    """Write collapsed stacks for ``flamegraph.pl`` or speedscope."""
+    with open(path, "w", encoding="utf-8") as f:
+        for line in collapsed_stacks(report):
+            f.write(line + "\n")
+
+
+def _table(title: str, rows: List[ProfileRow]) -> List[str]:
+    lines = [
+        title,
+        f"{'key':<32} {'calls':>6} {'total s':>9} {'mean s':>8} {'p95 s':>8} "
+        f"{'share':>6} {'KiB':>9} {'images':>6}",
+    ]
+    for row in rows:
+        lines.append(
+            f"{row.key[:32]:<32} {row.calls:>6} {row.total_seconds:>9.3f} "
+            f"{row.mean_seconds:>8.3f} {row.p95_seconds:>8.3f} {row.share:>6.1%} "
+            f"{row.payload_bytes / 1024:>9.1f} {row.images:>6}"
+        )
+    return lines
+
+
+def summary_table(report: ProfileReport, top: int = 15) -> str:
+    """Plain-text summary: time split, then the slowest tools, steps and items."""
+    total = sum(s.seconds for s in report.spans)
+    lines = [
+        f"profiled time {total:.3f}s: model {report.model_seconds():.3f}s, "
+        f"mcp round trip {report.round_trip_total():.3f}s "
+        f"(~{report.round_trip_seconds * 1000:.1f}ms/call), "
+        f"browser {report.browser_seconds():.3f}s",
+        "",
+    ]
+    lines += _table("by tool", report.by_tool()[:top]) + [""]
+    lines += _table("by step", report.by_step()[:top]) + [""]
+    lines += _table("by item", report.by_item()[:top])
+    return "\n".join(lines)
@@ -0,0 +1,22 @@
+from .models import RepairOutcome, RepairStats
+from .repair import (
+    CONFIDENCE_FIELDS,
+    REPAIR_MODEL,
+    Regenerator,
+    SchemaRepairer,
+    coerce_enum,
+    default_repairer,
+    genai_regenerator,
+)
+
+__all__ = [
+    "CONFIDENCE_FIELDS",
+    "REPAIR_MODEL",
+    "Regenerator",
+    "RepairOutcome",
+    "RepairStats",
+    "SchemaRepairer",
+    "coerce_enum",
+    "default_repairer",
+    "genai_regenerator",
+]
@@ -0,0 +1,64 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RepairOutcome(BaseModel):
+    """How one structured output was made valid."""
+
+    schema_name: str = Field(..., description="Output model name")
+    valid_as_generated: bool = Field(
+        default=False, description="Output validated without changes"
+    )
+    fixes: Dict[str, int] = Field(
+        default_factory=dict, description="Deterministic fixes applied, by kind"
+    )
+    regenerated: List[str] = Field(
+        default_factory=list, description="Paths of subtrees regenerated by a model"
+    )
+    ok: bool = Field(default=False, description="Output validates after repair")
+    error: Optional[str] = Field(
+        default=None, description="Validation error left after repair"
+    )
+    seconds: float = Field(default=0.0, description="Wall time of the repair")
+
+
+class RepairStats(BaseModel):
+    """Totals over every output a repairer has seen."""
+
+    outputs: int = Field(default=0, description="Outputs checked")
+    valid_as_generated: int = Field(
+        default=0, description="Outputs that validated without changes"
+    )
+    repaired_locally: int = Field(
+        default=0, description="Outputs fixed by deterministic rules alone"
+    )
+    repaired_by_model: int = Field(
+        default=0, description="Outputs that needed subtree regeneration"
+    )
+    failed: int = Field(default=0, description="Outputs that could not be repaired")
+    fixes: Dict[str, int] = Field(
+        default_factory=dict, description="Deterministic fixes applied, by kind"
+    )
+    model_calls: int = Field(default=0, description="Subtree regeneration calls")
+    seconds: float = Field(default=0.0, description="Wall time spent repairing")
+
+    def record(self, outcome: RepairOutcome) -> None:
+        """Add one repair outcome to the totals."""
+        self.outputs += 1
+        self.seconds += outcome.seconds
+        self.model_calls += len(outcome.regenerated)
+        for kind, count in outcome.fixes.items():
+            self.fixes[kind] = self.fixes.get(kind, 0) + count
+        if outcome.valid_as_generated:
+            self.valid_as_generated += 1
+        elif not outcome.ok:
+            self.failed += 1
+        elif outcome.regenerated:
+            self.repaired_by_model += 1
+        else:
+            self.repaired_locally += 1
+
+    def saved_retries(self) -> int:
+        """Full-output retries avoided by repairing instead."""
+        return self.repaired_locally + self.repaired_by_model
@@ -0,0 +1,500 @@
+"""Repair structured model outputs that fail schema validation.
+
+Model outputs such as ``SOPMarkdown`` are large; losing one to a single bad
+enum value means regenerating minutes of output. ``SchemaRepairer`` instead
+applies deterministic fixes for the common mistakes and, only for what is
+still invalid, asks a model to regenerate the smallest failing subtree.
+"""
+
+import asyncio
+import json
+import re
+import time
+import typing
+from datetime import datetime
+from enum import Enum
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+import google.genai.types as types
+from pydantic import BaseModel, ValidationError, create_model
+
+from .models import RepairOutcome, RepairStats
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+Loc = Tuple[Any, ...]
+
+# Takes a prompt and the schema of the expected JSON; returns JSON text
+Regenerator = Callable[[str, Type[BaseModel]], Awaitable[str]]
+
+REPAIR_MODEL = "gemini-2.5-flash"
+
+REPAIR_INSTRUCTION = """A structured document failed schema validation. Regenerate
+only the part at `{path}` of a `{schema}` document so that it is valid.
+Keep every value that is already correct; fix or fill in only what the
+errors below point at, using the surrounding document for context.
+
+## Errors
+{errors}
+
+## Current value
+```json
+{current}
+```
+
+## Surrounding document
+```json
+{context}
+```
+
+Answer with a JSON object whose only key is "value"."""
+
+_NUMBER = re.compile(r"^\s*[-+]?\d+(?:\.\d+)?\s*$")
+_CLOCK = re.compile(r"^\s*(?:(\d+):)?(\d{1,2}):(\d{1,2}(?:\.\d+)?)\s*$")
+_TRUE = {"true", "yes", "y", "1", "on"}
+_FALSE = {"false", "no", "n", "0", "off"}
+_DATETIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d")
+_CONTEXT_CHARS = 6000
+
+# Required confidence levels that default to MEDIUM when left out, as
+# (model, field). Any other missing enum is regenerated: a default there
+# would invent a fact, such as a risk category.
+CONFIDENCE_FIELDS = frozenset(
+    {
+        ("DetectionQuality", "overall_confidence"),
+        ("Quality", "overall"),
+    }
+)
+
+
+def _unwrap(annotation: Any) -> Any:
+    """Strip ``Optional`` from an annotation; ambiguous unions give ``None``."""
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _unwrap(args[0]) if len(args) == 1 else None
+    return annotation
+
+
+def _is_optional(annotation: Any) -> bool:
+    return typing.get_origin(annotation) is typing.Union and type(
+        None
+    ) in typing.get_args(annotation)
+
+
+def _annotation_at(schema: Type[BaseModel], loc: Loc) -> Any:
+    """Declared type of the value at ``loc``, or ``None`` if unknown."""
+    current: Any = schema
+    for key in loc:
+        current = _unwrap(current)
+        origin = typing.get_origin(current)
+        if isinstance(current, type) and issubclass(current, BaseModel):
+            field = current.model_fields.get(key) if isinstance(key, str) else None
+            if field is None:
+                return None
+            current = field.annotation
+        elif origin in (list, List) and isinstance(key, int):
+            current = typing.get_args(current)[0]
+        elif origin in (dict, Dict):
+            current = typing.get_args(current)[1]
+        else:
+            return None
+    return current
+
+
+def _is_model(annotation: Any) -> bool:
+    annotation = _unwrap(annotation)
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _get(data: Any, loc: Loc) -> Any:
+    for key in loc:
+        data = data[key]
+    return data
+
+
+def _set(data: Any, loc: Loc, value: Any) -> None:
+    _get(data, loc[:-1])[loc[-1]] = value
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def coerce_enum(value: Any, enum: Type[Enum]) -> Optional[Enum]:
+    """Enum member whose name or value matches ignoring case and punctuation.
+
+    Near misses such as abbreviations or typos are not guessed at; they are
+    left for regeneration.
+    """
+    if not isinstance(value, str):
+        return None
+    wanted = _normalize(value)
+    if not wanted:
+        return None
+    keys: Dict[str, Enum] = {}
+    for member in enum:
+        keys.setdefault(_normalize(member.name), member)
+        keys.setdefault(_normalize(str(member.value)), member)
+    return keys.get(wanted)
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """A number written as a plain numeric string or an ``h:mm:ss`` clock.
+
+    Strings with anything else in them ("Step 3", "1,5") are ambiguous and
+    give ``None``.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    clock = _CLOCK.match(value)
+    if clock:
+        hours, minutes, seconds = clock.groups()
+        return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+    return float(value) if _NUMBER.match(value) else None
+
+
+def _to_datetime(value: Any) -> Optional[str]:
+    # Epoch numbers are not accepted: their time zone is unknown
+    if not isinstance(value, str):
+        return None
+    text = value.strip().replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(text).isoformat()
+    except ValueError:
+        pass
+    for fmt in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _missing_default(
+    annotation: Any, loc: Loc, owner: Optional[str] = None
+) -> Tuple[bool, Any]:
+    """Safe value for a missing required field of model ``owner``.
+
+    Returns ``(found, value)``. Only values that lose no information are
+    filled in: empty containers, ``None`` for optionals, a step's position
+    for its ``num`` and ``MEDIUM`` for the ``CONFIDENCE_FIELDS``. Everything
+    else is regenerated.
+    """
+    if _is_optional(annotation):
+        return True, None
+    annotation = _unwrap(annotation)
+    origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        return True, []
+    if origin in (dict, Dict):
+        return True, {}
+    if loc[-1] == "num" and len(loc) >= 2 and isinstance(loc[-2], int):
+        return True, loc[-2] + 1
+    if (
+        (owner, loc[-1]) in CONFIDENCE_FIELDS
+        and isinstance(annotation, type)
+        and issubclass(annotation, Enum)
+    ):
+        medium = getattr(annotation, "MEDIUM", None)
+        if medium is not None:
+            return True, medium.value
+    return False, None
+
+
+def _fix(schema: Type[BaseModel], data: Any, error: Dict[str, Any]) -> Optional[str]:
+    """Apply a deterministic fix for one validation error.
+
+    Returns the kind of fix applied, or ``None`` when the error needs a model.
+    """
+    loc: Loc = tuple(error["loc"])
+    kind = error["type"]
+    if not loc:
+        return None
+    annotation = _annotation_at(schema, loc)
+    if annotation is None:
+        return None
+    target = _unwrap(annotation)
+    value = error.get("input")
+
+    if kind == "missing":
+        owner = _unwrap(_annotation_at(schema, loc[:-1])) if len(loc) > 1 else schema
+        found, default = _missing_default(
+            annotation, loc, getattr(owner, "__name__", None)
+        )
+        if not found:
+            return None
+        _set(data, loc, default)
+        return "default"
+    if kind == "enum" and isinstance(target, type) and issubclass(target, Enum):
+        member = coerce_enum(value, target)
+        if member is None:
+            return None
+        _set(data, loc, member.value)
+        return "enum"
+    if target in (int, float) and kind.startswith(("int_", "float_")):
+        number = _to_number(value)
+        if number is None or (target is int and not number.is_integer()):
+            return None
+        _set(data, loc, int(number) if target is int else number)
+        return "number"
+    if target is bool and kind.startswith("bool_"):
+        text = str(value).strip().lower()
+        if text not in _TRUE | _FALSE:
+            return None
+        _set(data, loc, text in _TRUE)
+        return "bool"
+    if target is str and kind == "string_type":
+        # Joining a list would lose its item boundaries
+        if isinstance(value, dict):
+            _set(data, loc, json.dumps(value))
+        elif isinstance(value, (bool, int, float)):
+            _set(data, loc, str(value))
+        else:
+            return None
+        return "string"
+    if target is datetime and kind.startswith("datetime_"):
+        moment = _to_datetime(value)
+        if moment is None:
+            return None
+        _set(data, loc, moment)
+        return "datetime"
+    origin = typing.get_origin(target)
+    if kind == "list_type" and origin in (list, List):
+        _set(data, loc, [] if value is None else [value])
+        return "list"
+    if kind == "dict_type" and origin in (dict, Dict) and value is None:
+        _set(data, loc, {})
+        return "dict"
+    return None
+
+
+def _parse_json(text: str) -> Any:
+    """Parse model output, tolerating code fences and surrounding prose."""
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start : end + 1])
+
+
+def _subtree(schema: Type[BaseModel], loc: Loc) -> Loc:
+    """Smallest model-typed subtree containing an error, or its top field."""
+    for length in range(len(loc) - 1, 0, -1):
+        if _is_model(_annotation_at(schema, loc[:length])):
+            return loc[:length]
+    return loc[:1]
+
+
+def _path(loc: Loc) -> str:
+    return ".".join(str(key) for key in loc) or "$"
+
+
+def genai_regenerator(model: str = REPAIR_MODEL, client: Any = None) -> Regenerator:
+    """Regenerator calling a Gemini model with the subtree schema enforced.
+
+    The client is created on first use from the usual environment variables
+    unless one is passed in.
+    """
+
+    async def regenerate(prompt: str, schema: Type[BaseModel]) -> str:
+        nonlocal client
+        if client is None:
+            from google import genai
+
+            client = genai.Client()
+        response = await client.aio.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=schema,
+                temperature=0.0,
+            ),
+        )
+        return response.text or ""
+
+    return regenerate
+
+
+class SchemaRepairer:
+    """Make structured outputs validate without regenerating them in full.
+
+    Deterministic rules run first and only make lossless changes: enum
+    values are matched case- and punctuation-insensitively, numeric strings
+    such as ``"3"`` or ``"1:05"`` become numbers (whole numbers only for
+    ints), scalars are wrapped into lists, and missing fields get a default
+    when one loses no information. Anything that would need a guess, such as
+    ``"Step 3"``, ``2.5`` for an int or a misspelt enum, is regenerated
+    instead. Errors left after
+    ``max_passes`` rounds of rules are grouped by their smallest enclosing
+    sub-model, and each such subtree is regenerated by ``regenerator`` in
+    parallel, up to ``max_model_rounds`` times. The default regenerator calls
+    ``REPAIR_MODEL``; pass ``use_model=False`` to use the rules only.
+    """
+
+    def __init__(
+        self,
+        regenerator: Optional[Regenerator] = None,
+        max_passes: int = 5,
+        max_model_rounds: int = 1,
+        use_model: bool = True,
+    ):
+        if regenerator is None and use_model:
+            regenerator = genai_regenerator()
+        self.regenerator = regenerator
+        self.max_passes = max_passes
+        self.max_model_rounds = max_model_rounds
+        self.stats = RepairStats()
+
+    async def repair(self, text: str, schema: Type[ModelT]) -> ModelT:
+        """Validate model output text, repairing it if needed.
+
+        Raises the remaining ``ValidationError`` (or ``ValueError`` for text
+        that is not JSON) when the output cannot be repaired.
+        """
+        doc, _ = await self.repair_with_outcome(text, schema)
+        return doc
+
+    async def repair_with_outcome(
+        self, text: str, schema: Type[ModelT]
+    ) -> Tuple[ModelT, RepairOutcome]:
+        """Like ``repair``, also returning how this output was made valid.
+
+        The outcome belongs to this call, so concurrent callers sharing a
+        repairer each see their own.
+        """
+        started = time.perf_counter()
+        outcome = RepairOutcome(schema_name=schema.__name__)
+        try:
+            try:
+                doc = schema.model_validate_json(text)
+                outcome.valid_as_generated = True
+            except ValidationError:
+                doc = await self._repair(_parse_json(text), schema, outcome)
+            outcome.ok = True
+            return doc, outcome
+        except (ValidationError, ValueError) as e:
+            outcome.error = str(e)
+            raise
+        finally:
+            outcome.seconds = time.perf_counter() - started
+            self.stats.record(outcome)
+
+    async def _repair(
+        self, data: Any, schema: Type[ModelT], outcome: RepairOutcome
+    ) -> ModelT:
+        rounds = 0
+        while True:
+            errors = self._apply_rules(data, schema, outcome)
+            if not errors:
+                return schema.model_validate(data)
+            if self.regenerator is None or rounds >= self.max_model_rounds:
+                return schema.model_validate(data)
+            rounds += 1
+            await self._regenerate(data, schema, errors, outcome)
+
+    def _apply_rules(
+        self, data: Any, schema: Type[BaseModel], outcome: RepairOutcome
+    ) -> List[Dict[str, Any]]:
+        """Fix what rules can; returns the errors that remain."""
+        for _ in range(self.max_passes):
+            try:
+                schema.model_validate(data)
+                return []
+            except ValidationError as e:
+                errors = e.errors()
+            applied = 0
+            for error in errors:
+                try:
+                    kind = _fix(schema, data, error)
+                except (KeyError, IndexError, TypeError):
+                    kind = None
+                if kind is not None:
+                    outcome.fixes[kind] = outcome.fixes.get(kind, 0) + 1
+                    applied += 1
+            if not applied:
+                return errors
+        try:
+            schema.model_validate(data)
+            return []
+        except ValidationError as e:
+            return e.errors()
+
+    async def _regenerate(
+        self,
+        data: Any,
+        schema: Type[BaseModel],
+        errors: List[Dict[str, Any]],
+        outcome: RepairOutcome,
+    ) -> None:
+        """Regenerate each failing subtree with one model call."""
+        grouped: Dict[Loc, List[Dict[str, Any]]] = {}
+        for error in errors:
+            grouped.setdefault(_subtree(schema, tuple(error["loc"])), []).append(error)
+        # Subtrees inside another failing subtree are covered by it
+        targets = [
+            loc
+            for loc in grouped
+            if not any(loc[: len(other)] == other != loc for other in grouped)
+        ]
+        results = await asyncio.gather(
+            *(self._regenerate_one(data, schema, loc, grouped) for loc in targets)
+        )
+        for loc, value in zip(targets, results, strict=True):
+            _set(data, loc, value)
+            outcome.regenerated.append(_path(loc))
+
+    async def _regenerate_one(
+        self,
+        data: Any,
+        schema: Type[BaseModel],
+        loc: Loc,
+        grouped: Dict[Loc, List[Dict[str, Any]]],
+    ) -> Any:
+        annotation = _annotation_at(schema, loc)
+        wrapper = create_model("RepairedValue", value=(annotation, ...))
+        messages = [
+            f"- {_path(error['loc'][len(loc) :])}: {error['msg']}"
+            for other, errors in grouped.items()
+            if other[: len(loc)] == loc
+            for error in errors
+        ]
+        try:
+            current = json.dumps(_get(data, loc), indent=1, default=str)
+        except (KeyError, IndexError, TypeError):
+            current = "null"
+        parent = _get(data, loc[:-1]) if len(loc) > 1 else data
+        context = json.dumps(parent, default=str)[:_CONTEXT_CHARS]
+        prompt = REPAIR_INSTRUCTION.format(
+            path=_path(loc),
+            schema=schema.__name__,
+            errors="\n".join(messages),
+            current=current,
+            context=context,
+        )
+        text = await self.regenerator(prompt, wrapper)
+        return wrapper.model_validate(_parse_json(text)).model_dump(mode="json")[
+            "value"
+        ]
+
+
+default_repairer = SchemaRepairer()
@@ -0,0 +1,23 @@
+from .callbacks import chain_callback
+from .models import ArtifactRef
+from .offload import (
+    OFFLOAD_THRESHOLD,
+    OutputCache,
+    load_state_model,
+    load_state_text,
+    offload_output,
+    rehydrate_outputs,
+    store_output,
+)
+
+__all__ = [
+    "ArtifactRef",
+    "OFFLOAD_THRESHOLD",
+    "OutputCache",
+    "chain_callback",
+    "load_state_model",
+    "load_state_text",
+    "offload_output",
+    "rehydrate_outputs",
+    "store_output",
+]
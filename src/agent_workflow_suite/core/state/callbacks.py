@@ -0,0 +1,21 @@
+from typing import Any, Callable
+
+from google.adk.agents import LlmAgent
+
+
+def chain_callback(
+    agent: LlmAgent, field: str, callback: Callable[..., Any], first: bool = False
+) -> LlmAgent:
+    """Add a callback to one of an agent's callback fields.
+
+    ADK accepts a single callable or a list for each field; the field is
+    normalised to a list and the callback is put last, or first with
+    ``first=True``.
+    """
+    existing = getattr(agent, field)
+    if existing is None:
+        existing = []
+    elif not isinstance(existing, list):
+        existing = [existing]
+    setattr(agent, field, [callback] + existing if first else existing + [callback])
+    return agent
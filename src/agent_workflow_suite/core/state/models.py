@@ -0,0 +1,20 @@
+from typing import Any, Dict, Literal
+
+from pydantic import BaseModel, Field
+
+
+class ArtifactRef(BaseModel):
+    """Typed pointer kept in session state in place of a large agent output."""
+
+    kind: Literal["artifact_ref"] = Field(default="artifact_ref", description="Marker")
+    artifact: str = Field(..., description="Artifact filename")
+    version: int = Field(..., description="Artifact version")
+    schema_name: str = Field(..., description="Pydantic model the artifact decodes to")
+    sha256: str = Field(..., description="Hex SHA-256 of the artifact bytes")
+    size: int = Field(..., description="Artifact size in bytes")
+    summary: Dict[str, Any] = Field(default_factory=dict, description="Small preview")
+
+    @classmethod
+    def is_ref(cls, value: Any) -> bool:
+        """Whether a state value is a serialized artifact reference."""
+        return isinstance(value, dict) and value.get("kind") == "artifact_ref"
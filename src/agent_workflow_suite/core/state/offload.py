@@ -0,0 +1,213 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple, Type, TypeVar
+
+import google.genai.types as types
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from pydantic import BaseModel
+
+from agent_workflow_suite.core.repair import SchemaRepairer
+
+from .models import ArtifactRef
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Outputs smaller than this stay inline in state
+OFFLOAD_THRESHOLD = 4 * 1024
+
+
+class OutputCache:
+    """Offloaded documents kept in process by their owner, keyed by content hash.
+
+    Pass one to the offload and load functions to skip re-reading artifacts
+    this process already wrote or loaded. Without a cache every load reads
+    the artifact service.
+    """
+
+    def __init__(self, size: int = 32):
+        self.size = size
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def get(self, sha256: str) -> Optional[str]:
+        """Cached document text, marking it recently used."""
+        text = self._texts.get(sha256)
+        if text is not None:
+            self._texts.move_to_end(sha256)
+        return text
+
+    def put(self, sha256: str, text: str) -> None:
+        """Keep a document, evicting the least recently used beyond ``size``."""
+        self._texts[sha256] = text
+        self._texts.move_to_end(sha256)
+        while len(self._texts) > self.size:
+            self._texts.popitem(last=False)
+
+
+def _response_text(llm_response: LlmResponse) -> Optional[str]:
+    """Final text of a complete model response, if any."""
+    if llm_response.partial or not llm_response.content:
+        return None
+    parts = llm_response.content.parts or []
+    if any(part.function_call for part in parts):
+        return None
+    text = "".join(part.text or "" for part in parts)
+    return text or None
+
+
+async def store_output(
+    callback_context: CallbackContext,
+    output_key: str,
+    doc: BaseModel,
+    threshold: int = OFFLOAD_THRESHOLD,
+    cache: Optional[OutputCache] = None,
+) -> Optional[ArtifactRef]:
+    """Write a structured output to state, offloading it when large.
+
+    Returns the ``ArtifactRef`` placed in state, or ``None`` when the output
+    was stored inline.
+    """
+    data = doc.model_dump_json(exclude_none=True).encode("utf-8")
+    if len(data) < threshold:
+        callback_context.state[output_key] = doc.model_dump(
+            mode="json", exclude_none=True
+        )
+        return None
+    try:
+        version = await callback_context.save_artifact(
+            f"{output_key}.json",
+            types.Part.from_bytes(data=data, mime_type="application/json"),
+        )
+    except ValueError:
+        callback_context.state[output_key] = doc.model_dump(
+            mode="json", exclude_none=True
+        )
+        return None
+
+    summarize = getattr(doc, "summarize", None)
+    ref = ArtifactRef(
+        artifact=f"{output_key}.json",
+        version=version,
+        schema_name=type(doc).__name__,
+        sha256=hashlib.sha256(data).hexdigest(),
+        size=len(data),
+        summary=summarize() if callable(summarize) else {},
+    )
+    if cache is not None:
+        cache.put(ref.sha256, data.decode("utf-8"))
+    callback_context.state[output_key] = ref.model_dump(mode="json")
+    return ref
+
+
+def offload_output(
+    output_key: str,
+    output_schema: Type[BaseModel],
+    threshold: int = OFFLOAD_THRESHOLD,
+    repairer: Optional[SchemaRepairer] = None,
+    cache: Optional[OutputCache] = None,
+) -> Callable[[CallbackContext, LlmResponse], Any]:
+    """Build an after_model_callback that stores large outputs as artifacts.
+
+    Use it instead of ``output_key`` on an agent with an ``output_schema``.
+    Small outputs are written to state exactly like ``output_key`` would.
+    Large outputs are saved as a JSON artifact; state and the response event
+    then carry only an ``ArtifactRef`` with the model's ``summarize()``
+    preview, so session persistence does not grow with the document. Without
+    an artifact service the output stays inline.
+
+    With a ``repairer``, output that fails validation is repaired instead of
+    failing the run, and the response carries the repaired document. Offloaded
+    documents are also kept in ``cache`` when one is given.
+    """
+
+    async def after_model_callback(
+        callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        text = _response_text(llm_response)
+        if text is None:
+            return None
+        if repairer is None:
+            doc = output_schema.model_validate_json(text)
+            repaired = False
+        else:
+            doc, outcome = await repairer.repair_with_outcome(text, output_schema)
+            repaired = not outcome.valid_as_generated
+        ref = await store_output(callback_context, output_key, doc, threshold, cache)
+        if ref is None and not repaired:
+            return None
+        body = ref.model_dump_json() if ref else doc.model_dump_json(exclude_none=True)
+        return LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=body)]),
+            usage_metadata=llm_response.usage_metadata,
+        )
+
+    return after_model_callback
+
+
+async def load_state_text(
+    callback_context: CallbackContext, key: str, cache: Optional[OutputCache] = None
+) -> Optional[str]:
+    """JSON text of a state output, loading it from artifacts when offloaded."""
+    value = callback_context.state.get(key)
+    if value is None:
+        return None
+    if not ArtifactRef.is_ref(value):
+        return value if isinstance(value, str) else json.dumps(value)
+    ref = ArtifactRef.model_validate(value)
+    cached = cache.get(ref.sha256) if cache is not None else None
+    if cached is not None:
+        return cached
+    part = await callback_context.load_artifact(ref.artifact, ref.version)
+    if part is None or part.inline_data is None or part.inline_data.data is None:
+        raise LookupError(f"Artifact {ref.artifact} v{ref.version} not found")
+    text = part.inline_data.data.decode("utf-8")
+    if cache is not None:
+        cache.put(ref.sha256, text)
+    return text
+
+
+async def load_state_model(
+    callback_context: CallbackContext,
+    key: str,
+    schema: Type[ModelT],
+    cache: Optional[OutputCache] = None,
+) -> Optional[ModelT]:
+    """Rehydrate a state output into its pydantic model, inline or offloaded."""
+    value = callback_context.state.get(key)
+    if value is None:
+        return None
+    if isinstance(value, dict) and not ArtifactRef.is_ref(value):
+        return schema.model_validate(value)
+    text = await load_state_text(callback_context, key, cache)
+    return schema.model_validate_json(text) if text is not None else None
+
+
+def rehydrate_outputs(
+    keys: Iterable[str], cache: Optional[OutputCache] = None
+) -> Callable[[CallbackContext, LlmRequest], Any]:
+    """Build a before_model_callback that feeds offloaded outputs to the model.
+
+    Documents are loaded lazily from artifacts only when a reference is in
+    state, and appended to the system instruction of that one request. Give
+    the agent its own ``cache`` to load each document once across requests.
+    """
+    state_keys: Tuple[str, ...] = tuple(keys)
+
+    async def before_model_callback(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        sections = []
+        for key in state_keys:
+            if not ArtifactRef.is_ref(callback_context.state.get(key)):
+                continue
+            text = await load_state_text(callback_context, key, cache)
+            sections.append(f"## {key}\n```json\n{text}\n```")
+        if sections:
+            llm_request.append_instructions(sections)
+        return None
+
+    return before_model_callback
@@ -0,0 +1,76 @@
+"""Tests for the content-addressed, append-only audit store."""
+
+import hashlib
+import os
+from pathlib import Path
+
+from agent_workflow_suite.core.audit import AuditStore, RecordKind
+
+
+def test_records_read_back_in_step_order(tmp_path: Path) -> None:
+    """Records come back per item and step range, with their payloads."""
+    with AuditStore(str(tmp_path)) as store:
+        for step in (3, 1, 2):
+            store.append("a", step, RecordKind.ACTION, {"step": step})
+        store.append("b", 1, RecordKind.NOTE, {"text": "other item"})
+        store.append("a", 2, RecordKind.VALIDATION, {"ok": True})
+
+        records = list(store.read("a"))
+        assert [(r.step, r.kind) for r in records] == [
+            (1, RecordKind.ACTION),
+            (2, RecordKind.ACTION),
+            (2, RecordKind.VALIDATION),
+            (3, RecordKind.ACTION),
+        ]
+        assert [r.payload for r in store.read("a", 2, 2, [RecordKind.ACTION])] == [
+            {"step": 2}
+        ]
+        assert store.item_ids() == ["a", "b"]
+
+
+def test_records_survive_reopening_and_segment_rollover(tmp_path: Path) -> None:
+    """Flushed blocks span several segments and are indexed on disk."""
+    with AuditStore(str(tmp_path), block_size=1, segment_size=200) as store:
+        for step in range(20):
+            store.append("a", step, RecordKind.NOTE, {"text": "x" * 50})
+    assert len(os.listdir(tmp_path / "segments")) > 1
+
+    with AuditStore(str(tmp_path)) as store:
+        steps = [r.step for r in store.read("a")]
+        store.append("a", 20, RecordKind.NOTE)
+        assert [r.step for r in store.read("a", 19)] == [19, 20]
+    assert steps == list(range(20))
+
+
+def test_interleaved_blocks_are_decompressed_once(tmp_path: Path) -> None:
+    """Reading records that alternate between blocks reuses cached blocks."""
+    with AuditStore(str(tmp_path)) as store:
+        for step in range(0, 10, 2):
+            store.append("a", step, RecordKind.ACTION)
+        store.flush()
+        for step in range(1, 10, 2):
+            store.append("a", step, RecordKind.ACTION)
+        store.flush()
+
+        assert [r.step for r in store.read("a")] == list(range(10))
+        assert store.stats.blocks_written == 2
+        assert store.stats.blocks_read == 2
+
+
+def test_blobs_are_stored_once_by_content_hash(tmp_path: Path) -> None:
+    """Identical content is deduplicated and reads back byte for byte."""
+    shot = tmp_path / "shot.png"
+    data = os.urandom(3 * 1024 * 1024)
+    shot.write_bytes(data)
+    with AuditStore(str(tmp_path / "audit")) as store:
+        first = store.record_screenshot("a", 1, str(shot))
+        second = store.put_blob(data)
+        assert first.blob is not None
+        assert first.blob.sha256 == second.sha256 == hashlib.sha256(data).hexdigest()
+        assert first.blob.mime_type == "image/png"
+        assert second.deduplicated
+        assert store.get_blob(second.sha256) == data
+        (record,) = store.read("a")
+        assert record.blob == first.blob
+        assert store.stats.blobs_stored == 1
+        assert store.stats.blob_bytes_saved == len(data)
@@ -0,0 +1,129 @@
+"""Tests for the SQLite lease broker."""
+
+import asyncio
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from agent_workflow_suite.core.execution import (
+    CompletionRecord,
+    CompletionStatus,
+    Lease,
+    WorkBroker,
+    WorkItem,
+    run_worker,
+)
+
+
+def _broker(tmp_path: Path, **kwargs: Any) -> WorkBroker:
+    """Broker on a fresh database holding items a, b and c."""
+    broker = WorkBroker(str(tmp_path / "broker.sqlite3"), **kwargs)
+    broker.enqueue(WorkItem(item_id=i) for i in "abc")
+    return broker
+
+
+def _record(lease: Lease) -> CompletionRecord:
+    """Successful completion of a leased item."""
+    now = datetime.now()
+    return CompletionRecord(
+        item_id=lease.item.item_id,
+        status=CompletionStatus.COMPLETED,
+        start_time=now,
+        end_time=now,
+    )
+
+
+def test_claims_lease_each_item_once(tmp_path: Path) -> None:
+    """Concurrent workers never hold the same item, and re-enqueueing is a no-op."""
+    with _broker(tmp_path) as broker:
+        first = broker.claim("w1", limit=2)
+        second = broker.claim("w2", limit=2)
+        assert [lease.item.item_id for lease in first] == ["a", "b"]
+        assert [lease.item.item_id for lease in second] == ["c"]
+        assert broker.claim("w3") == []
+        assert broker.enqueue([WorkItem(item_id="a")]) == 0
+        assert broker.stats().leased == 3
+
+
+def test_expired_leases_are_reclaimed(tmp_path: Path) -> None:
+    """A lease that runs out goes to the next worker; the old token is void."""
+    with _broker(tmp_path, lease_seconds=0.05) as broker:
+        [stale] = broker.claim("slow")
+        time.sleep(0.1)
+        [fresh] = broker.claim("fast")
+        assert fresh.item.item_id == stale.item.item_id
+        assert fresh.attempt == 2
+        assert not broker.heartbeat(stale)
+        assert not broker.complete(stale, _record(stale))
+        assert broker.complete(fresh, _record(fresh))
+        assert broker.stats().reclaimed == 1
+
+
+def test_items_complete_exactly_once(tmp_path: Path) -> None:
+    """A second completion of the same lease writes nothing."""
+    with _broker(tmp_path) as broker:
+        [lease] = broker.claim("w1")
+        assert broker.complete(lease, _record(lease))
+        assert not broker.complete(lease, _record(lease))
+        assert [r.item_id for r in broker.completions()] == ["a"]
+        assert broker.stats().done == 1
+
+
+def test_expired_items_fail_after_max_attempts(tmp_path: Path) -> None:
+    """An item whose every lease expired is failed with a record."""
+    with _broker(tmp_path, lease_seconds=0.01, max_attempts=1) as broker:
+        broker.claim("w1", limit=3)
+        time.sleep(0.05)
+        assert broker.claim("w2") == []
+        assert broker.stats().failed == 3
+        assert {r.status for r in broker.completions()} == {CompletionStatus.FAILED}
+
+
+class _LockedOnce(WorkBroker):
+    """Broker whose first heartbeat finds the database locked."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.beats: List[str] = []
+
+    def heartbeat(self, lease: Lease) -> bool:
+        self.beats.append(lease.item.item_id)
+        if len(self.beats) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return super().heartbeat(lease)
+
+
+def test_worker_survives_a_locked_heartbeat(tmp_path: Path) -> None:
+    """A failed heartbeat is retried and the work still completes."""
+    broker = _LockedOnce(str(tmp_path / "broker.sqlite3"), lease_seconds=0.3)
+    broker.enqueue([WorkItem(item_id="a")])
+
+    async def handler(lease: Lease) -> CompletionRecord:
+        await asyncio.sleep(0.4)
+        return _record(lease)
+
+    with broker:
+        assert asyncio.run(run_worker(broker, handler, poll_interval=0.01)) == 1
+        assert len(broker.beats) >= 2
+        assert broker.stats().done == 1
+
+
+def test_handler_bugs_release_the_item_and_stop_the_worker(tmp_path: Path) -> None:
+    """Browser errors are retried; other exceptions end the run."""
+    calls: List[str] = []
+
+    async def handler(lease: Lease) -> CompletionRecord:
+        calls.append(lease.item.item_id)
+        if len(calls) == 1:
+            raise RuntimeError("browser crashed")
+        raise KeyError("bug")
+
+    with _broker(tmp_path) as broker:
+        with pytest.raises(KeyError):
+            asyncio.run(run_worker(broker, handler, poll_interval=0.01))
+        assert calls == ["a", "a"]
+        assert broker.stats().pending == 3
@@ -0,0 +1,135 @@
+"""Tests for serving the static request prefix from a context cache."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, List
+
+import google.genai.types as types
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from agent_workflow_suite.core.caching import ContextCacheManager, LocalCacheBackend
+
+INSTRUCTION = "Follow the SOP. " * 20
+
+
+class _Model(BaseLlm):
+    """Model that reads cached prefixes back from a local backend."""
+
+    backend: LocalCacheBackend
+    prompts: List[str] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        config = llm_request.config
+        instruction = config.system_instruction
+        if config.cached_content:
+            cached = self.backend.lookup(config.cached_content)
+            if cached is None:
+                raise LookupError(f"{config.cached_content} not found")
+            instruction = cached[1]
+        self.prompts.append(instruction)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text="ok")])
+        )
+
+
+def _setup(**kwargs: Any) -> Any:
+    """Manager attached to an agent whose model uses a local backend."""
+    backend = LocalCacheBackend()
+    model = _Model(model="gemini-2.5-pro", backend=backend)
+    manager = ContextCacheManager(backend=backend, min_tokens=10, **kwargs)
+    agent = manager.attach(LlmAgent(name="agent", model=model))
+    return manager, agent, model
+
+
+async def _request(manager: ContextCacheManager, agent: LlmAgent, n: int) -> None:
+    """Send one request through the callbacks and the agent's model."""
+    context = SimpleNamespace(invocation_id=f"inv{n}", agent_name="agent")
+    request = LlmRequest(
+        model="gemini-2.5-pro",
+        config=types.GenerateContentConfig(system_instruction=INSTRUCTION),
+    )
+    await manager.before_model_callback(context, request)
+    async for response in agent.model.generate_content_async(request):
+        manager.after_model_callback(context, response)
+
+
+def test_requests_share_one_cache() -> None:
+    """The first request creates the cache and later ones reuse it."""
+    manager, agent, model = _setup()
+
+    async def run() -> None:
+        for n in range(3):
+            await _request(manager, agent, n)
+
+    asyncio.run(run())
+    assert manager.stats.created == 1
+    assert manager.stats.hits == 3
+    assert model.prompts == [INSTRUCTION] * 3
+
+
+def test_small_prefixes_are_not_cached() -> None:
+    """Prefixes under the token minimum are sent as they are."""
+    manager, agent, model = _setup()
+    manager.min_tokens = 10_000
+    asyncio.run(_request(manager, agent, 0))
+    assert manager.stats.skipped == 1
+    assert manager.stats.created == 0
+    assert model.prompts == [INSTRUCTION]
+
+
+def test_expired_cache_is_recreated() -> None:
+    """An entry past its expiry is replaced rather than extended."""
+    manager, agent, model = _setup(ttl=0.05, refresh_margin=0)
+
+    async def run() -> None:
+        await _request(manager, agent, 0)
+        time.sleep(0.1)
+        await _request(manager, agent, 1)
+
+    asyncio.run(run())
+    assert manager.stats.created == 2
+    assert manager.stats.refreshed == 0
+    assert model.prompts == [INSTRUCTION] * 2
+
+
+def test_deleted_cache_is_resent_uncached() -> None:
+    """A cache removed on the server is dropped and the request resent."""
+    manager, agent, model = _setup()
+
+    async def run() -> None:
+        await _request(manager, agent, 0)
+        manager.backend.caches.clear()
+        await _request(manager, agent, 1)
+        await _request(manager, agent, 2)
+
+    asyncio.run(run())
+    assert model.prompts == [INSTRUCTION] * 3
+    assert manager.stats.fallbacks == 1
+    assert manager.stats.hits == 2
+    assert manager.stats.created == 2
+    assert "not found" in (manager.stats.last_error or "")
+    assert manager._stripped == {}
+
+
+def test_backend_failure_falls_back() -> None:
+    """A failing backend leaves requests uncached until the retry delay."""
+    manager, agent, model = _setup()
+
+    async def fail(*args: Any) -> None:
+        raise OSError("cache service unavailable")
+
+    manager.backend.create = fail
+
+    async def run() -> None:
+        for n in range(2):
+            await _request(manager, agent, n)
+
+    asyncio.run(run())
+    assert manager.stats.fallbacks == 2
+    assert manager.stats.hits == 0
+    assert model.prompts == [INSTRUCTION] * 2
+    assert manager.stats.last_error == "create: cache service unavailable"
@@ -0,0 +1,124 @@
+"""Tests for generating an SOP as a skeleton and concurrent parts."""
+
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List
+
+import google.genai.types as types
+import pytest
+from google.adk.events import Event
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import InMemoryRunner
+
+from agent_workflow_suite.core.agents.sop_markdown import SOPFanOutAgent
+from agent_workflow_suite.core.agents.sop_markdown.fanout import (
+    PARTS_FAILED,
+    REPORT_STATE_KEY,
+)
+from agent_workflow_suite.core.agents.sop_markdown.models import (
+    QualityMetrics,
+    RiskAssessment,
+    RiskLevel,
+    SOPProcessFlow,
+    SOPSection,
+    SOPSectionOutline,
+    SOPSkeleton,
+)
+from agent_workflow_suite.core.agents.sop_markdown.publish import sample_sop
+
+SKELETON = SOPSkeleton(
+    metadata=sample_sop().metadata,
+    sections=[
+        SOPSectionOutline(section_num="1", title="Log in"),
+        SOPSectionOutline(section_num="2", title="Submit the form"),
+    ],
+)
+
+
+class _Model(BaseLlm):
+    """Model answering each part from its instruction; some parts fail."""
+
+    failing: List[str] = []
+    instructions: Dict[str, str] = {}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        instruction = str(llm_request.config.system_instruction)
+        if "document skeleton" in instruction:
+            part, doc = "skeleton", SKELETON
+        elif 'Write section 1 ("' in instruction:
+            part, doc = "section 1", SOPSection(section_num="1", title="Log in")
+        elif 'Write section 2 ("' in instruction:
+            part, doc = "section 2", SOPSection(section_num="2", title="Submit")
+        elif "process flow" in instruction:
+            part, doc = "process_flow", SOPProcessFlow()
+        elif "quality metrics" in instruction:
+            part, doc = "quality_metrics", QualityMetrics()
+        else:
+            part, doc = "risk_assessment", RiskAssessment(risk_category=RiskLevel.LOW)
+        self.instructions[part] = instruction
+        text = "not json" if part in self.failing else doc.model_dump_json()
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)])
+        )
+
+
+def _run(agent: SOPFanOutAgent) -> Any:
+    """Run the agent once; returns its final event and the session state."""
+    runner = InMemoryRunner(agent=agent, app_name="sop")
+
+    async def run() -> Any:
+        session = await runner.session_service.create_session(
+            app_name="sop", user_id="user"
+        )
+        events: List[Event] = []
+        async for event in runner.run_async(
+            user_id="user",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="go")]),
+        ):
+            events.append(event)
+        session = await runner.session_service.get_session(
+            app_name="sop", user_id="user", session_id=session.id
+        )
+        return events[-1], session.state
+
+    return asyncio.run(run())
+
+
+def _agent(model: _Model, **kwargs: Any) -> SOPFanOutAgent:
+    """Fan-out agent on the fake model, without schema repair."""
+    return SOPFanOutAgent(name="sop", model=model, repairer=None, **kwargs)
+
+
+def test_every_part_is_given_the_skeleton_plan() -> None:
+    """Parts other than the skeleton see the metadata and section plan."""
+    model = _Model(model="fake")
+    event, state = _run(_agent(model))
+    assert event.error_code is None
+    assert state["sop_markdown"]["sections"][1]["title"] == "Submit"
+    for part in ("quality_metrics", "risk_assessment", "process_flow", "section 1"):
+        assert "## Section plan" in model.instructions[part]
+        assert "Submit the form" in model.instructions[part]
+        assert SKELETON.metadata.title in model.instructions[part]
+
+
+def test_failed_parts_are_reported_to_the_caller() -> None:
+    """A part that never validates is named in the event and the report."""
+    model = _Model(model="fake", failing=["section 2", "risk_assessment"])
+    event, state = _run(_agent(model))
+    assert event.error_code == PARTS_FAILED
+    assert "section 2" in event.error_message
+    assert "risk_assessment" in event.error_message
+    report = state[REPORT_STATE_KEY]
+    failed = [p["part"] for p in report["parts"] if not p["ok"]]
+    assert sorted(failed) == ["risk_assessment", "section 2"]
+    notes = state["sop_markdown"]["generation_notes"]
+    assert "Section 2 could not be generated" in notes
+
+
+def test_partial_sops_can_be_refused() -> None:
+    """With ``allow_partial=False`` a failed part fails the run."""
+    model = _Model(model="fake", failing=["quality_metrics"])
+    with pytest.raises(RuntimeError, match="quality_metrics"):
+        _run(_agent(model, allow_partial=False))
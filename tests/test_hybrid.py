@@ -0,0 +1,101 @@
+"""Tests for snapshot-first element resolution."""
+
+from types import SimpleNamespace
+from typing import Any
+
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ElementSelector,
+)
+from agent_workflow_suite.core.agents.worker import (
+    HybridBrowsing,
+    parse_snapshot,
+    resolve_selector,
+)
+from agent_workflow_suite.core.agents.worker.hybrid import selector_hints
+
+SNAPSHOT = """- Page URL: https://app.example/records/new
+- Page Snapshot:
+```yaml
+- heading "New record" [level=1] [ref=e1]
+- textbox "Name" [ref=e2]
+- textbox "Search" [ref=e3]
+- button "Save \\"draft\\"" [ref=e4]
+- link "Save and close" [ref=e5]
+- checkbox "Notify" [checked] [ref=e6]
+- generic "no ref here"
+```"""
+
+
+def test_snapshot_nodes_keep_refs_names_and_attributes() -> None:
+    """Lines without a ref are skipped and escaped quotes are unescaped."""
+    nodes = parse_snapshot(SNAPSHOT)
+    assert [n.ref for n in nodes] == ["e1", "e2", "e3", "e4", "e5", "e6"]
+    assert nodes[0].attributes == {"level": "1"}
+    assert nodes[3].name == 'Save "draft"'
+    assert nodes[5].attributes == {"checked": ""}
+
+
+def test_selector_hints_read_role_and_name() -> None:
+    """Role, CSS and text selectors yield what the snapshot can be searched by."""
+    assert selector_hints(ElementSelector(type="role", value='button "Save"')) == (
+        "button",
+        "Save",
+    )
+    assert selector_hints(
+        ElementSelector(type="css", value="input[placeholder='Search']")
+    ) == ("textbox", "Search")
+    assert selector_hints(ElementSelector(type="css", value="#save")) == (None, None)
+    assert selector_hints(ElementSelector(type="text", value="text=Notify")) == (
+        None,
+        "Notify",
+    )
+
+
+def test_resolve_prefers_exact_names_within_the_role() -> None:
+    """A role narrows the candidates; a name in another role is not a match."""
+    nodes = parse_snapshot(SNAPSHOT)
+    node, via = resolve_selector(nodes, ElementSelector(type="text", value="Name"))
+    assert (node.ref, via) == ("e2", "selector")
+    node, _ = resolve_selector(nodes, ElementSelector(type="role", value='link "Save"'))
+    assert node.ref == "e5"
+    node, _ = resolve_selector(
+        nodes, ElementSelector(type="role", value='combobox "Name"')
+    )
+    assert node is None
+
+
+def test_resolve_falls_back_to_the_description() -> None:
+    """An unusable selector leaves the description to find the element."""
+    nodes = parse_snapshot(SNAPSHOT)
+    node, via = resolve_selector(
+        nodes,
+        ElementSelector(type="css", value="div > span:nth-child(3)"),
+        "the Notify checkbox below the form",
+    )
+    assert (node.ref, via) == ("e6", "description")
+
+
+def _call(browsing: HybridBrowsing, invocation: str, name: str, **args: Any) -> None:
+    """Record one tool call of an invocation."""
+    browsing.after_tool_callback(
+        SimpleNamespace(name=name),
+        args,
+        SimpleNamespace(invocation_id=invocation),
+        SNAPSHOT,
+    )
+
+
+def test_usage_is_kept_per_invocation() -> None:
+    """Each invocation has its own usage; the totals cover all of them."""
+    browsing = HybridBrowsing()
+    _call(browsing, "a", "browser_click", ref="e4")
+    _call(browsing, "a", "browser_snapshot")
+    _call(browsing, "b", "browser_screen_click", x=1, y=2)
+    assert browsing.usage_for("a").snapshot_calls == 1
+    assert browsing.usage_for("a").snapshots == 1
+    assert browsing.usage_for("b").vision_calls == 1
+    assert browsing.usage.interactions() == 2
+    browsing.reset()
+    assert browsing.usage.interactions() == 0
+    assert browsing.usage_for("a").interactions() == 0
+    assert browsing.latest_snapshot("a") is None
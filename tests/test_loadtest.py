@@ -0,0 +1,27 @@
+"""Tests for the load-test harness."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from agent_workflow_suite.core.execution import SessionScheduler
+from agent_workflow_suite.core.loadtest import harness
+
+
+def test_failed_run_stops_sampling_and_raises(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Any
+) -> None:
+    """A scheduler failure propagates and leaves no sampler task running."""
+
+    async def fail(self: SessionScheduler, *args: Any) -> None:
+        raise RuntimeError("scheduler failed")
+
+    monkeypatch.setattr(SessionScheduler, "run", fail)
+
+    async def run() -> int:
+        with pytest.raises(RuntimeError, match="scheduler failed"):
+            await harness.run_load_test(1, 1, session_root=str(tmp_path))
+        return len(asyncio.all_tasks()) - 1
+
+    assert asyncio.run(run()) == 0
@@ -0,0 +1,145 @@
+"""Tests for offloading large agent outputs to artifacts and rehydrating them."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.genai.types as types
+from google.adk.models import LlmRequest, LlmResponse
+from pydantic import BaseModel
+
+from agent_workflow_suite.core.state import (
+    ArtifactRef,
+    OutputCache,
+    load_state_model,
+    offload_output,
+    rehydrate_outputs,
+    store_output,
+)
+
+
+class _Doc(BaseModel):
+    """Structured output whose size is set by its items."""
+
+    items: List[str]
+
+
+class _Context:
+    """Callback context with session state and an in-memory artifact store."""
+
+    def __init__(self, artifacts: bool = True) -> None:
+        self.state: Dict[str, Any] = {}
+        self.artifacts: Optional[Dict[Tuple[str, int], types.Part]] = (
+            {} if artifacts else None
+        )
+        self.loads = 0
+
+    async def save_artifact(self, filename: str, artifact: types.Part) -> int:
+        if self.artifacts is None:
+            raise ValueError("Artifact service is not initialized.")
+        version = sum(1 for name, _ in self.artifacts if name == filename)
+        self.artifacts[(filename, version)] = artifact
+        return version
+
+    async def load_artifact(
+        self, filename: str, version: Optional[int] = None
+    ) -> Optional[types.Part]:
+        self.loads += 1
+        return (self.artifacts or {}).get((filename, version or 0))
+
+
+def _large() -> _Doc:
+    """A document well over the offload threshold."""
+    return _Doc(items=[f"item {i}" for i in range(1000)])
+
+
+def test_small_outputs_stay_inline() -> None:
+    """Outputs under the threshold are stored in state as plain JSON."""
+    context = _Context()
+    doc = _Doc(items=["a"])
+
+    async def run() -> Optional[_Doc]:
+        assert await store_output(context, "out", doc) is None
+        return await load_state_model(context, "out", _Doc)
+
+    assert asyncio.run(run()) == doc
+    assert context.state["out"] == {"items": ["a"]}
+    assert not context.artifacts
+
+
+def test_large_outputs_round_trip_through_artifacts() -> None:
+    """Only a reference is kept in state and the document loads back intact."""
+    context = _Context()
+    doc = _large()
+
+    async def run() -> Optional[_Doc]:
+        await store_output(context, "out", doc)
+        return await load_state_model(context, "out", _Doc)
+
+    assert asyncio.run(run()) == doc
+    assert ArtifactRef.is_ref(context.state["out"])
+    assert context.loads == 1
+
+
+def test_without_artifact_service_outputs_stay_inline() -> None:
+    """Large outputs fall back to state when artifacts cannot be saved."""
+    context = _Context(artifacts=False)
+    doc = _large()
+    assert asyncio.run(store_output(context, "out", doc)) is None
+    assert context.state["out"] == doc.model_dump(mode="json")
+
+
+def test_cache_is_owned_by_its_caller() -> None:
+    """A cache skips artifact reads for its owner only."""
+    context = _Context()
+    doc = _large()
+    writer_cache, reader_cache = OutputCache(), OutputCache()
+
+    async def run() -> None:
+        await store_output(context, "out", doc, cache=writer_cache)
+        for _ in range(2):
+            assert await load_state_model(context, "out", _Doc, writer_cache) == doc
+        assert context.loads == 0
+        for _ in range(2):
+            assert await load_state_model(context, "out", _Doc, reader_cache) == doc
+        assert context.loads == 1
+        await load_state_model(context, "out", _Doc)
+        assert context.loads == 2
+
+    asyncio.run(run())
+    assert len(writer_cache) == len(reader_cache) == 1
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """A cache holds at most ``size`` documents."""
+    cache = OutputCache(size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+
+def test_offloaded_output_is_rehydrated_into_the_request() -> None:
+    """The model response carries the reference; later requests get the doc."""
+    context = _Context()
+    doc = _large()
+    response = LlmResponse(
+        content=types.Content(
+            role="model", parts=[types.Part(text=doc.model_dump_json())]
+        )
+    )
+    request = LlmRequest(config=types.GenerateContentConfig())
+
+    async def run() -> Optional[LlmResponse]:
+        replaced = await offload_output("out", _Doc)(context, response)
+        await rehydrate_outputs(["out"])(context, request)
+        return replaced
+
+    replaced = asyncio.run(run())
+    assert replaced is not None and replaced.content and replaced.content.parts
+    ref = ArtifactRef.model_validate_json(replaced.content.parts[0].text or "")
+    assert ref.size > 4 * 1024
+    instruction = str(request.config.system_instruction)
+    assert "## out" in instruction
+    assert doc.model_dump_json(exclude_none=True) in instruction
@@ -0,0 +1,141 @@
+"""Tests for the Playwright MCP script optimizer."""
+
+from typing import Any, List
+
+import pytest
+
+from agent_workflow_suite.core.agents.playwright_transcription import (
+    ActionStep,
+    PlaywrightAction,
+    ScriptOptimization,
+    compile_mcp_script,
+    optimize_actions,
+    optimizer,
+)
+
+
+def _step(num: int, action: PlaywrightAction, **kwargs: Any) -> ActionStep:
+    """Detected step at ``num`` seconds."""
+    return ActionStep(num=num, start=num, end=num + 0.5, action=action, **kwargs)
+
+
+def _navigate(num: int, url: str) -> ActionStep:
+    """Navigation step to ``url``."""
+    return _step(num, PlaywrightAction.NAVIGATE, url=url, mcp_params={"url": url})
+
+
+def test_hoisting_keeps_text_waits_and_screenshots() -> None:
+    """A save confirmation and its screenshot survive a following navigation."""
+    actions = [
+        _navigate(1, "https://app.example/form"),
+        _step(2, PlaywrightAction.CLICK, element_desc="Save", mcp_params={"ref": "e1"}),
+        _step(3, PlaywrightAction.WAIT_FOR, mcp_params={"text": "Saved"}),
+        _step(4, PlaywrightAction.TAKE_SCREENSHOT),
+        _navigate(5, "https://app.example/list"),
+    ]
+    report = optimize_actions(actions)
+    assert [step.num for step in report.actions] == [1, 2, 3, 4, 5]
+    assert report.hoisted_navigations == 0
+
+
+def test_hoisting_drops_view_only_steps_and_sleeps() -> None:
+    """Scrolls, pointer moves and sleeps before a navigation are discarded."""
+    actions = [
+        _navigate(1, "https://app.example/form"),
+        _step(2, PlaywrightAction.SCROLL, mcp_params={"deltaY": 400}),
+        _step(3, PlaywrightAction.SCREEN_MOVE_MOUSE, coordinates={"x": 5, "y": 5}),
+        _step(4, PlaywrightAction.WAIT_FOR, mcp_params={"time": 2}),
+        _navigate(5, "https://app.example/list"),
+    ]
+    report = optimize_actions(actions)
+    assert [step.num for step in report.actions] == [5]
+    assert report.hoisted_navigations == 4
+
+
+def test_optimized_script_keeps_waits_and_evidence() -> None:
+    """Only screenshots of an unchanged page are dropped; text waits all stay."""
+    actions = [
+        _navigate(1, "https://app.example/form"),
+        _step(2, PlaywrightAction.TAKE_SCREENSHOT),
+        _step(3, PlaywrightAction.TAKE_SCREENSHOT),
+        _step(4, PlaywrightAction.TYPE, element_desc="Name", text_input="A"),
+        _step(5, PlaywrightAction.TYPE, element_desc="Name", text_input="B"),
+        _step(6, PlaywrightAction.WAIT_FOR, mcp_params={"textGone": "Loading"}),
+        _step(7, PlaywrightAction.WAIT_FOR, mcp_params={"text": "Ready"}),
+        _step(8, PlaywrightAction.TAKE_SCREENSHOT),
+        _navigate(9, "https://app.example/next"),
+    ]
+    report = compile_mcp_script(actions)
+    waits = [
+        step.mcp_params
+        for step in report.actions
+        if step.action == PlaywrightAction.WAIT_FOR
+    ]
+    screenshots = [
+        step.num
+        for step in report.actions
+        if step.action == PlaywrightAction.TAKE_SCREENSHOT
+    ]
+    assert waits == [{"textGone": "Loading"}, {"text": "Ready"}]
+    assert screenshots == [2, 8]
+    assert report.dropped_screenshots == 1
+
+
+def test_pass_dropping_a_text_wait_is_rejected(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A pass that loses a text wait fails instead of emitting the script."""
+
+    def drop_waits(
+        actions: List[ActionStep], report: ScriptOptimization
+    ) -> List[ActionStep]:
+        return [step for step in actions if step.action != PlaywrightAction.WAIT_FOR]
+
+    monkeypatch.setattr(optimizer, "OPTIMIZATION_PASSES", [drop_waits])
+    actions = [_step(1, PlaywrightAction.WAIT_FOR, mcp_params={"text": "Saved"})]
+    with pytest.raises(ValueError):
+        optimize_actions(actions)
+
+
+def test_coalesced_typing_emits_the_whole_text() -> None:
+    """Recorded per-keystroke text does not override the merged fill."""
+    actions = [
+        _step(n, PlaywrightAction.TYPE, element_desc="Name", mcp_params={"text": c})
+        for n, c in enumerate("abc", 1)
+    ]
+    report = compile_mcp_script(actions)
+    assert report.commands == ["browser_type(element='Name', text='abc')"]
+
+
+@pytest.mark.parametrize(
+    "between",
+    [
+        _step(2, PlaywrightAction.WAIT_FOR, mcp_params={"time": 5}),
+        _step(2, PlaywrightAction.SCREEN_MOVE_MOUSE, coordinates={"x": 5, "y": 5}),
+    ],
+)
+def test_screenshot_after_wait_or_hover_is_kept(between: ActionStep) -> None:
+    """Time passing or a hover can change the page, so both captures stay."""
+    actions = [
+        _step(1, PlaywrightAction.TAKE_SCREENSHOT),
+        between,
+        _step(3, PlaywrightAction.TAKE_SCREENSHOT),
+    ]
+    report = optimize_actions(actions)
+    assert [step.num for step in report.actions] == [1, 2, 3]
+    assert report.dropped_screenshots == 0
+
+
+def test_fractional_scrolls_and_waits_are_summed() -> None:
+    """Float deltas are merged and short sleeps are not rounded to zero."""
+    actions = [
+        _step(1, PlaywrightAction.SCROLL, mcp_params={"deltaY": 100.5}),
+        _step(2, PlaywrightAction.SCROLL, mcp_params={"deltaY": 50}),
+        _step(3, PlaywrightAction.WAIT_FOR, mcp_params={"time": 0.2}),
+        _step(4, PlaywrightAction.WAIT_FOR, mcp_params={"time": 0.2}),
+    ]
+    report = optimize_actions(actions)
+    assert [step.mcp_params for step in report.actions] == [
+        {"deltaY": 150.5},
+        {"time": 0.4},
+    ]
@@ -0,0 +1,223 @@
+"""Tests for dependency-aware SOP execution across browser branches."""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from agent_workflow_suite.core.agents.sop_markdown.models import (
+    SOPMarkdown,
+    SOPSection,
+    SOPStep,
+    StepType,
+)
+from agent_workflow_suite.core.agents.sop_markdown.publish import sample_sop
+from agent_workflow_suite.core.execution import (
+    CompletionStatus,
+    PlanRunReport,
+    PlanScheduler,
+    SessionPool,
+    SessionScheduler,
+    TabPool,
+    WorkItem,
+)
+
+BROWSER_SECONDS = 0.2
+
+
+class _FakeBrowser:
+    """Browser with tabs that reports its page like Playwright MCP.
+
+    Every call takes ``BROWSER_SECONDS``; ``visited`` lists navigations and
+    ``clicked_on`` the page of every click.
+    """
+
+    def __init__(self) -> None:
+        self.tabs = ["about:blank"]
+        self.current = 0
+        self.visited: List[str] = []
+        self.clicked_on: List[str] = []
+
+    async def call(self, tool_name: str, args: Dict[str, Any]) -> str:
+        await asyncio.sleep(BROWSER_SECONDS)
+        if tool_name == "browser_navigate":
+            self.tabs[self.current] = args["url"]
+            self.visited.append(args["url"])
+        elif tool_name == "browser_tab_new":
+            self.tabs.append(args.get("url", "about:blank"))
+            self.current = len(self.tabs) - 1
+        elif tool_name == "browser_tab_select":
+            self.current = args["index"]
+        elif tool_name == "browser_click":
+            self.clicked_on.append(self.tabs[self.current])
+        return f"- Page URL: {self.tabs[self.current]}"
+
+
+class _FakeTool:
+    """Tool of a fake browser."""
+
+    def __init__(self, name: str, browser: _FakeBrowser):
+        self.name = name
+        self.browser = browser
+
+    async def run_async(self, args: Dict[str, Any], tool_context: Any) -> str:
+        return await self.browser.call(self.name, args)
+
+
+class _FakeToolset:
+    """Playwright MCP toolset of one fake browser."""
+
+    def __init__(self) -> None:
+        self.browser = _FakeBrowser()
+
+    async def get_tools(self) -> List[_FakeTool]:
+        names = ("browser_navigate", "browser_tab_new", "browser_click")
+        return [_FakeTool(n, self.browser) for n in names]
+
+    async def close(self) -> None:
+        return None
+
+
+def _step(
+    num: str, url: str, dependencies: List[str], command: Optional[str] = None
+) -> SOPStep:
+    """Step opening ``url``, or running ``command``, after ``dependencies``."""
+    return SOPStep(
+        step_num=num,
+        step_type=StepType.ACTION,
+        title=f"Step {num}",
+        description="Open the page",
+        responsible_role="Operator",
+        dependencies=dependencies,
+        mcp_commands=[command or f"browser_navigate(url='{url}')"],
+    )
+
+
+def _sop(sections: List[SOPSection]) -> SOPMarkdown:
+    """Sample SOP with the given sections and no process flow."""
+    return sample_sop().model_copy(update={"sections": sections, "process_flow": []})
+
+
+def _overlapping(report: PlanRunReport, steps: List[str]) -> bool:
+    """Whether all of ``steps`` were running at one moment."""
+    results = [r for r in report.results if r.step_num in steps]
+    return max(r.started for r in results) < min(r.started + r.seconds for r in results)
+
+
+def _branches_sop() -> SOPMarkdown:
+    """SOP with a login step followed by three independent branches."""
+    sections = [
+        SOPSection(
+            section_num="1",
+            title="Log in",
+            steps=[_step("1.1", "https://app.example/login", [])],
+        )
+    ] + [
+        SOPSection(
+            section_num=str(n),
+            title=f"Gather {n}",
+            steps=[_step(f"{n}.1", f"https://app.example/{n}", ["Step 1.1"])],
+        )
+        for n in (2, 3, 4)
+    ]
+    return _sop(sections)
+
+
+def _forking_sop() -> SOPMarkdown:
+    """SOP that opens a list, then clicks two of its rows at once."""
+    click = "browser_click(element='Row', ref='e2')"
+    return _sop(
+        [
+            SOPSection(
+                section_num="1",
+                title="Review list",
+                steps=[
+                    _step("1.1", "https://app.example/list", []),
+                    _step("1.2", "", ["Step 1.1"], click),
+                    _step("1.3", "", ["Step 1.1"], click),
+                ],
+            )
+        ]
+    )
+
+
+def test_session_pool_overlaps_browser_calls(tmp_path: Any) -> None:
+    """Branches run in their own sessions at once, each after the login."""
+    toolsets: List[_FakeToolset] = []
+
+    def factory(profile: str, output: str) -> _FakeToolset:
+        toolsets.append(_FakeToolset())
+        return toolsets[-1]
+
+    scheduler = SessionScheduler(
+        max_sessions=3, session_root=str(tmp_path), toolset_factory=factory
+    )
+    pool = SessionPool(scheduler, WorkItem(item_id="run"))
+
+    async def run() -> Any:
+        try:
+            return await PlanScheduler(tabs=pool).run(_branches_sop())
+        finally:
+            await pool.close()
+            await scheduler.close()
+
+    report = asyncio.run(run())
+    assert report.ok()
+    assert report.max_parallel == 3
+    assert report.tabs_opened == 3
+    assert _overlapping(report, ["2.1", "3.1", "4.1"])
+    assert report.serialized_seconds == 0.0
+    # The login step is replayed in every session before its branch
+    for toolset in toolsets:
+        assert toolset.browser.visited[0] == "https://app.example/login"
+
+
+def test_tab_pool_reports_serialized_browser_time() -> None:
+    """Tab mode runs browser calls one at a time and reports their time."""
+
+    async def call(tool_name: str, args: Dict[str, Any]) -> str:
+        await asyncio.sleep(BROWSER_SECONDS)
+        return "ok"
+
+    report = asyncio.run(PlanScheduler(tabs=TabPool(call, 3)).run(_branches_sop()))
+    assert report.ok()
+    assert report.serialized_seconds >= 4 * BROWSER_SECONDS
+
+
+def test_forked_branch_starts_on_parent_page() -> None:
+    """A step forked into a new tab runs on the page its parent opened."""
+    browser = _FakeBrowser()
+    pool = TabPool(browser.call, 2)
+    report = asyncio.run(PlanScheduler(tabs=pool).run(_forking_sop()))
+    assert report.ok()
+    assert report.tabs_opened == 1
+    assert browser.clicked_on == ["https://app.example/list"] * 2
+
+
+def test_failed_session_lease_fails_only_its_step(tmp_path: Any) -> None:
+    """A session that cannot start fails its step without aborting the run."""
+    started = []
+
+    def factory(profile: str, output: str) -> _FakeToolset:
+        started.append(profile)
+        if len(started) > 1:
+            raise OSError("browser did not start")
+        return _FakeToolset()
+
+    scheduler = SessionScheduler(
+        max_sessions=2, session_root=str(tmp_path), toolset_factory=factory
+    )
+    pool = SessionPool(scheduler, WorkItem(item_id="run"))
+
+    async def run() -> Any:
+        try:
+            return await PlanScheduler(tabs=pool).run(_forking_sop())
+        finally:
+            await pool.close()
+            await scheduler.close()
+
+    report = asyncio.run(run())
+    statuses = sorted(r.status for r in report.results)
+    assert statuses == sorted(
+        [CompletionStatus.COMPLETED] * 2 + [CompletionStatus.FAILED]
+    )
+    failed = next(r for r in report.results if r.status == CompletionStatus.FAILED)
+    assert failed.error == "OSError: browser did not start"
@@ -0,0 +1,83 @@
+"""Tests for the model and tool call profiler."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import LlmResponse
+
+from agent_workflow_suite.core.profiling import ExecutionProfiler, SpanKind
+
+
+def _context(invocation_id: str = "inv") -> Any:
+    """Callback context with empty session state."""
+    return SimpleNamespace(state={}, invocation_id=invocation_id, agent_name="agent")
+
+
+def _noop(*args: Any) -> None:
+    return None
+
+
+def test_attach_times_only_the_call() -> None:
+    """The agent's own before callbacks run ahead of the model span."""
+    agent = LlmAgent(
+        name="agent",
+        model="gemini-2.5-pro",
+        before_model_callback=_noop,
+        after_model_callback=_noop,
+    )
+    profiler = ExecutionProfiler()
+    profiler.attach(agent)
+    assert agent.before_model_callback == [_noop, profiler.before_model_callback]
+    assert agent.after_model_callback == [profiler.after_model_callback, _noop]
+    assert agent.before_tool_callback == [profiler.before_tool_callback]
+
+
+def test_guard_records_calls_that_raise() -> None:
+    """A model call that raises is closed as a failed span."""
+    profiler = ExecutionProfiler()
+
+    async def run() -> None:
+        with profiler.guard():
+            profiler.before_model_callback(_context(), None)
+            raise RuntimeError("model unavailable")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert profiler._open == {}
+    [span] = profiler.report().spans
+    assert span.kind == SpanKind.MODEL
+    assert span.failed
+
+
+def test_guard_leaves_other_tasks_spans_open() -> None:
+    """Only calls opened by the failing run are closed."""
+    profiler = ExecutionProfiler()
+
+    async def other() -> None:
+        profiler.before_model_callback(_context("other"), None)
+
+    async def run() -> None:
+        await asyncio.create_task(other())
+        with profiler.guard():
+            profiler.before_model_callback(_context(), None)
+            raise RuntimeError("model unavailable")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert len(profiler._open) == 1
+    assert [span.item_id for span in profiler.spans] == ["inv"]
+
+
+def test_reopened_call_closes_the_stale_span() -> None:
+    """A call reopened under the same key closes the stale span as failed."""
+    profiler = ExecutionProfiler()
+    context = _context()
+    profiler.before_model_callback(context, None)
+    profiler.before_model_callback(context, None)
+    profiler.after_model_callback(context, LlmResponse(partial=True))
+    assert len(profiler.spans) == 1
+    profiler.after_model_callback(context, LlmResponse())
+    assert [span.failed for span in profiler.spans] == [True, False]
@@ -0,0 +1,109 @@
+"""Tests for bulk publishing of SOP documents."""
+
+import html
+import os
+import stat
+from pathlib import Path
+from typing import Any, Iterator, Tuple
+
+from agent_workflow_suite.core.agents.sop_markdown import (
+    iter_html,
+    iter_markdown,
+    publish_sops,
+)
+from agent_workflow_suite.core.agents.sop_markdown.publish import sample_sop
+
+# Fields rendered in another form than their stored text: pipeline references,
+# the flow element type (a Mermaid shape) and the revision date (YYYY-MM-DD)
+_NOT_VERBATIM = (
+    "nl_agent_output",
+    "playwright_output",
+    "element_type",
+    "revision_date",
+)
+
+
+def _store(directory: Path, file_name: str, sop_id: str, version: str) -> str:
+    """Write a sample SOP with the given id and version as JSON."""
+    sop = sample_sop()
+    sop.metadata.sop_id = sop_id
+    sop.metadata.version = version
+    path = directory / file_name
+    path.write_text(sop.model_dump_json())
+    return str(path)
+
+
+def test_distinct_sops_get_distinct_files(tmp_path: Path) -> None:
+    """Revisions and ids that sanitize alike are published separately."""
+    source = tmp_path / "sops"
+    source.mkdir()
+    _store(source, "a.json", "SOP/1", "1.0")
+    _store(source, "b.json", "SOP:1", "1.0")
+    _store(source, "c.json", "SOP:1", "2.0")
+    report = publish_sops([str(source)], str(tmp_path / "out"), formats=["md"])
+    assert report.failures == []
+    assert len(os.listdir(tmp_path / "out" / "markdown")) == 3
+
+
+def test_duplicate_outputs_are_reported_not_overwritten(tmp_path: Path) -> None:
+    """Two files publishing to the same name both fail before rendering."""
+    source = tmp_path / "sops"
+    source.mkdir()
+    first = _store(source, "a.json", "SOP-7", "1.0")
+    second = _store(source, "b.json", "SOP-7", "1.0")
+    _store(source, "c.json", "SOP-8", "1.0")
+    report = publish_sops(
+        [str(source)], str(tmp_path / "out"), formats=["md"], workers=2, batch_size=1
+    )
+    assert sorted(f.source for f in report.failures) == [first, second]
+    assert report.documents == 1
+    assert os.listdir(tmp_path / "out" / "markdown") == ["SOP-8-v1.0.md"]
+
+
+def _texts(value: Any, path: str = "") -> Iterator[Tuple[str, str]]:
+    """Every text value of a dumped model, with its field path."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _texts(item, f"{path}.{key}")
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from _texts(item, f"{path}[{i}]")
+    elif isinstance(value, str) and not path.endswith(_NOT_VERBATIM):
+        yield path, value.strip()
+
+
+def test_every_field_is_rendered() -> None:
+    """Each text field of a fully populated SOP appears in both formats."""
+    sop = sample_sop(sections=2, steps=3)
+    markdown = "".join(iter_markdown(sop))
+    page = "".join(iter_html(sop))
+    fields = list(_texts(sop.model_dump(mode="json")))
+    assert len(fields) > 100
+    assert [path for path, text in fields if text not in markdown] == []
+    assert [path for path, text in fields if html.escape(text) not in page] == []
+    assert "2026-01-01" in markdown and "2026-01-01" in page
+
+
+def test_html_escapes_document_text() -> None:
+    """Markup in SOP text is shown as text, never emitted as HTML."""
+    sop = sample_sop(sections=1, steps=1)
+    sop.metadata.title = "<script>alert('x')</script> & more"
+    sop.sections[0].steps[0].description = 'Click <b>"Save"</b>'
+    page = "".join(iter_html(sop))
+    assert "<script>alert" not in page
+    assert "&lt;script&gt;alert(&#x27;x&#x27;)&lt;/script&gt; &amp; more" in page
+    assert "Click &lt;b&gt;&quot;Save&quot;&lt;/b&gt;" in page
+
+
+def test_published_files_are_world_readable(tmp_path: Path) -> None:
+    """Rendered files keep no temporary files and are readable by everyone."""
+    source = tmp_path / "sops"
+    source.mkdir()
+    _store(source, "a.json", "SOP-1", "1.0")
+    (source / "bad.json").write_text("{not json")
+    report = publish_sops([str(source)], str(tmp_path / "out"))
+    assert [Path(f.source).name for f in report.failures] == ["bad.json"]
+    for fmt in ("markdown", "html"):
+        [name] = os.listdir(tmp_path / "out" / fmt)
+        mode = os.stat(tmp_path / "out" / fmt / name).st_mode
+        assert mode & stat.S_IROTH
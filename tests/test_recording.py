@@ -0,0 +1,184 @@
+"""Tests for streaming ingestion of large screen recordings."""
+
+import asyncio
+import hashlib
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import google.genai.types as types
+from google.adk.models import LlmRequest
+
+from agent_workflow_suite.core.ingestion import (
+    RECORDING_STATE_KEY,
+    attach_recording,
+    ingest_recording,
+    iter_chunks,
+    prepare_recording,
+    recording_state,
+)
+from agent_workflow_suite.core.ingestion.recording import CHUNK_SIZE
+
+# Sparse, so it takes no disk space but still reads as 2 GiB of zeros
+RECORDING_SIZE = 2 * 1024**3
+# Memory allowed on top of the read buffer
+MEMORY_BOUND = 4 * CHUNK_SIZE
+
+
+# Run in a fresh interpreter, whose peak RSS before ingesting is just imports
+_RSS_SCRIPT = """
+import resource, sys
+from agent_workflow_suite.core.ingestion import ingest_recording
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+ingest_recording(sys.argv[1])
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+scale = 1 if sys.platform == "darwin" else 1024
+print((after - before) * scale)
+"""
+
+
+def _ingest_rss_growth(path: Path) -> int:
+    """Peak RSS growth, in bytes, of ingesting ``path`` in a new process."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run(
+        [sys.executable, "-c", _RSS_SCRIPT, str(path)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return int(out.stdout.split()[-1])
+
+
+def _sparse_recording(tmp_path: Path) -> Path:
+    """A ``RECORDING_SIZE`` sparse MP4 file ending in a known marker."""
+    path = tmp_path / "recording.mp4"
+    with open(path, "wb") as f:
+        f.truncate(RECORDING_SIZE - 4)
+        f.seek(0, 2)
+        f.write(b"tail")
+    return path
+
+
+def test_ingest_hashes_multi_gb_file_in_bounded_memory(tmp_path: Path) -> None:
+    """Hashing a 2 GiB recording allocates about one read buffer."""
+    path = _sparse_recording(tmp_path)
+    tracemalloc.start()
+    try:
+        ref = ingest_recording(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss_growth = _ingest_rss_growth(path)
+
+    digest = hashlib.sha256()
+    zeros = bytes(CHUNK_SIZE)
+    for _ in range((RECORDING_SIZE - 4) // CHUNK_SIZE):
+        digest.update(zeros)
+    digest.update(bytes((RECORDING_SIZE - 4) % CHUNK_SIZE) + b"tail")
+    assert ref.size == RECORDING_SIZE
+    assert ref.sha256 == digest.hexdigest()
+    assert peak < MEMORY_BOUND
+    assert rss_growth < MEMORY_BOUND
+
+
+def test_iter_chunks_reuses_one_buffer(tmp_path: Path) -> None:
+    """Chunking a multi-GB file yields views of a single buffer."""
+    path = _sparse_recording(tmp_path)
+    offset = RECORDING_SIZE - 3 * CHUNK_SIZE
+    tracemalloc.start()
+    try:
+        buffers = set()
+        total = 0
+        last = b""
+        for chunk in iter_chunks(str(path), offset=offset):
+            buffers.add(id(chunk.obj))
+            total += len(chunk)
+            last = bytes(chunk[-4:])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert total == 3 * CHUNK_SIZE
+    assert last == b"tail"
+    assert len(buffers) == 1
+    assert peak < MEMORY_BOUND
+
+
+class _Files:
+    """Files API double that counts uploads."""
+
+    def __init__(self) -> None:
+        self.uploads: List[str] = []
+
+    async def upload(self, file: str, config: Any) -> types.File:
+        self.uploads.append(file)
+        return types.File(
+            name="files/rec", uri="https://files/rec", state=types.FileState.ACTIVE
+        )
+
+
+def _context(state: Dict[str, Any], user_content: Any = None) -> Any:
+    """Callback context carrying session state and the user message."""
+    return SimpleNamespace(state=state, user_content=user_content)
+
+
+def test_prepare_uploads_the_state_recording_once(tmp_path: Path) -> None:
+    """The reference in state is uploaded once and stored with its URI."""
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"video")
+    files = _Files()
+    callback = prepare_recording(SimpleNamespace(aio=SimpleNamespace(files=files)))
+    state = recording_state(ingest_recording(path))
+
+    for _ in range(2):
+        assert asyncio.run(callback(callback_context=_context(state))) is None
+    assert files.uploads == [str(path)]
+    assert state[RECORDING_STATE_KEY]["file_uri"] == "https://files/rec"
+
+
+def test_prepare_spills_an_inline_video_to_disk(tmp_path: Path) -> None:
+    """A video sent inline is written once and referenced from state."""
+    files = _Files()
+    callback = prepare_recording(
+        SimpleNamespace(aio=SimpleNamespace(files=files)), spill_dir=str(tmp_path)
+    )
+    message = types.Content(
+        role="user",
+        parts=[types.Part.from_bytes(data=b"video", mime_type="video/mp4")],
+    )
+    state: Dict[str, Any] = {}
+
+    asyncio.run(callback(callback_context=_context(state, message)))
+    ref = state[RECORDING_STATE_KEY]
+    assert Path(ref["path"]).read_bytes() == b"video"
+    assert ref["sha256"] == hashlib.sha256(b"video").hexdigest()
+    assert files.uploads == [ref["path"]]
+
+
+def test_attach_sends_the_recording_by_uri(tmp_path: Path) -> None:
+    """Inline video bytes in the request are replaced by one file part."""
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"video")
+    ref = ingest_recording(path).model_copy(update={"file_uri": "https://files/rec"})
+    request = LlmRequest(
+        contents=[
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_bytes(data=b"video", mime_type="video/mp4"),
+                    types.Part.from_text(text="Transcribe this"),
+                ],
+            )
+        ]
+    )
+
+    for _ in range(2):
+        attach_recording(_context(recording_state(ref)), request)
+    parts = request.contents[0].parts or []
+    assert [p.file_data.file_uri for p in parts if p.file_data] == ["https://files/rec"]
+    assert not any(p.inline_data for p in parts)
+    assert parts[-1].text == "Transcribe this"
@@ -0,0 +1,167 @@
+"""Tests for splicing refined segments back into transcriptions."""
+
+from datetime import datetime
+from typing import Any
+
+from agent_workflow_suite.core.agents.nl_transcription.models import (
+    ActionType,
+    Confidence,
+    Metadata,
+    Quality,
+    Step,
+    Summary,
+    Transcription,
+)
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ActionStep,
+    DetectionConfidence,
+    DetectionQuality,
+    ElementSelector,
+    PlaywrightAction,
+    PlaywrightTranscription,
+    RecordingMetadata,
+    WorkflowSummary,
+)
+from agent_workflow_suite.core.agents.refinement.models import RefinementSegment
+from agent_workflow_suite.core.agents.refinement.refine import (
+    splice_playwright,
+    splice_transcription,
+)
+
+
+def _step(num: int, start: float, end: float, **kwargs: Any) -> Step:
+    """NL step between ``start`` and ``end`` seconds."""
+    return Step(
+        num=num,
+        start=start,
+        end=end,
+        action=ActionType.FORM,
+        desc=f"Step at {start}s",
+        intent="Fill the form",
+        **kwargs,
+    )
+
+
+def _transcription() -> Transcription:
+    """Transcription whose second step is unclear."""
+    return Transcription(
+        metadata=Metadata(
+            id="rec",
+            duration=30.0,
+            resolution="1920x1080",
+            recorded=datetime(2026, 1, 1),
+        ),
+        summary=Summary(
+            task="Enter order",
+            objective="Save the order",
+            duration=30.0,
+            efficiency="ok",
+            expertise="expert",
+            completion="complete",
+        ),
+        steps=[
+            _step(1, 8.0, 11.0),
+            _step(2, 12.0, 14.0, confidence=Confidence.LOW),
+            _step(3, 25.0, 26.0, notes="Repeats step 1"),
+        ],
+        quality=Quality(
+            overall=Confidence.MEDIUM,
+            clarity="mostly clear",
+            clear_steps=2,
+            unclear_steps=1,
+            unclear_moments=["Step 2 is blurred", "steps 1 and 3 look alike"],
+            process_time=1.0,
+            model_version="test",
+        ),
+        work_context="Order entry",
+    )
+
+
+def test_boundary_step_is_neither_lost_nor_duplicated() -> None:
+    """A step starting before the segment stays; refined copies of it are ignored."""
+    segment = RefinementSegment(start=10.0, end=20.0)
+    refined = [_step(1, 9.0, 11.0), _step(2, 12.5, 13.0), _step(3, 15.0, 16.0)]
+    result, removed, added = splice_transcription(_transcription(), segment, refined)
+    assert [s.start for s in result.steps] == [8.0, 12.5, 15.0, 25.0]
+    assert [s.num for s in result.steps] == [1, 2, 3, 4]
+    assert (removed, added) == (1, 2)
+
+
+def test_references_follow_renumbered_steps() -> None:
+    """References to old step numbers are rewritten to the new ones."""
+    segment = RefinementSegment(start=10.0, end=20.0)
+    refined = [_step(1, 12.5, 13.0), _step(2, 15.0, 16.0)]
+    result, _, _ = splice_transcription(_transcription(), segment, refined)
+    assert result.quality.unclear_moments == [
+        "Step 2 is blurred",
+        "steps 1 and 4 look alike",
+    ]
+    assert result.steps[-1].notes == "Repeats step 1"
+
+
+def _action(num: int, start: float, **kwargs: Any) -> ActionStep:
+    """Action starting at ``start`` seconds, a click unless given."""
+    kwargs.setdefault("action", PlaywrightAction.CLICK)
+    return ActionStep(num=num, start=start, end=start + 1.0, **kwargs)
+
+
+def _playwright() -> PlaywrightTranscription:
+    """Playwright transcription whose second action is low confidence."""
+    return PlaywrightTranscription(
+        metadata=RecordingMetadata(
+            id="rec",
+            duration=30.0,
+            resolution="1920x1080",
+            recorded_at=datetime(2026, 1, 1),
+        ),
+        summary=WorkflowSummary(
+            task_type="checkout",
+            total_duration=30.0,
+            total_actions=3,
+            avg_action_duration=1.0,
+        ),
+        actions=[
+            _action(1, 5.0),
+            _action(2, 12.0, confidence=DetectionConfidence.LOW),
+            _action(
+                3,
+                25.0,
+                action=PlaywrightAction.TYPE,
+                selector=ElementSelector(type="text", value="Step 2 of 4"),
+                text_input="Step 2 of checkout",
+                mcp_params={"text": "Step 2 of checkout"},
+                detection_notes="Follows action 2",
+            ),
+        ],
+        quality=DetectionQuality(
+            overall_confidence=DetectionConfidence.MEDIUM,
+            detection_method="test",
+            high_confidence_actions=0,
+            low_confidence_actions=1,
+            processing_time=1.0,
+            model_version="test",
+        ),
+    )
+
+
+def test_typed_text_and_selectors_are_not_renumbered() -> None:
+    """Only narrative fields follow renumbering; recorded data is untouched."""
+    segment = RefinementSegment(start=10.0, end=20.0)
+    refined = [_action(1, 12.0), _action(2, 15.0)]
+    result, _, _ = splice_playwright(_playwright(), segment, refined)
+    typed = result.actions[-1]
+    assert typed.num == 4
+    assert typed.detection_notes == "Follows action 2"
+    assert typed.text_input == "Step 2 of checkout"
+    assert typed.selector is not None and typed.selector.value == "Step 2 of 4"
+    assert typed.mcp_params == {"text": "Step 2 of checkout"}
+
+
+def test_originals_kept_when_refinement_is_no_more_confident() -> None:
+    """Refined items no more confident than the originals are discarded."""
+    original = _playwright()
+    segment = RefinementSegment(start=10.0, end=20.0)
+    refined = [_action(1, 12.0, confidence=DetectionConfidence.LOW)]
+    result, removed, added = splice_playwright(original, segment, refined)
+    assert result is original
+    assert (removed, added) == (0, 0)
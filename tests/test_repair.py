@@ -0,0 +1,133 @@
+"""Tests for schema repair of structured model outputs."""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Type
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    DetectionConfidence,
+    DetectionQuality,
+)
+from agent_workflow_suite.core.agents.sop_markdown.models import (
+    RiskAssessment,
+    RiskLevel,
+)
+from agent_workflow_suite.core.repair import SchemaRepairer
+
+
+def test_missing_confidence_defaults_to_medium() -> None:
+    """An allow-listed confidence field is filled in without a model."""
+    text = json.dumps(
+        {
+            "detection_method": "frames",
+            "high_confidence_actions": 3,
+            "low_confidence_actions": 1,
+            "processing_time": 2.5,
+            "model_version": "v1",
+        }
+    )
+    repairer = SchemaRepairer(use_model=False)
+    doc = asyncio.run(repairer.repair(text, DetectionQuality))
+    assert doc.overall_confidence == DetectionConfidence.MEDIUM
+
+
+def test_missing_risk_category_is_regenerated() -> None:
+    """Other missing enums go to the regenerator instead of defaulting."""
+    prompts: List[str] = []
+
+    async def regenerate(prompt: str, schema: Type[BaseModel]) -> str:
+        prompts.append(prompt)
+        return json.dumps({"value": "high"})
+
+    repairer = SchemaRepairer(regenerator=regenerate)
+    doc, outcome = asyncio.run(
+        repairer.repair_with_outcome(json.dumps({}), RiskAssessment)
+    )
+    assert doc.risk_category == RiskLevel.HIGH
+    assert len(prompts) == 1
+    assert outcome.regenerated and not outcome.fixes
+
+
+def test_concurrent_repairs_get_their_own_outcome() -> None:
+    """A shared repairer returns each caller the outcome of its own output."""
+    repairer = SchemaRepairer(use_model=False)
+    valid = json.dumps({"risk_category": "low"})
+    fixable = json.dumps({"risk_category": "LOW"})
+
+    async def run() -> List[bool]:
+        results = await asyncio.gather(
+            repairer.repair_with_outcome(valid, RiskAssessment),
+            repairer.repair_with_outcome(fixable, RiskAssessment),
+        )
+        return [outcome.valid_as_generated for _, outcome in results]
+
+    assert asyncio.run(run()) == [True, False]
+
+
+def _quality(**overrides: Any) -> str:
+    """DetectionQuality JSON with some fields replaced."""
+    doc: Dict[str, Any] = {
+        "overall_confidence": "high",
+        "detection_method": "frames",
+        "high_confidence_actions": 3,
+        "low_confidence_actions": 1,
+        "processing_time": 2.5,
+        "model_version": "v1",
+    }
+    doc.update(overrides)
+    return json.dumps(doc)
+
+
+def test_lossless_values_are_fixed_by_rules() -> None:
+    """Exact numeric strings, whole floats and enum spellings are coerced."""
+    text = _quality(
+        overall_confidence="HIGH",
+        high_confidence_actions="3",
+        low_confidence_actions=1.0,
+        processing_time="1:05",
+    )
+    repairer = SchemaRepairer(use_model=False)
+    doc, outcome = asyncio.run(repairer.repair_with_outcome(text, DetectionQuality))
+    assert doc.overall_confidence == DetectionConfidence.HIGH
+    assert doc.high_confidence_actions == 3
+    assert doc.low_confidence_actions == 1
+    assert doc.processing_time == 65
+    assert not outcome.regenerated
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"high_confidence_actions": "Step 3"},
+        {"high_confidence_actions": 2.5},
+        {"high_confidence_actions": "1,5"},
+        {"processing_time": "about 2 seconds"},
+        {"overall_confidence": "hihg"},
+        {"overall_confidence": "med"},
+    ],
+)
+def test_guesses_are_left_to_regeneration(overrides: Dict[str, Any]) -> None:
+    """Values that would need interpreting are not coerced by rules."""
+    repairer = SchemaRepairer(use_model=False)
+    with pytest.raises(ValidationError):
+        asyncio.run(repairer.repair(_quality(**overrides), DetectionQuality))
+
+
+def test_regenerated_value_replaces_the_guess() -> None:
+    """An ambiguous count is regenerated rather than rounded."""
+
+    async def regenerate(prompt: str, schema: Type[BaseModel]) -> str:
+        assert "high_confidence_actions" in prompt
+        return json.dumps({"value": 7})
+
+    repairer = SchemaRepairer(regenerator=regenerate)
+    doc, outcome = asyncio.run(
+        repairer.repair_with_outcome(
+            _quality(high_confidence_actions=2.5), DetectionQuality
+        )
+    )
+    assert doc.high_confidence_actions == 7
+    assert outcome.regenerated == ["high_confidence_actions"]
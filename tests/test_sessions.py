@@ -0,0 +1,107 @@
+"""Tests for the session-affinity browser session scheduler."""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from agent_workflow_suite.core.execution import (
+    BrowserSession,
+    SessionScheduler,
+    WorkItem,
+)
+
+
+class _Tool:
+    """Browser tool that answers immediately."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def run_async(self, args: Dict[str, Any], tool_context: Any) -> str:
+        return "ok"
+
+
+class _Toolset:
+    """Toolset recording the tasks it was connected and closed in."""
+
+    def __init__(self) -> None:
+        self.opened_in: Optional[asyncio.Task] = None
+        self.closed_in: Optional[asyncio.Task] = None
+
+    async def get_tools(self) -> List[_Tool]:
+        if self.opened_in is None:
+            self.opened_in = asyncio.current_task()
+        return [_Tool("browser_navigate")]
+
+    async def close(self) -> None:
+        self.closed_in = asyncio.current_task()
+
+
+def _scheduler(tmp_path: Any, toolsets: List[_Toolset], **kwargs: Any) -> Any:
+    """Scheduler whose sessions use recorded fake toolsets."""
+
+    def factory(profile_dir: str, output_dir: str) -> _Toolset:
+        toolsets.append(_Toolset())
+        return toolsets[-1]
+
+    return SessionScheduler(
+        session_root=str(tmp_path), toolset_factory=factory, **kwargs
+    )
+
+
+def test_toolsets_close_in_the_task_that_opened_them(tmp_path: Any) -> None:
+    """Sessions opened by item tasks are closed without crossing tasks.
+
+    Two apps over two slots make later items evict the first app's sessions.
+    """
+    toolsets: List[_Toolset] = []
+    scheduler = _scheduler(tmp_path, toolsets, max_sessions=2)
+    items = [WorkItem(item_id=str(i), target_app=f"app{i % 2}") for i in range(6)]
+
+    async def handler(item: WorkItem, session: BrowserSession) -> str:
+        await asyncio.sleep(0.01)
+        return session.session_id
+
+    async def run() -> List[Any]:
+        try:
+            return await scheduler.run(items, handler)
+        finally:
+            await scheduler.close()
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, str) for r in results)
+    stats = scheduler.stats
+    assert stats.sessions_evicted > 0
+    assert stats.sessions_created + stats.sessions_reused == len(items)
+    assert len(toolsets) == stats.sessions_created
+    for toolset in toolsets:
+        assert toolset.closed_in is not None
+        assert toolset.closed_in is toolset.opened_in
+
+
+def test_sessions_recycle_after_clean_items_only(tmp_path: Any) -> None:
+    """Failed items discard the session without counting as processed."""
+    toolsets: List[_Toolset] = []
+    scheduler = _scheduler(tmp_path, toolsets, max_sessions=1, max_items_per_session=2)
+    item = WorkItem(item_id="a")
+
+    async def run() -> BrowserSession:
+        async with scheduler.lease(item):
+            pass
+        with pytest.raises(RuntimeError):
+            async with scheduler.lease(item) as session:
+                failed = session
+                raise RuntimeError("item failed")
+        async with scheduler.lease(item) as session:
+            pass
+        async with scheduler.lease(item):
+            pass
+        await scheduler.close()
+        return failed
+
+    failed = asyncio.run(run())
+    assert failed.items_processed == 1
+    assert scheduler.stats.failures == 1
+    assert scheduler.stats.sessions_recycled == 1
+    assert scheduler.stats.sessions_created == 2
@@ -0,0 +1,129 @@
+"""Tests for deterministic SOP step verification."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from agent_workflow_suite.core.agents.sop_markdown.models import (
+    SOPStep,
+    StepType,
+)
+from agent_workflow_suite.core.agents.sop_markdown.publish import sample_sop
+from agent_workflow_suite.core.agents.worker import (
+    AssertionKind,
+    StepVerifier,
+    Verdict,
+    compile_step,
+)
+from agent_workflow_suite.core.agents.worker.verify import _url_matches
+
+FORM = """- Page URL: https://app.example/records/new
+- Page Snapshot:
+```yaml
+- textbox "Name" [ref=e1]
+- button "Save" [ref=e2]
+```"""
+
+
+def _save_step(**kwargs: Any) -> SOPStep:
+    """SOP step that saves a form by clicking "Save"."""
+    fields: Dict[str, Any] = {
+        "step_num": "1.1",
+        "step_type": StepType.ACTION,
+        "title": "Save the record",
+        "description": "Save the form",
+        "responsible_role": "Operator",
+        "mcp_commands": ['browser_click(element="Save", ref="e2")'],
+        "verification_method": 'Click "Save" and confirm the record is stored',
+    }
+    fields.update(kwargs)
+    return SOPStep(**fields)
+
+
+def _verify(step: SOPStep, before: str, after: str) -> Dict[str, Any]:
+    """Run ``step`` from a page showing ``before`` to one showing ``after``."""
+    sop = sample_sop()
+    sop.sections[0].steps[0] = step
+    ctx = SimpleNamespace(
+        state={"sop_markdown": sop.model_dump(mode="json")}, invocation_id="inv"
+    )
+    verifier = StepVerifier()
+    verifier.after_tool_callback(
+        SimpleNamespace(name="browser_snapshot"), {}, ctx, before
+    )
+    verifier.after_tool_callback(SimpleNamespace(name="browser_click"), {}, ctx, after)
+    return asyncio.run(verifier.verify(ctx, step.step_num, 0))
+
+
+def test_quoted_control_label_is_not_checked() -> None:
+    """The label of the clicked button is not an expected outcome."""
+    checks = compile_step(_save_step())
+    assert not any(c.kind == AssertionKind.TEXT_PRESENT for c in checks)
+
+
+def test_text_already_on_the_page_does_not_pass_the_step() -> None:
+    """An unsaved form still showing the expected text is not a pass."""
+    step = _save_step(mcp_commands=[], verification_method='Page shows "Save"')
+    reply = _verify(step, FORM, FORM)
+    assert reply["verdict"] != Verdict.PASSED.value
+
+
+def test_text_that_appeared_after_the_step_passes_it() -> None:
+    """A confirmation that appears after the click passes the step."""
+    step = _save_step(verification_method='Banner reads "Record saved"')
+    saved = FORM.replace('- button "Save"', '- alert "Record saved"')
+    reply = _verify(step, FORM, saved)
+    assert reply["verdict"] == Verdict.PASSED.value
+
+
+def test_url_checks_stop_at_path_boundaries() -> None:
+    """A recorded URL matches itself and pages below it, not longer names."""
+    assert _url_matches("https://app.example/records/", "https://app.example/records")
+    assert _url_matches("https://app.example/records/7", "https://app.example/records")
+    assert _url_matches(
+        "https://app.example/records?page=2", "https://app.example/records"
+    )
+    assert not _url_matches(
+        "https://app.example/records-archive", "https://app.example/records"
+    )
+    assert not _url_matches("https://app.example/recordsets", "/records")
+
+
+def test_plans_follow_edited_steps() -> None:
+    """An edited step is compiled again even with the same SOP and number."""
+    verifier = StepVerifier()
+    sop = sample_sop()
+    saved = verifier.plan(sop, _save_step(verification_method='Shows "Saved"'))
+    stored = verifier.plan(sop, _save_step(verification_method='Shows "Stored"'))
+    assert [c.expected for c in saved] != [c.expected for c in stored]
+    again = verifier.plan(sop, _save_step(verification_method='Shows "Saved"'))
+    assert again is saved
+
+
+class _FailingProbe:
+    """Browser tool whose call always fails."""
+
+    name = "browser_snapshot"
+
+    async def run_async(self, args: Dict[str, Any], tool_context: Any) -> str:
+        raise RuntimeError("browser closed")
+
+
+class _Toolset:
+    async def get_tools(self) -> List[_FailingProbe]:
+        return [_FailingProbe()]
+
+
+def test_failed_probes_are_counted() -> None:
+    """A page state fetch that fails is recorded instead of hidden."""
+    step = _save_step(verification_method='Banner reads "Record saved"')
+    sop = sample_sop()
+    sop.sections[0].steps[0] = step
+    ctx = SimpleNamespace(
+        state={"sop_markdown": sop.model_dump(mode="json")}, invocation_id="inv"
+    )
+    verifier = StepVerifier(toolset=_Toolset())
+    reply = asyncio.run(verifier.verify(ctx, step.step_num, 0))
+    assert reply["verdict"] == Verdict.INCONCLUSIVE.value
+    assert verifier.stats.probe_failures == 1
+    assert verifier.stats.last_error == "browser_snapshot: browser closed"
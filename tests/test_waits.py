@@ -0,0 +1,145 @@
+"""Tests for replacing fixed waits with observed page conditions."""
+
+import asyncio
+import itertools
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from google.adk.agents import LlmAgent
+
+from agent_workflow_suite.core.agents.playwright_transcription import (
+    ActionStep,
+    PlaywrightAction,
+    PlaywrightTranscription,
+)
+from agent_workflow_suite.core.agents.playwright_transcription.models import (
+    ElementSelector,
+)
+from agent_workflow_suite.core.execution import (
+    WaitCondition,
+    WaitConditionType,
+    WaitResolver,
+    derive_wait_conditions,
+    make_fixed_wait_callback,
+)
+
+
+def _wait(callback: Any, seconds: float) -> Dict[str, Any]:
+    """Run the callback on a model-issued fixed wait."""
+    tool = SimpleNamespace(name="browser_wait_for")
+    return asyncio.run(callback(tool, {"time": seconds}, None))
+
+
+def test_fixed_wait_reports_idle_page() -> None:
+    """A quiet network resolves the wait early."""
+
+    async def caller(tool_name: str, args: Dict[str, Any]) -> str:
+        return "[GET] https://app.example/ => [200] OK"
+
+    resolver = WaitResolver(caller, poll_interval=0.01, idle_window=0.05)
+    result = _wait(make_fixed_wait_callback(resolver), 1)["result"]
+    assert result.startswith("Page idle after")
+
+
+def test_fixed_wait_reports_timeout() -> None:
+    """A network that never goes quiet is reported as a timeout."""
+    requests = itertools.count()
+
+    async def caller(tool_name: str, args: Dict[str, Any]) -> str:
+        return f"[GET] https://app.example/poll?n={next(requests)} => [200] OK"
+
+    resolver = WaitResolver(caller, poll_interval=0.01, idle_window=0.05)
+    result = _wait(make_fixed_wait_callback(resolver), 0.2)["result"]
+    assert result.startswith("Timed out after")
+
+
+def _step(
+    num: int, start: float, action: PlaywrightAction, **kwargs: Any
+) -> ActionStep:
+    """Recorded step starting at ``start`` seconds and lasting half a second."""
+    return ActionStep(num=num, start=start, end=start + 0.5, action=action, **kwargs)
+
+
+def _derive(actions: List[ActionStep]) -> List[WaitCondition]:
+    """Conditions of a transcription holding only ``actions``."""
+    return derive_wait_conditions(
+        PlaywrightTranscription.model_construct(actions=actions)
+    )
+
+
+def test_waits_map_to_text_url_and_element_conditions() -> None:
+    """Each recorded pause waits on what the following action needs."""
+    conditions = _derive(
+        [
+            _step(1, 0, PlaywrightAction.CLICK, page_context="https://app.example/a"),
+            _step(2, 1, PlaywrightAction.WAIT_FOR, mcp_params={"text": "Saved"}),
+            _step(3, 2, PlaywrightAction.WAIT_FOR, mcp_params={"time": 2}),
+            _step(4, 4, PlaywrightAction.CLICK, page_context="https://app.example/b"),
+            _step(
+                5,
+                7,
+                PlaywrightAction.CLICK,
+                page_context="https://app.example/b",
+                selector=ElementSelector(type="css", value="#next"),
+            ),
+        ]
+    )
+    assert [(c.source_step, c.type, c.value) for c in conditions] == [
+        (2, WaitConditionType.TEXT_VISIBLE, "Saved"),
+        (3, WaitConditionType.URL_CHANGE, "https://app.example/b"),
+        (4, WaitConditionType.ELEMENT_VISIBLE, "#next"),
+    ]
+    assert conditions[2].recorded_seconds == 2.5
+
+
+def test_short_and_covered_pauses_are_skipped() -> None:
+    """Brief pauses and pauses already followed by a wait yield nothing extra."""
+    conditions = _derive(
+        [
+            _step(1, 0, PlaywrightAction.CLICK),
+            _step(2, 1, PlaywrightAction.CLICK),
+            _step(3, 5, PlaywrightAction.WAIT_FOR, mcp_params={"textGone": "Loading"}),
+            _step(4, 9, PlaywrightAction.NAVIGATE, url="https://app.example/"),
+        ]
+    )
+    assert [(c.source_step, c.type) for c in conditions] == [
+        (3, WaitConditionType.TEXT_GONE),
+    ]
+
+
+def test_url_wait_ignores_other_tabs() -> None:
+    """A URL open in a background tab does not satisfy the wait."""
+
+    async def caller(tool_name: str, args: Dict[str, Any]) -> str:
+        return (
+            "### Open tabs\n"
+            "- 0: (current) [Form] (https://app.example/form)\n"
+            "- 1: [Done] (https://app.example/done)"
+        )
+
+    resolver = WaitResolver(caller, poll_interval=0.01)
+    condition = WaitCondition(
+        type=WaitConditionType.URL_CHANGE, value="/done", timeout=0.1
+    )
+    assert not asyncio.run(resolver.resolve(condition)).satisfied
+
+
+def test_attached_resolver_uses_recorded_conditions() -> None:
+    """The agent's fixed waits resolve on recorded conditions, then on idle."""
+    calls: List[Dict[str, Any]] = []
+
+    async def caller(tool_name: str, args: Dict[str, Any]) -> str:
+        calls.append(args)
+        return "[GET] https://app.example/ => [200] OK"
+
+    recorded = WaitCondition(
+        type=WaitConditionType.TEXT_VISIBLE, value="Saved", timeout=9
+    )
+    resolver = WaitResolver(caller, idle_window=0.01, conditions=[recorded])
+    agent = resolver.attach(LlmAgent(name="agent", model="gemini-2.5-pro"))
+    [callback] = agent.before_tool_callback
+    assert _wait(callback, 3)["result"].startswith("Observed text_visible Saved")
+    assert calls == [{"text": "Saved"}]
+    assert _wait(callback, 3)["result"].startswith("Page idle after")
+    resolver.start_item("next")
+    assert _wait(callback, 3)["result"].startswith("Observed")
@@ -0,0 +1,99 @@
+"""Tests for completion report writing, reading and merging."""
+
+import csv
+import time
+from datetime import datetime
+from typing import Any, List
+
+from agent_workflow_suite.core.execution import (
+    CompletionWriter,
+    merge_completion_reports,
+    read_completions,
+)
+from agent_workflow_suite.core.execution.models import (
+    CompletionRecord,
+    CompletionStatus,
+)
+from agent_workflow_suite.core.execution.workqueue import COMPLETION_COLUMNS
+
+
+def _record(item_id: str, notes: str = "", **kwargs: Any) -> CompletionRecord:
+    """Completed record for an item."""
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return CompletionRecord(
+        item_id=item_id,
+        status=CompletionStatus.COMPLETED,
+        start_time=now,
+        end_time=now,
+        notes=notes or None,
+        **kwargs,
+    )
+
+
+def test_list_columns_round_trip_values_with_commas(tmp_path: Any) -> None:
+    """URLs containing commas come back as the same list."""
+    path = str(tmp_path / "report.csv")
+    urls = ["https://app/x?ids=1,2,3", "https://app/y"]
+    with CompletionWriter(path) as writer:
+        writer.write(_record("a", screenshots=["a,1.png"], validation_urls=urls))
+    (record,) = list(read_completions(path))
+    assert record.validation_urls == urls
+    assert record.screenshots == ["a,1.png"]
+
+
+def test_legacy_comma_joined_rows_still_read(tmp_path: Any) -> None:
+    """Reports written before the JSON encoding keep their lists."""
+    path = tmp_path / "legacy.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COMPLETION_COLUMNS)
+        writer.writerow(
+            [
+                "a",
+                CompletionStatus.COMPLETED.value,
+                "2024-01-01 12:00:00",
+                "2024-01-01 12:00:00",
+            ]
+            + ["s1.png,s2.png", "https://app/x", "", ""]
+        )
+    (record,) = list(read_completions(str(path)))
+    assert record.screenshots == ["s1.png", "s2.png"]
+    assert record.validation_urls == ["https://app/x"]
+
+
+def test_idle_writer_flushes_pending_records(tmp_path: Any) -> None:
+    """Records are flushed after the interval even with no further writes."""
+    path = str(tmp_path / "report.csv")
+    writer = CompletionWriter(path, flush_rows=100, flush_interval=0.05)
+    try:
+        writer.write(_record("a"))
+        deadline = time.monotonic() + 2
+        while writer.flushes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [r.item_id for r in read_completions(path)] == ["a"]
+    finally:
+        writer.close()
+    assert writer.rows_written == 1
+
+
+def test_reopened_report_keeps_a_single_header(tmp_path: Any) -> None:
+    """Appending to an existing report does not repeat the header."""
+    path = str(tmp_path / "report.csv")
+    for item_id in ("a", "b"):
+        with CompletionWriter(path) as writer:
+            writer.write(_record(item_id))
+    assert [r.item_id for r in read_completions(path)] == ["a", "b"]
+
+
+def test_merge_keeps_the_latest_record_per_item(tmp_path: Any) -> None:
+    """Dedupe keeps each item's last record across shard reports."""
+    paths: List[str] = []
+    for shard, rows in enumerate([[("a", "first"), ("b", "b")], [("a", "retry")]]):
+        paths.append(str(tmp_path / f"shard{shard}.csv"))
+        with CompletionWriter(paths[-1]) as writer:
+            for item_id, notes in rows:
+                writer.write(_record(item_id, notes))
+    merged = str(tmp_path / "merged.csv")
+    assert merge_completion_reports(paths, merged) == 2
+    notes = {r.item_id: r.notes for r in read_completions(merged)}
+    assert notes == {"a": "retry", "b": "b"}